@@ -0,0 +1,123 @@
+# benchmarks/bench_canvas.py
+#
+# Frame time of the node canvas on a generated graph, plain vs scalable mode
+# (ui.canvas). Frames are painted synchronously, so the numbers include
+# culling and item painting but not the display. Runs without a display.
+#
+#   python -m benchmarks.bench_canvas --nodes 500
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QPointF
+from PyQt5.QtWidgets import QApplication, QGraphicsScene
+
+from nodes.blur_node import BlurNode
+from nodes.brightness_contrast_node import BrightnessContrastNode
+from nodes.edge_detection_node import EdgeDetectionNode
+from nodes.grayscale_node import GrayscaleNode
+from nodes.threshold_node import ThresholdNode
+from ui.canvas import NodeCanvas
+from ui.node_editor import ConnectionLine
+
+NODE_TYPES = (BrightnessContrastNode, GrayscaleNode, BlurNode, EdgeDetectionNode, ThresholdNode)
+COLUMNS = 25
+SPACING_X = 300
+SPACING_Y = 450
+
+
+def build_canvas(count, seed=0):
+    rng = random.Random(seed)
+    scene = QGraphicsScene()
+    canvas = NodeCanvas(scene)
+    canvas.resize(1280, 800)
+    nodes = []
+    for index in range(count):
+        node = NODE_TYPES[index % len(NODE_TYPES)]()
+        node.setPos(index % COLUMNS * SPACING_X, index // COLUMNS * SPACING_Y)
+        canvas.add_node(node)
+        nodes.append(node)
+    # A chain through every node plus extra edges to nearby later nodes.
+    edges = [(a, a + 1) for a in range(count - 1)]
+    edges += [(a, min(count - 1, a + rng.randint(2, COLUMNS))) for a in range(0, count - 1, 2)]
+    for a, b in edges:
+        scene.addItem(ConnectionLine(nodes[a], nodes[b]))
+    canvas.show()
+    return canvas, nodes, len(edges)
+
+
+def frame(canvas, app):
+    app.processEvents()
+    start = time.perf_counter()
+    canvas.viewport().repaint()
+    return time.perf_counter() - start
+
+
+def measure(canvas, nodes, app, frames):
+    results = {}
+    canvas.resetTransform()
+    canvas.centerOn(nodes[0])
+    frame(canvas, app)
+
+    times = []
+    for step in range(frames):  # pan diagonally across the graph
+        start = time.perf_counter()
+        canvas.centerOn(QPointF(step * 60, step * 40))
+        times.append(frame(canvas, app) + time.perf_counter() - start)
+    results["pan"] = times
+
+    times = []
+    node = nodes[len(nodes) // 2]
+    canvas.centerOn(node)
+    frame(canvas, app)
+    origin = node.pos()
+    for step in range(frames):  # drag one node around
+        start = time.perf_counter()
+        node.setPos(origin + QPointF(step * 3 % 120, step * 2 % 80))
+        times.append(frame(canvas, app) + time.perf_counter() - start)
+    node.setPos(origin)
+    results["drag"] = times
+
+    times = []
+    canvas.fit_all()  # whole graph in view
+    frame(canvas, app)
+    for step in range(frames):
+        start = time.perf_counter()
+        canvas.scale(1.01 if step % 2 else 1 / 1.01, 1.01 if step % 2 else 1 / 1.01)
+        canvas.cull_timer.start()
+        times.append(frame(canvas, app) + time.perf_counter() - start)
+    results["overview"] = times
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_canvas",
+                                     description="Canvas frame time, plain vs scalable mode.")
+    parser.add_argument("--nodes", type=int, default=500)
+    parser.add_argument("--frames", type=int, default=60)
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    start = time.perf_counter()
+    canvas, nodes, edges = build_canvas(args.nodes)
+    print(f"{args.nodes} nodes, {edges} edges, built in {time.perf_counter() - start:.2f} s")
+    print(f"{'mode':10} {'case':10} {'median ms':>10} {'p95 ms':>10} {'fps':>8}")
+    for scalable in (False, True):
+        canvas.set_scalable(scalable)
+        for case, times in measure(canvas, nodes, app, args.frames).items():
+            times.sort()
+            median = statistics.median(times)
+            p95 = times[min(len(times) - 1, int(0.95 * len(times)))]
+            mode = "scalable" if scalable else "plain"
+            print(f"{mode:10} {case:10} {median * 1000:10.2f} {p95 * 1000:10.2f} {1 / median:8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+# benchmarks/bench_nodes.py
+#
+# Per-node microbenchmarks. Times every kernel across image sizes, channel
+# counts and parameter extremes, plus the preview conversion path and whole
+# compiled chains, and writes the results as JSON. With --compare, a saved
+# baseline is checked and the run fails if any case got slower than the
+# allowed percentage.
+#
+#   python -m benchmarks.bench_nodes -o baseline.json
+#   python -m benchmarks.bench_nodes --sizes vga,1080p --compare baseline.json --threshold 15
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from core import kernels, noise
+from core.buffers import BufferPool
+from core.graph import EvalContext, Graph
+from core.operators import Blur, BrightnessContrast, EdgeDetection, Grayscale, ImageSink, ImageSource, Threshold
+from core.pipeline import CompiledPipeline
+
+SIZES = {
+    "vga": (640, 480),
+    "1080p": (1920, 1080),
+    "12mp": (4000, 3000),
+    "24mp": (6000, 4000),
+    "50mp": (8660, 5773),
+}
+
+BLUR_RADII = (1, 5, 24, 100, 500)
+# Direct Gaussian cost grows with the radius; past this it only measures patience.
+GAUSSIAN_MAX_RADIUS = 100
+BLEND_LAYERS = 8
+
+
+def make_image(size, channels, dtype=np.uint8):
+    width, height = size
+    rng = np.random.default_rng(0)
+    shape = (height, width) if channels == 1 else (height, width, channels)
+    peak = 65535 if dtype == np.uint16 else 255
+    return rng.integers(0, peak + 1, size=shape, dtype=dtype)
+
+
+def chain_pipeline(*ops):
+    graph = Graph(use_cache=False)
+    nodes = [graph.add_node(ImageSource())] + [graph.add_node(op) for op in ops] + [graph.add_node(ImageSink())]
+    for src, dst in zip(nodes, nodes[1:]):
+        graph.connect(src, dst)
+    return CompiledPipeline(graph)
+
+
+def pairwise_blend(image, layers):
+    # The same blends one layer at a time, as a reference for the fused pass.
+    for layer in layers:
+        image = kernels.blend(image, [layer])
+    return image
+
+
+def uncached_noise(kind, image):
+    noise.clear_cache()
+    return noise.generate(kind, image.shape, octaves=6)
+
+
+def adaptive_tweak(graph, source, threshold, image):
+    if source.image is not image:
+        source.set_image(image)
+    threshold.set_param("block_size", 112 - threshold.params["block_size"])  # 11 <-> 101
+    return graph.evaluate([threshold], EvalContext())[threshold]["image"]
+
+
+def preview_case():
+    try:
+        from ui.preview import preview_qimage
+    except ImportError:
+        return None  # PyQt5 not installed on this machine
+    return lambda image: preview_qimage(image, 400, 300)
+
+
+def cases(size_names):
+    preview = preview_case()
+    for size_name in size_names:
+        size = SIZES[size_name]
+        for channels in (1, 3):
+            for brightness, contrast in ((0, 1.0), (100, 3.0)):
+                yield (f"brightness_contrast/{size_name}/{channels}ch/b{brightness}_c{contrast}",
+                       size, channels, np.uint8,
+                       lambda img, b=brightness, c=contrast: kernels.brightness_contrast(img, b, c))
+            yield (f"brightness_contrast/{size_name}/{channels}ch/uint16",
+                   size, channels, np.uint16, lambda img: kernels.brightness_contrast(img, 50, 1.5))
+
+        for channels in (3, 4):
+            yield (f"grayscale/{size_name}/{channels}ch", size, channels, np.uint8, kernels.grayscale)
+            yield (f"channel_split/{size_name}/{channels}ch", size, channels, np.uint8, kernels.split_channels)
+            yield (f"channel_select/{size_name}/{channels}ch", size, channels, np.uint8,
+                   lambda img: kernels.select_channel(img, "R"))
+
+        for channels in (1, 3):
+            for engine in ("Gaussian", "Box", "Pyramid"):
+                for radius in BLUR_RADII:
+                    if engine == "Gaussian" and radius > GAUSSIAN_MAX_RADIUS:
+                        continue
+                    yield (f"blur/{size_name}/{channels}ch/{engine}/r{radius}", size, channels, np.uint8,
+                           lambda img, r=radius, e=engine: kernels.gaussian_blur(img, r, "Uniform", e))
+
+            for ksize in (1, 3, 5, 7):
+                yield (f"sobel/{size_name}/{channels}ch/k{ksize}", size, channels, np.uint8,
+                       lambda img, k=ksize: kernels.detect_edges(img, "Sobel", kernel_size=k))
+            for low, high in ((0, 10), (50, 150), (200, 255)):
+                yield (f"canny/{size_name}/{channels}ch/t{low}_{high}", size, channels, np.uint8,
+                       lambda img, lo=low, hi=high: kernels.detect_edges(img, "Canny", lo, hi))
+
+        for preset in ("Gaussian", "Disk"):
+            for ksize in (3, 31, 101):
+                kernel = kernels.preset_kernel(preset, ksize)
+                for method in kernels.CONVOLUTION_METHODS:
+                    yield (f"convolution/{size_name}/3ch/{preset}{ksize}/{method}", size, 3, np.uint8,
+                           lambda img, k=kernel, m=method: kernels.convolve(img, k, m))
+
+        for method in kernels.THRESHOLD_METHODS:
+            yield (f"threshold/{size_name}/3ch/{method}", size, 3, np.uint8,
+                   lambda img, m=method: Threshold(method=m).run(img))
+        graph = Graph()
+        source, threshold = graph.add_node(ImageSource()), graph.add_node(Threshold(method="Adaptive"))
+        graph.connect(source, threshold)
+        for dtype in (np.uint8, np.uint16):
+            # A block size change with the input's gray plane and integral
+            # image already cached.
+            yield (f"threshold/{size_name}/3ch/adaptive_tweak/{np.dtype(dtype).name}", size, 3, dtype,
+                   lambda img, g=graph, s=source, t=threshold: adaptive_tweak(g, s, t, img))
+
+        for dtype in (np.uint8, np.uint16):
+            layers = [make_image(size, 3, dtype)] * BLEND_LAYERS
+            for mode in kernels.BLEND_MODES:
+                stack = [(layer, mode, 0.5) for layer in layers]
+                yield (f"blend/{size_name}/3ch/{mode}x{BLEND_LAYERS}/{np.dtype(dtype).name}", size, 3, dtype,
+                       lambda img, s=stack: kernels.blend(img, s))
+                yield (f"blend/{size_name}/3ch/{mode}x{BLEND_LAYERS}/{np.dtype(dtype).name}/pairwise", size, 3, dtype,
+                       lambda img, s=stack: pairwise_blend(img, s))
+
+        for kind in noise.NOISE_KINDS:
+            yield (f"noise/{size_name}/{kind}", size, 1, np.uint8,
+                   lambda img, k=kind: uncached_noise(k, img))
+        yield (f"noise/{size_name}/Fractal/cached", size, 1, np.uint8,
+               lambda img: noise.generate("Fractal", img.shape, octaves=6))
+
+        if preview is not None:
+            for channels in (1, 3, 4):
+                yield (f"preview/{size_name}/{channels}ch", size, channels, np.uint8, preview)
+            yield (f"preview/{size_name}/3ch/uint16", size, 3, np.uint16, preview)
+
+        pointwise = chain_pipeline(BrightnessContrast(brightness=20, contrast=1.4), Grayscale(),
+                                   BrightnessContrast(contrast=0.8))
+        mixed = chain_pipeline(BrightnessContrast(brightness=10), Grayscale(), Blur(radius=8),
+                               EdgeDetection(method="Sobel"))
+        yield (f"chain/{size_name}/3ch/pointwise_fused", size, 3, np.uint8, pointwise.run)
+        yield (f"chain/{size_name}/3ch/bc_gray_blur_sobel", size, 3, np.uint8, mixed.run)
+        pool = BufferPool()
+        yield (f"chain/{size_name}/3ch/bc_gray_blur_sobel/pooled", size, 3, np.uint8,
+               lambda img: mixed.run(img, EvalContext(pool=pool)))
+
+
+def time_case(func, image, repeat, max_seconds):
+    func(image)  # warm up OpenCV's dispatch and allocator
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < repeat:
+        start = time.perf_counter()
+        func(image)
+        timings.append(time.perf_counter() - start)
+        if time.perf_counter() - started > max_seconds:
+            break
+    return {
+        "min_ms": min(timings) * 1000,
+        "median_ms": statistics.median(timings) * 1000,
+        "runs": len(timings),
+    }
+
+
+def run_benchmarks(size_names, repeat=5, max_seconds=2.0, pattern=None, out=sys.stdout):
+    results = {}
+    images = {}
+    for name, size, channels, dtype, func in cases(size_names):
+        if pattern and pattern not in name:
+            continue
+        key = (size, channels, np.dtype(dtype).name)
+        if key not in images:
+            images.clear()  # keep at most one 50 MP frame alive
+            images[key] = make_image(size, channels, dtype)
+        result = time_case(func, images[key], repeat, max_seconds)
+        results[name] = result
+        print(f"{name:60s} {result['min_ms']:10.2f} ms  (median {result['median_ms']:.2f}, {result['runs']} runs)", file=out)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "cpu_count": os.cpu_count(),
+            "cv_threads": cv2.getNumThreads(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold, out=sys.stdout):
+    # Compares min times, the least noisy statistic; returns the regressions.
+    regressions = []
+    for name, result in sorted(current["results"].items()):
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        change = (result["min_ms"] / base["min_ms"] - 1.0) * 100 if base["min_ms"] > 0 else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:60s} {base['min_ms']:10.2f} -> {result['min_ms']:10.2f} ms  {change:+7.1f}%{flag}", file=out)
+    print(f"{len(regressions)} regression(s) over {threshold:.1f}%", file=out)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_nodes", description="Per-node microbenchmarks.")
+    parser.add_argument("--sizes", default=",".join(SIZES), help="comma separated subset of: " + ", ".join(SIZES))
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case")
+    parser.add_argument("--max-seconds", type=float, default=2.0, help="stop repeating a case after this long")
+    parser.add_argument("-k", "--filter", default=None, help="only run cases whose name contains this")
+    parser.add_argument("-o", "--output", default=None, help="write results JSON here")
+    parser.add_argument("--compare", default=None, help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed slowdown in percent")
+    args = parser.parse_args(argv)
+
+    size_names = [name.strip() for name in args.sizes.split(",") if name.strip()]
+    unknown = [name for name in size_names if name not in SIZES]
+    if unknown:
+        parser.error(f"unknown size(s): {', '.join(unknown)}")
+
+    current = run_benchmarks(size_names, args.repeat, args.max_seconds, args.filter)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, current, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
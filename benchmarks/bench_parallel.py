@@ -0,0 +1,82 @@
+# benchmarks/bench_parallel.py
+#
+# Measures what branch-parallel evaluation buys over serial evaluation of the
+# same graph. Without a graph file a fan-out graph is used: one source feeding
+# blur, box blur, Sobel and Canny branches.
+#
+#   python -m benchmarks.bench_parallel --size 12mp --workers 4
+#   python -m benchmarks.bench_parallel --graph graph.json --image scan.png
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from benchmarks.bench_nodes import SIZES, make_image
+from core.graph import EvalContext, Graph
+from core.image_io import read_image
+from core.operators import Blur, BrightnessContrast, EdgeDetection, ImageSource
+from core.serialization import load_graph
+
+
+def fan_out_graph():
+    graph = Graph(use_cache=False)
+    source = graph.add_node(ImageSource())
+    targets = []
+    for op in (Blur(radius=20), Blur(radius=120, engine="Box"),
+               EdgeDetection(method="Sobel", kernel_size=5), EdgeDetection(method="Canny")):
+        graph.add_node(op)
+        graph.connect(source, op)
+        contrast = graph.add_node(BrightnessContrast(contrast=1.2))
+        graph.connect(op, contrast)
+        targets.append(contrast)
+    return graph, source, targets
+
+
+def time_evaluate(graph, targets, workers, repeat):
+    graph.workers = workers
+    graph.evaluate(targets, EvalContext())  # warm up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        graph.evaluate(targets, EvalContext())
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_parallel",
+                                     description="Serial vs branch-parallel graph evaluation.")
+    parser.add_argument("--graph", default=None, help="graph JSON (default: built-in fan-out graph)")
+    parser.add_argument("--image", default=None, help="source image (default: synthetic)")
+    parser.add_argument("--size", default="12mp", choices=SIZES, help="synthetic image size")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.graph:
+        graph = load_graph(args.graph)
+        graph.use_cache = False
+        sources = [n for n in graph.nodes if n.type_name == "ImageInput"]
+        targets = [n for n in graph.nodes if not graph.output_edges(n)]
+    else:
+        graph, source, targets = fan_out_graph()
+        sources = [source]
+    image = read_image(args.image) if args.image else make_image(SIZES[args.size], 3)
+    if image is None:
+        parser.error(f"could not decode {args.image}")
+    for source in sources:
+        source.set_image(image)
+
+    serial = time_evaluate(graph, targets, 1, args.repeat)
+    parallel = time_evaluate(graph, targets, args.workers, args.repeat)
+    print(f"{len(graph.nodes)} nodes, {image.shape[1]}x{image.shape[0]}, {os.cpu_count()} cores")
+    print(f"serial   {serial * 1000:10.1f} ms")
+    print(f"parallel {parallel * 1000:10.1f} ms  ({args.workers} workers)")
+    print(f"speedup  {serial / parallel:10.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+# core/batch.py
+#
+# Headless batch runner: applies a saved graph to every image matched by a
+# directory or glob, spread over a process pool.
+#
+#   python -m core.batch graph.json "scans/*.png" -o out/ --workers 8 --resume
+#
+# With --cache-dir, node results persist on disk (core.disk_cache) and a
+# rerun with one parameter changed only recomputes from that node on; an
+# image whose needed results are all on disk is not even decoded.
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import cv2
+
+from core.buffers import BufferPool
+from core.disk_cache import DiskCache, file_digest
+from core.graph import EvalContext, GraphError
+from core.image_io import read_image, write_image
+from core.pipeline import CompiledPipeline, pipeline_from_dict
+from core.profiling import Profiler
+from core.serialization import graph_to_dict, load_graph
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+
+_worker_state = {}
+
+
+def find_inputs(pattern):
+    if os.path.isdir(pattern):
+        paths = [
+            os.path.join(pattern, name) for name in os.listdir(pattern)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        ]
+    else:
+        paths = glob.glob(pattern, recursive=True)
+    return sorted(p for p in paths if os.path.isfile(p))
+
+
+def output_path(path, output_dir, extension):
+    stem, suffix = os.path.splitext(os.path.basename(path))
+    return os.path.join(output_dir, stem + (extension or suffix))
+
+
+def _init_worker(graph_data, cv_threads, trace=False, cache_dir=None):
+    cv2.setNumThreads(cv_threads)
+    # Compiled once per worker; each image then only costs the kernels.
+    _worker_state["pipeline"] = pipeline_from_dict(graph_data)
+    _worker_state["profiler"] = Profiler() if trace else None
+    _worker_state["pool"] = BufferPool()
+    _worker_state["disk_cache"] = DiskCache(cache_dir) if cache_dir else None
+
+
+def _decode(path):
+    start = time.perf_counter()
+    image = read_image(path)
+    _trace_io("decode", start, path)
+    return image, time.perf_counter() - start
+
+
+def _lazy_decode(path, stat):
+    # Decodes on first call only, recording the time in stat.
+    decoded = []
+
+    def load():
+        if not decoded:
+            image, stat["decode"] = _decode(path)
+            decoded.append(image)
+        return decoded[0]
+    return load
+
+
+def _encode(path, image):
+    # Write under a temporary name so an interrupted run never leaves a
+    # truncated file that --resume would mistake for a finished output.
+    start = time.perf_counter()
+    stem, suffix = os.path.splitext(path)
+    partial = stem + ".partial" + suffix
+    ok = write_image(partial, image)
+    if ok:
+        os.replace(partial, path)
+    _trace_io("encode", start, path)
+    return ok, time.perf_counter() - start
+
+
+def _trace_io(name, start, path):
+    profiler = _worker_state.get("profiler")
+    if profiler is not None:
+        profiler.record(name, start, category="io", path=path)
+
+
+def process_chunk(jobs):
+    # Decode of the next image and encode of the previous one run on I/O
+    # threads while the current image is computed; imread/imwrite and the
+    # kernels all release the GIL. With a disk cache images are decoded on
+    # demand instead, since a cached run may not need the pixels at all.
+    # Returns per-image stats and, when tracing, the chunk's trace events.
+    pipeline = _worker_state["pipeline"]
+    profiler = _worker_state["profiler"]
+    disk_cache = _worker_state["disk_cache"]
+    context = EvalContext(profiler=profiler, pool=_worker_state["pool"], disk_cache=disk_cache)
+    stats = []
+    with ThreadPoolExecutor(max_workers=2) as io:
+        if disk_cache is None:
+            next_decode = io.submit(_decode, jobs[0][0])
+        writes = []
+        for index, (src_path, dst_path) in enumerate(jobs):
+            stat = {"path": src_path, "output": dst_path, "decode": 0.0}
+            stats.append(stat)
+            source_key = None
+            if disk_cache is None:
+                image, stat["decode"] = next_decode.result()
+                if index + 1 < len(jobs):
+                    next_decode = io.submit(_decode, jobs[index + 1][0])
+                if image is None:
+                    stat["error"] = "could not decode"
+                    continue
+            else:
+                image = _lazy_decode(src_path, stat)
+                try:
+                    source_key = file_digest(src_path)
+                except OSError as exc:
+                    stat["error"] = f"could not read: {exc.strerror}"
+                    continue
+
+            start = time.perf_counter()
+            try:
+                result = pipeline.run(image, context, source_key)
+            except Exception as exc:  # e.g. cv2.error on an unsupported image layout
+                stat["error"] = f"render failed: {exc}"
+                continue
+            stat["compute"] = time.perf_counter() - start - (stat["decode"] if source_key else 0.0)
+            if result is None:
+                stat["error"] = "could not decode" if callable(image) and image() is None else "graph produced no output"
+                continue
+            stat["megapixels"] = result.shape[0] * result.shape[1] / 1e6
+            writes.append((stat, io.submit(_encode, dst_path, result)))
+
+        for stat, future in writes:
+            try:
+                ok, stat["encode"] = future.result()
+            except Exception as exc:  # cv2.error, e.g. a layout the format cannot hold
+                stat["error"] = f"could not encode: {exc}"
+                continue
+            if not ok:
+                stat["error"] = "could not encode"
+    if profiler is None:
+        return stats, []
+    events = list(profiler.events)
+    profiler.clear()
+    return stats, events
+
+
+def format_stat(stat):
+    if "error" in stat:
+        return f"FAIL {stat['path']}: {stat['error']}"
+    total = stat["decode"] + stat["compute"] + stat["encode"]
+    return (
+        f"ok   {stat['path']} -> {stat['output']}  "
+        f"decode {stat['decode'] * 1000:.1f} ms  compute {stat['compute'] * 1000:.1f} ms  "
+        f"encode {stat['encode'] * 1000:.1f} ms  {stat['megapixels'] / total:.1f} MP/s"
+    )
+
+
+def run(graph_path, pattern, output_dir, workers=None, chunk_size=4, extension=None,
+        resume=False, trace_path=None, out=sys.stdout, cache_dir=None):
+    graph_data = _graph_data(graph_path)
+    os.makedirs(output_dir, exist_ok=True)
+
+    jobs, skipped = [], 0
+    for path in find_inputs(pattern):
+        dst = output_path(path, output_dir, extension)
+        if resume and os.path.exists(dst):
+            skipped += 1
+            continue
+        jobs.append((path, dst))
+
+    workers = workers or os.cpu_count() or 1
+    cv_threads = max(1, (os.cpu_count() or 1) // workers)
+    chunk_size = max(chunk_size, 1)
+    chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+
+    profiler = Profiler(max_events=None) if trace_path else None
+    start = time.perf_counter()
+    done, failed, megapixels = 0, 0, 0.0
+    if chunks:
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(graph_data, cv_threads, profiler is not None, cache_dir)) as pool:
+            futures = [pool.submit(process_chunk, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                stats, events = future.result()
+                if profiler is not None:
+                    profiler.extend(events)
+                for stat in stats:
+                    print(format_stat(stat), file=out)
+                    if "error" in stat:
+                        failed += 1
+                    else:
+                        done += 1
+                        megapixels += stat["megapixels"]
+    elapsed = time.perf_counter() - start
+
+    rate = done / elapsed if elapsed > 0 else 0.0
+    mp_rate = megapixels / elapsed if elapsed > 0 else 0.0
+    print(
+        f"{done} written, {failed} failed, {skipped} skipped in {elapsed:.2f} s "
+        f"({rate:.2f} images/s, {mp_rate:.1f} MP/s, {workers} workers)",
+        file=out,
+    )
+    if profiler is not None:
+        profiler.save_trace(trace_path)
+        print(f"trace written to {trace_path}", file=out)
+    return failed == 0
+
+
+def _graph_data(graph_path):
+    graph = load_graph(graph_path)
+    CompiledPipeline(graph)  # fail fast, before any worker is spawned
+    return graph_to_dict(graph)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.batch", description="Apply a saved node graph to many images.")
+    parser.add_argument("graph", help="graph JSON file")
+    parser.add_argument("inputs", help="input directory or glob pattern")
+    parser.add_argument("-o", "--output-dir", required=True)
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=4, help="images per worker task")
+    parser.add_argument("--ext", default=None, help="output extension, e.g. .png (default: same as input)")
+    parser.add_argument("--resume", action="store_true", help="skip images whose output already exists")
+    parser.add_argument("--trace", default=None, help="write a Chrome trace_event JSON of every node run here")
+    parser.add_argument("--cache-dir", default=None, help="keep node results in this persistent disk cache")
+    args = parser.parse_args(argv)
+
+    try:
+        ok = run(args.graph, args.inputs, args.output_dir, args.workers, args.chunk_size,
+                 args.ext, args.resume, args.trace, cache_dir=args.cache_dir)
+    except (GraphError, OSError, ValueError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
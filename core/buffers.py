@@ -0,0 +1,77 @@
+# core/buffers.py
+#
+# Shape/dtype keyed pool of output and scratch arrays, so a slider drag does
+# not allocate (and page-fault in) fresh full-frame buffers on every
+# evaluation. Kernels take their buffers from the pool passed in through the
+# EvalContext and fill them with out=/dst= arguments.
+#
+# A pooled array is handed out again only once nothing outside the pool
+# refers to it any more: no cache entry, no view, no caller. That is checked
+# with the array's reference count, so reuse can never overwrite data that is
+# still visible somewhere. Arrays past the memory budget are simply dropped
+# from the pool (least recently used first) and freed as usual.
+
+import sys
+import threading
+
+import numpy as np
+
+DEFAULT_BUDGET = 512 * 2**20
+
+
+def _idle_refcount():
+    # References to a pooled array nobody else holds, as seen from take():
+    # the pool's list, the local name and getrefcount's argument.
+    buffers = [np.empty(0)]
+    buffer = buffers[0]
+    return sys.getrefcount(buffer)
+
+
+class BufferPool:
+    def __init__(self, budget=DEFAULT_BUDGET):
+        self.budget = budget
+        self.buffers = []  # least recently used first
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.idle_refs = _idle_refcount()
+        self.local = threading.local()
+
+    def take(self, shape, dtype):
+        # Contents are undefined, as with np.empty.
+        shape = tuple(shape)
+        dtype = np.dtype(dtype)
+        with self.lock:
+            for index in range(len(self.buffers) - 1, -1, -1):
+                buffer = self.buffers[index]
+                if buffer.shape == shape and buffer.dtype == dtype and sys.getrefcount(buffer) <= self.idle_refs:
+                    del self.buffers[index]
+                    self.buffers.append(buffer)
+                    self.hits += 1
+                    return buffer
+            buffer = np.empty(shape, dtype)
+            self.misses += 1
+            self.local.allocated = self.allocated() + buffer.nbytes
+            if buffer.nbytes <= self.budget:
+                self.buffers.append(buffer)
+                self.nbytes += buffer.nbytes
+                while self.nbytes > self.budget:
+                    self.nbytes -= self.buffers.pop(0).nbytes
+            return buffer
+
+    def allocated(self):
+        # Bytes the calling thread's misses have allocated so far; the
+        # difference between two readings is what a node run allocated.
+        return getattr(self.local, "allocated", 0)
+
+    def clear(self):
+        with self.lock:
+            self.buffers = []
+            self.nbytes = 0
+
+
+def empty(pool, shape, dtype):
+    if pool is None:
+        return np.empty(shape, dtype)
+    return pool.take(shape, dtype)
@@ -0,0 +1,164 @@
+# core/disk_cache.py
+#
+# Optional persistent cache of node outputs, shared between sessions and
+# batch runs. Entries are content addressed: a step's key hashes the node
+# types and parameters of the step, the evaluation scale and region, and the
+# keys of everything it reads, down to the content of the source file. So a
+# reopened session or a batch rerun with one parameter changed finds
+# everything upstream of the change on disk.
+#
+# Outputs are stored as one .npy file per output port and served with
+# np.load(mmap_mode="r"): a hit costs no decode and no copy, only the page
+# faults of the pixels actually read. Served arrays are read-only.
+#
+# Only results that took at least min_seconds to compute are written, so
+# cheap pointwise nodes do not turn every slider move into disk traffic.
+# Files past the size budget are deleted least recently used first; hits
+# refresh a file's mtime, which is the recency seen by later sessions.
+# Several processes may share a directory; each one enforces the budget over
+# the files it knows about.
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_DISK_BUDGET = 4 * 2**30
+DEFAULT_MIN_SECONDS = 0.05
+# Bump when a kernel changes its results, so stale entries stop matching.
+CACHE_FORMAT = 4
+
+_digests = {}
+_digests_lock = threading.Lock()
+
+
+def default_directory():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "node-image-processor")
+
+
+def file_digest(path):
+    # sha1 of the file's bytes, remembered per (path, mtime, size).
+    stat = os.stat(path)
+    key = (os.path.realpath(path), stat.st_mtime_ns, stat.st_size)
+    with _digests_lock:
+        if key in _digests:
+            return _digests[key]
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    with _digests_lock:
+        _digests[key] = digest.hexdigest()
+    return _digests[key]
+
+
+def array_digest(image):
+    digest = hashlib.sha1(repr((image.shape, image.dtype.str)).encode())
+    digest.update(np.ascontiguousarray(image).data)
+    return digest.hexdigest()
+
+
+def step_key(chain, upstream, context):
+    # upstream: {input port: (producer key, output port)}, or for a source
+    # {"content": digest of its image}.
+    nodes = [(node.type_name, node.param_key()) for node in chain]
+    region = tuple(context.region) if context.region is not None else None
+    text = repr((CACHE_FORMAT, context.scale, tuple(context.origin), region, nodes, sorted(upstream.items())))
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def cacheable(node, outputs):
+    # Lazily produced ports are skipped: storing them would compute them all.
+    return type(outputs) is dict and all(
+        isinstance(outputs.get(port.name), np.ndarray) for port in node.outputs
+    )
+
+
+class DiskCache:
+    def __init__(self, directory=None, budget=DEFAULT_DISK_BUDGET, min_seconds=DEFAULT_MIN_SECONDS):
+        self.directory = directory or default_directory()
+        self.budget = budget
+        self.min_seconds = min_seconds
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        # {file name: bytes}, least recently used first.
+        self.files = OrderedDict()
+        self.nbytes = 0
+        found = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npy") and entry.is_file():
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(found):
+            self.files[name] = size
+            self.nbytes += size
+
+    def path(self, key, port):
+        return os.path.join(self.directory, f"{key}.{port}.npy")
+
+    def get(self, key, node):
+        outputs = {}
+        try:
+            for port in node.outputs:
+                path = self.path(key, port.name)
+                outputs[port.name] = np.load(path, mmap_mode="r", allow_pickle=False)
+                os.utime(path)
+        except (OSError, ValueError):
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+            for port in node.outputs:
+                name = os.path.basename(self.path(key, port.name))
+                if name in self.files:
+                    self.files.move_to_end(name)
+        return outputs
+
+    def put(self, key, node, outputs, seconds):
+        if seconds < self.min_seconds or not cacheable(node, outputs):
+            return False
+        for port in node.outputs:
+            path = self.path(key, port.name)
+            # Written under a temporary name so readers never see half a file.
+            partial = f"{path}.{os.getpid()}.{threading.get_ident()}.partial"
+            try:
+                with open(partial, "wb") as f:
+                    np.save(f, outputs[port.name], allow_pickle=False)
+                os.replace(partial, path)
+            except OSError:
+                if os.path.exists(partial):
+                    os.remove(partial)
+                return False
+            self.add_file(os.path.basename(path), os.path.getsize(path))
+        return True
+
+    def add_file(self, name, size):
+        evicted = []
+        with self.lock:
+            self.nbytes += size - self.files.pop(name, 0)
+            self.files[name] = size
+            while self.nbytes > self.budget and len(self.files) > 1:
+                old, old_size = self.files.popitem(last=False)
+                self.nbytes -= old_size
+                evicted.append(old)
+        for old in evicted:
+            try:
+                os.remove(os.path.join(self.directory, old))
+            except OSError:
+                pass
+
+    def clear(self):
+        with self.lock:
+            names, self.files, self.nbytes = list(self.files), OrderedDict(), 0
+        for name in names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
@@ -0,0 +1,12 @@
+# core/errors.py
+#
+# Exceptions of the graph engine. Kept free of imports so that modules which
+# only describe nodes (core.registry) load without numpy or OpenCV.
+
+
+class GraphError(Exception):
+    pass
+
+
+class EvaluationCancelled(GraphError):
+    pass
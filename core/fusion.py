@@ -0,0 +1,148 @@
+# core/fusion.py
+#
+# Fusion of consecutive pointwise nodes. A pointwise node describes itself
+# with pointwise_stage():
+#
+#   ("lut", table)        same 256-entry table applied to every colour
+#                         channel; alpha passes through
+#   ("reduce", "gray")    BGR -> single-channel luma
+#   ("reduce", channel)   pick one channel ("R", "G", "B" or "A")
+#
+# or with a list of stages, applied in order (Threshold: gray, then a LUT).
+#
+# A chain of such nodes compiles to at most one LUT on the input, one
+# reduction and one LUT on the single reduced plane, instead of a full-frame
+# float round trip per node. Per-channel LUTs commute with channel selection
+# and reducing a single-channel image again is the identity, so the fused
+# result is bit-exact.
+
+import cv2
+import numpy as np
+
+from core import kernels
+from core.buffers import empty
+
+CHANNEL_INDEX = kernels.CHANNEL_INDEX
+
+
+def is_pointwise(node):
+    return hasattr(node, "pointwise_stage") and node.pointwise_stage() is not None
+
+
+def primary_only(graph, node, targets):
+    # A fused run only produces the primary (first) output of its nodes.
+    if len(node.outputs) == 1:
+        return True
+    primary = node.outputs[0].name
+    return node not in targets and all(e.src_port == primary for e in graph.output_edges(node))
+
+
+def plan_chains(graph, order, targets=None):
+    # Returns {tail: [head, ..., tail]} for every run of two or more pointwise
+    # nodes where each intermediate result feeds only the next node and is not
+    # itself requested.
+    targets = set(targets or ())
+    in_order = set(order)
+    claimed = set()
+    chains = {}
+    for node in order:
+        if node in claimed or not is_pointwise(node) or not primary_only(graph, node, targets):
+            continue
+        chain = [node]
+        current = node
+        while current not in targets:
+            out_edges = graph.output_edges(current)
+            if len(out_edges) != 1:
+                break
+            nxt = out_edges[0].dst
+            if (nxt not in in_order or not is_pointwise(nxt) or len(graph.input_edges(nxt)) != 1
+                    or not primary_only(graph, nxt, targets)):
+                break
+            chain.append(nxt)
+            current = nxt
+        if len(chain) > 1:
+            claimed.update(chain)
+            chains[chain[-1]] = chain
+    return chains
+
+
+def compose(first, second):
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return second[first]
+
+
+def expand(stages):
+    for stage in stages:
+        if isinstance(stage, list):
+            yield from stage
+        else:
+            yield stage
+
+
+class FusedPointwise:
+    def __init__(self, stages):
+        self.pre_lut = None
+        self.reducer = None
+        self.post_lut = None
+        self.valid = True
+        for stage in expand(stages):
+            if stage[0] == "lut":
+                table = np.asarray(stage[1], dtype=np.uint8).reshape(256)
+                if self.reducer is None:
+                    self.pre_lut = compose(self.pre_lut, table)
+                else:
+                    self.post_lut = compose(self.post_lut, table)
+            elif self.reducer is None:
+                self.reducer = stage[1]
+                if self.reducer != "gray":
+                    # Selecting a channel commutes with a per-channel LUT, so
+                    # run the LUT on the single plane instead. Alpha never
+                    # went through it.
+                    self.post_lut = self.pre_lut if self.reducer != "A" else None
+                    self.pre_lut = None
+            elif stage[1] == "A":
+                # A single-channel plane has no alpha channel to select.
+                self.valid = False
+
+    def accepts(self, image):
+        # Tables only cover 8-bit input.
+        return self.valid and image.dtype == np.uint8
+
+    def apply(self, image, pool=None):
+        source = image
+        if self.pre_lut is not None:
+            image = cv2.LUT(image, self.pre_lut, dst=empty(pool, image.shape, np.uint8))
+        if self.reducer is None:
+            return kernels.keep_alpha(image, source)
+        if self.reducer == "gray":
+            plane = kernels.grayscale(image, pool)
+        elif image.ndim == 2:
+            if self.reducer == "A":
+                return None
+            plane = image
+        else:
+            index = CHANNEL_INDEX[self.reducer]
+            if index >= image.shape[2]:
+                return None
+            plane = cv2.extractChannel(image, index, dst=empty(pool, image.shape[:2], np.uint8))
+        if self.post_lut is not None:
+            plane = cv2.LUT(plane, self.post_lut, dst=empty(pool, plane.shape, np.uint8))
+        return plane
+
+
+def run_chain(chain, inputs, context, fused=None):
+    image = inputs[chain[0].inputs[0].name]
+    fused = fused or FusedPointwise([node.pointwise_stage() for node in chain])
+    if fused.accepts(image):
+        return {chain[-1].outputs[0].name: fused.apply(image, context.pool)}
+
+    # No tables for this input; run the nodes one after another.
+    value = image
+    for node in chain:
+        if value is None:
+            break
+        value = node.compute({node.inputs[0].name: value}, context)[node.outputs[0].name]
+    return {chain[-1].outputs[0].name: value}
@@ -0,0 +1,511 @@
+# core/graph.py
+#
+# Headless DAG engine: typed ports, explicit edges and topological scheduling.
+# The Qt widgets in nodes/ only edit the parameters of the nodes defined here,
+# so a Graph can be evaluated without a QApplication (or PyQt5 installed).
+
+import hashlib
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from core.errors import EvaluationCancelled, GraphError
+
+# numpy and OpenCV (core.fusion, core.disk_cache, cv2) are imported where
+# they are first needed, so describing nodes and graphs stays cheap.
+
+
+def freeze(value):
+    # Turn parameter values into something hashable for cache keys.
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if hasattr(value, "shape") and hasattr(value, "tobytes"):
+        return (value.shape, str(value.dtype), hashlib.sha1(value.tobytes()).hexdigest())
+    return value
+
+
+class EvalContext:
+    # Per-evaluation settings. scale < 1 runs the whole graph on a proxy of
+    # the source; every scale keeps its own cache lane. cancelled is polled
+    # between nodes so a stale render can be abandoned early. profiler, a
+    # core.profiling.Profiler, records every node run when set; pool, a
+    # core.buffers.BufferPool, lets kernels recycle their output arrays.
+    # origin is the full-resolution (y, x) of the evaluated region's top-left
+    # pixel when rendering tiles, and region its full-resolution (h, w); None
+    # is the whole frame. disk_cache, a core.disk_cache.DiskCache,
+    # persists slow results across sessions and batch runs.
+    def __init__(self, scale=1.0, cancelled=None, profiler=None, pool=None, origin=(0, 0),
+                 disk_cache=None, region=None):
+        self.scale = scale
+        self.origin = origin
+        self.region = region
+        self.cancelled = cancelled
+        self.profiler = profiler
+        self.pool = pool
+        self.disk_cache = disk_cache
+        self.disk_keys = {}  # {step tail: its disk cache key}
+        self.computed = []
+        # {node: fingerprint of its inputs' cached versions}, set by Graph
+        # while caching so a node can reuse analysis of unchanged inputs.
+        self.input_versions = {}
+
+    def check_cancelled(self):
+        if self.cancelled is not None and self.cancelled():
+            raise EvaluationCancelled()
+
+    @property
+    def lane(self):
+        return self.scale
+
+
+class Port:
+    def __init__(self, name, kind="image", optional=False):
+        self.name = name
+        self.kind = kind
+        self.optional = optional
+
+    def accepts(self, other):
+        return self.kind == other.kind or "any" in (self.kind, other.kind)
+
+    def __repr__(self):
+        return f"Port({self.name!r}, {self.kind!r})"
+
+
+class Edge:
+    def __init__(self, src, src_port, dst, dst_port):
+        self.src = src
+        self.src_port = src_port
+        self.dst = dst
+        self.dst_port = dst_port
+
+    def __repr__(self):
+        return f"Edge({self.src}.{self.src_port} -> {self.dst}.{self.dst_port})"
+
+
+_output_versions = itertools.count(1)
+
+# cv2.setNumThreads is process-wide, and parallel evaluations of several
+# graphs (render server, GUI worker) may overlap. The first one saves
+# OpenCV's count, each lowers it to its own share, and the last one out
+# restores it.
+_cv_threads_lock = threading.Lock()
+_cv_threads_users = 0
+_cv_threads_saved = None
+
+
+def _share_cv_threads(count):
+    global _cv_threads_users, _cv_threads_saved
+    import cv2
+    with _cv_threads_lock:
+        if _cv_threads_users == 0:
+            _cv_threads_saved = cv2.getNumThreads()
+            cv2.setNumThreads(count)
+        elif count < cv2.getNumThreads():
+            cv2.setNumThreads(count)
+        _cv_threads_users += 1
+
+
+def _release_cv_threads():
+    global _cv_threads_users
+    import cv2
+    with _cv_threads_lock:
+        _cv_threads_users -= 1
+        if _cv_threads_users == 0:
+            cv2.setNumThreads(_cv_threads_saved)
+
+
+def max_parallelism(steps, deps):
+    # Widest level of the step DAG, an estimate of how many steps can be
+    # ready together; a linear chain comes out as 1 and never pays for threads.
+    level = {}
+    for chain in steps:
+        tail = chain[-1]
+        level[tail] = 1 + max((level[d] for d in deps[tail]), default=0)
+    widths = {}
+    for value in level.values():
+        widths[value] = widths.get(value, 0) + 1
+    return max(widths.values(), default=0)
+
+
+class LazyOutputs(dict):
+    # Outputs of a multi-port node whose values are produced on first read,
+    # so a port nothing reads is never computed. Read values are memoized
+    # along with the node's cache entry.
+    def __init__(self, producers):
+        super().__init__()
+        self.producers = producers
+
+    def __missing__(self, port):
+        value = self[port] = self.producers[port]()
+        return value
+
+    def get(self, port, default=None):
+        if port in self or port in self.producers:
+            return self[port]
+        return default
+
+
+class Node:
+    type_name = "Node"
+    inputs = ()
+    outputs = ()
+    defaults = {}
+
+    def __init__(self, **params):
+        self.id = None
+        self.params = dict(self.defaults)
+        # revision counts changes to state that is not a parameter (e.g. a
+        # source image). cache maps an evaluation lane to (key, outputs, version).
+        self.revision = 0
+        self.cache = {}
+        for key, value in params.items():
+            self.set_param(key, value)
+
+    def __repr__(self):
+        return f"{self.type_name}#{self.id}"
+
+    def input_port(self, name=None):
+        # The first input is the primary one, used when no port is named.
+        if name is None and self.inputs:
+            return self.inputs[0]
+        return self._find_port(self.inputs, name, "input")
+
+    def output_port(self, name=None):
+        if name is None and self.outputs:
+            return self.outputs[0]
+        return self._find_port(self.outputs, name, "output")
+
+    def _find_port(self, ports, name, direction):
+        if name is None:
+            if len(ports) != 1:
+                raise GraphError(f"{self} has {len(ports)} {direction} ports, name one explicitly")
+            return ports[0]
+        for port in ports:
+            if port.name == name:
+                return port
+        raise GraphError(f"{self} has no {direction} port {name!r}")
+
+    def set_param(self, key, value):
+        if key not in self.defaults:
+            raise GraphError(f"{self.type_name} has no parameter {key!r}")
+        self.params[key] = value
+
+    def touch(self):
+        self.revision += 1
+
+    def param_key(self):
+        return freeze(self.params)
+
+    def output_version(self, lane):
+        entry = self.cache.get(lane)
+        return entry[2] if entry else 0
+
+    def invalidate(self):
+        self.cache = {}
+
+    def halo(self, context):
+        # Pixels of input context needed around an output region; 0 for
+        # pointwise nodes. Used by tiled rendering.
+        return 0
+
+    def compute(self, inputs, context):
+        raise NotImplementedError
+
+    def run(self, *args, context=None):
+        # Convenience for single-output nodes used outside of a Graph.
+        inputs = {port.name: value for port, value in zip(self.inputs, args)}
+        context = context or EvalContext()
+        if context.profiler is None:
+            return self.compute(inputs, context)[self.outputs[0].name]
+        pool = context.pool
+        start = time.perf_counter()
+        pooled = pool.allocated() if pool is not None else 0
+        outputs = self.compute(inputs, context)
+        allocated = pool.allocated() - pooled if pool is not None else None
+        context.profiler.record_node([self], inputs, outputs, start, "miss", allocated)
+        return outputs[self.outputs[0].name]
+
+
+class Graph:
+    def __init__(self, use_cache=True, fuse=True, workers=None):
+        self.nodes = []
+        self.edges = []
+        self.use_cache = use_cache
+        self.fuse = fuse
+        # Threads for independent branches; 1 evaluates strictly in order.
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = None
+        self._executor_workers = 0
+        self.last_computed = []
+        self._next_id = 0
+
+    def add_node(self, node):
+        if node.id is not None and node in self.nodes:
+            return node
+        node.id = self._next_id
+        self._next_id += 1
+        self.nodes.append(node)
+        return node
+
+    def remove_node(self, node):
+        self.edges = [e for e in self.edges if e.src is not node and e.dst is not node]
+        self.nodes.remove(node)
+
+    def connect(self, src, dst, src_port=None, dst_port=None):
+        out_port = src.output_port(src_port)
+        in_port = dst.input_port(dst_port)
+        if not in_port.accepts(out_port):
+            raise GraphError(f"cannot connect {out_port.kind} output of {src} to {in_port.kind} input of {dst}")
+        if src is dst or src in self.downstream(dst):
+            raise GraphError(f"connecting {src} to {dst} would create a cycle")
+        self.disconnect(dst, in_port.name)
+        edge = Edge(src, out_port.name, dst, in_port.name)
+        self.edges.append(edge)
+        return edge
+
+    def disconnect(self, dst, dst_port=None):
+        self.edges = [
+            e for e in self.edges
+            if not (e.dst is dst and (dst_port is None or e.dst_port == dst_port))
+        ]
+
+    def clear_edges(self):
+        self.edges = []
+
+    def invalidate(self, node):
+        node.invalidate()
+        for child in self.downstream(node):
+            child.invalidate()
+
+    def input_edges(self, node):
+        return [e for e in self.edges if e.dst is node]
+
+    def output_edges(self, node):
+        return [e for e in self.edges if e.src is node]
+
+    def upstream(self, node):
+        seen = set()
+        stack = [e.src for e in self.input_edges(node)]
+        while stack:
+            current = stack.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            stack.extend(e.src for e in self.input_edges(current))
+        return seen
+
+    def downstream(self, node):
+        seen = set()
+        stack = [e.dst for e in self.output_edges(node)]
+        while stack:
+            current = stack.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            stack.extend(e.dst for e in self.output_edges(current))
+        return seen
+
+    def topological_order(self, targets=None):
+        if targets is None:
+            needed = set(self.nodes)
+        else:
+            needed = set()
+            for target in targets:
+                needed.add(target)
+                needed |= self.upstream(target)
+
+        indegree = {node: 0 for node in self.nodes if node in needed}
+        for edge in self.edges:
+            if edge.dst in indegree and edge.src in indegree:
+                indegree[edge.dst] += 1
+
+        ready = deque(node for node in self.nodes if node in indegree and indegree[node] == 0)
+        order = []
+        while ready:
+            node = ready.popleft()
+            order.append(node)
+            for edge in self.output_edges(node):
+                if edge.dst in indegree:
+                    indegree[edge.dst] -= 1
+                    if indegree[edge.dst] == 0:
+                        ready.append(edge.dst)
+
+        if len(order) != len(indegree):
+            raise GraphError("graph contains a cycle")
+        return order
+
+    def gather_inputs(self, node, results):
+        inputs = {}
+        for edge in self.input_edges(node):
+            inputs[edge.dst_port] = results.get(edge.src, {}).get(edge.src_port)
+        return inputs
+
+    def input_fingerprint(self, node, context):
+        return tuple(sorted(
+            (e.dst_port, e.src.id, e.src_port, e.src.output_version(context.lane))
+            for e in self.input_edges(node)
+        ))
+
+    def disk_key(self, chain, context):
+        # Content address of the step's outputs (core.disk_cache); None when
+        # something upstream has no key, e.g. a source without an image.
+        from core.disk_cache import step_key
+        head = chain[0]
+        if hasattr(head, "content_key"):
+            content = head.content_key()
+            return None if content is None else step_key(chain, {"content": content}, context)
+        upstream = {}
+        for edge in self.input_edges(head):
+            key = context.disk_keys.get(edge.src)
+            if key is None:
+                return None
+            upstream[edge.dst_port] = (key, edge.src_port)
+        return step_key(chain, upstream, context)
+
+    def cache_key(self, chain, context):
+        upstream = sorted(
+            (e.dst_port, e.src.id, e.src_port, e.src.output_version(context.lane))
+            for e in self.input_edges(chain[0])
+        )
+        own = tuple((node.revision, node.param_key()) for node in chain)
+        return (own, tuple(upstream))
+
+    def evaluate(self, targets=None, context=None):
+        # Nodes whose parameters and upstream output versions are unchanged
+        # reuse their memoized outputs, so a parameter change only re-runs the
+        # node itself and whatever is downstream of it. Runs of pointwise nodes
+        # on 8-bit images are fused into one LUT pass (core.fusion); only the
+        # last node of a fused run gets a result and a cache entry.
+        from core.fusion import plan_chains
+        context = context or EvalContext()
+        results = {}
+        self.last_computed = context.computed
+        order = self.topological_order(targets)
+        chains = plan_chains(self, order, targets) if self.fuse else {}
+        interior = {node for chain in chains.values() for node in chain[:-1]}
+        steps = [chains.get(node, [node]) for node in order if node not in interior]
+
+        deps = self.step_dependencies(steps)
+        workers = min(self.workers, max_parallelism(steps, deps))
+        if workers <= 1:
+            for chain in steps:
+                results[chain[-1]] = self.evaluate_step(chain, results, context)
+        else:
+            self.evaluate_parallel(steps, deps, results, context, workers)
+        return results
+
+    def step_dependencies(self, steps):
+        # {tail: tails of the steps whose outputs it reads}
+        tail_of = {node: chain[-1] for chain in steps for node in chain}
+        return {
+            chain[-1]: {tail_of[e.src] for e in self.input_edges(chain[0]) if e.src in tail_of}
+            for chain in steps
+        }
+
+    def evaluate_step(self, chain, results, context):
+        fused = None
+        if len(chain) > 1:
+            from core.fusion import FusedPointwise
+            fused = FusedPointwise([node.pointwise_stage() for node in chain])
+            image = self.gather_inputs(chain[0], results).get(chain[0].inputs[0].name)
+            if image is not None and not fused.accepts(image):
+                # Off the LUT path the nodes would run one by one anyway, so
+                # run them as separate steps, each with its own cache entry.
+                for node in chain:
+                    results[node] = self.evaluate_step([node], results, context)
+                return results[chain[-1]]
+        context.check_cancelled()
+        node = chain[-1]
+        profiler = context.profiler
+        disk = context.disk_cache
+        if disk is not None:
+            context.disk_keys[node] = self.disk_key(chain, context)
+        key = self.cache_key(chain, context)
+        entry = node.cache.get(context.lane)
+        if self.use_cache and entry is not None and entry[0] == key:
+            if profiler is not None:
+                profiler.record_node(chain, None, entry[1], time.perf_counter(), "hit")
+            return entry[1]
+
+        pool = context.pool
+        if profiler is not None:
+            start = time.perf_counter()
+            pooled = pool.allocated() if pool is not None else 0
+        inputs = self.gather_inputs(chain[0], results)
+        missing = [
+            port.name for port in chain[0].inputs
+            if not port.optional and inputs.get(port.name) is None
+        ]
+        disk_key = context.disk_keys.get(node) if disk is not None else None
+        outputs = None
+        if not missing and disk_key is not None:
+            outputs = disk.get(disk_key, node)
+        outcome = "skip" if missing else "disk" if outputs is not None else "miss"
+        if missing:
+            outputs = {port.name: None for port in node.outputs}
+        elif outputs is None:
+            compute_start = time.perf_counter()
+            if len(chain) > 1:
+                from core.fusion import run_chain
+                outputs = run_chain(chain, inputs, context, fused)
+                context.computed.extend(chain)
+            else:
+                if self.use_cache:
+                    context.input_versions[node] = self.input_fingerprint(node, context)
+                outputs = node.compute(inputs, context)
+                context.computed.append(node)
+            if disk_key is not None:
+                disk.put(disk_key, node, outputs, time.perf_counter() - compute_start)
+
+        if profiler is not None:
+            # With a pool only its misses are allocations; recycled buffers are not.
+            allocated = pool.allocated() - pooled if pool is not None else None
+            profiler.record_node(chain, inputs, outputs, start, outcome, allocated)
+        # Parameters may be edited from the GUI thread while a background
+        # render runs; only memoize if the node still matches its key.
+        if self.use_cache and self.cache_key(chain, context) == key:
+            node.cache[context.lane] = (key, outputs, next(_output_versions))
+        return outputs
+
+    def evaluate_parallel(self, steps, deps, results, context, workers):
+        # Steps run as soon as everything they read is done. OpenCV's own
+        # thread count is divided by the number of branch threads so the two
+        # levels of parallelism together do not oversubscribe the cores.
+        if self._executor is None or self._executor_workers != workers:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = ThreadPoolExecutor(workers, thread_name_prefix="graph")
+            self._executor_workers = workers
+        remaining = {chain[-1]: set(deps[chain[-1]]) for chain in steps}
+        dependents = {chain[-1]: [] for chain in steps}
+        for tail, sources in deps.items():
+            for source in sources:
+                dependents[source].append(tail)
+        chain_of = {chain[-1]: chain for chain in steps}
+
+        _share_cv_threads(max(1, (os.cpu_count() or 1) // workers))
+        running = {}
+        try:
+            for tail, sources in remaining.items():
+                if not sources:
+                    running[self._executor.submit(self.evaluate_step, chain_of[tail], results, context)] = tail
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    tail = running.pop(future)
+                    results[tail] = future.result()
+                    for child in dependents[tail]:
+                        remaining[child].discard(tail)
+                        if not remaining[child]:
+                            future = self._executor.submit(self.evaluate_step, chain_of[child], results, context)
+                            running[future] = child
+        finally:
+            # On an error (or cancellation) let the steps already running
+            # finish before giving the thread counts back.
+            wait(running)
+            _release_cv_threads()
@@ -0,0 +1,244 @@
+# core/image_io.py
+#
+# Decode/encode helpers shared by ImageInputNode, OutputNode, the batch CLI
+# and the render server.
+
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from core.kernels import channel_count, to_uint8
+
+DECODE_CACHE_BUDGET = 1024 * 2**20
+
+# JPEG decoders can scale by 1/2, 1/4 and 1/8 during the inverse DCT, which
+# is several times faster than a full decode. Other formats would decode in
+# full and resize, so they get no fast preview.
+REDUCED_FLAGS = {
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+}
+REDUCED_EXTENSIONS = (".jpg", ".jpeg")
+
+
+class DecodeCache:
+    # LRU of decoded images keyed by path, mtime and size, so switching back
+    # to a source file does not decode it again while an edited file gets a
+    # fresh entry. Cached images are shared and marked read-only.
+    def __init__(self, budget=DECODE_CACHE_BUDGET):
+        self.budget = budget
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def key(self, path):
+        stat = os.stat(path)
+        return (os.path.realpath(path), stat.st_mtime_ns, stat.st_size)
+
+    def contains(self, path):
+        try:
+            key = self.key(path)
+        except OSError:
+            return False
+        with self.lock:
+            return key in self.entries
+
+    def get(self, key):
+        with self.lock:
+            image = self.entries.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key, image):
+        if image.nbytes > self.budget:
+            return
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = image
+            self.nbytes += image.nbytes
+            while self.nbytes > self.budget:
+                _, evicted = self.entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+
+def _tiff_orientation(f, base):
+    # Orientation tag of the first IFD of the TIFF structure starting at base.
+    order = "little" if f.read(2) == b"II" else "big"
+    f.seek(base + 4)
+    f.seek(base + int.from_bytes(f.read(4), order))
+    for _ in range(int.from_bytes(f.read(2), order)):
+        entry = f.read(12)
+        if len(entry) < 12:
+            break
+        if int.from_bytes(entry[:2], order) == 0x0112:
+            value = int.from_bytes(entry[8:10], order)
+            return value if 1 <= value <= 8 else 1
+    return 1
+
+
+def exif_orientation(f):
+    # EXIF orientation (1-8) of a JPEG or TIFF stream; 1 (upright) for other
+    # formats or when the tag is absent. Only headers are read.
+    head = f.read(4)
+    if head in (b"II*\0", b"MM\0*"):
+        f.seek(0)
+        return _tiff_orientation(f, 0)
+    if head[:2] != b"\xff\xd8":
+        return 1
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF or marker[1] in (0xD9, 0xDA):
+            return 1  # no EXIF before the image data
+        kind = marker[1]
+        if kind == 0xFF:
+            f.seek(-1, os.SEEK_CUR)  # fill byte
+            continue
+        if kind == 0x01 or 0xD0 <= kind <= 0xD8:
+            continue
+        length = int.from_bytes(f.read(2), "big")
+        if length < 2:
+            return 1
+        start = f.tell()
+        if kind == 0xE1 and f.read(6) == b"Exif\0\0":
+            return _tiff_orientation(f, start + 6)
+        f.seek(start + length - 2)
+
+
+def apply_orientation(image, orientation):
+    # Shows the image upright, as OpenCV does for every mode except
+    # IMREAD_UNCHANGED, which read_image needs to keep alpha and bit depth.
+    if image is None or orientation == 1:
+        return image
+    if orientation >= 5:
+        image = cv2.transpose(image)
+    flip = {2: 1, 3: -1, 4: 0, 6: 1, 7: -1, 8: 0}.get(orientation)
+    return image if flip is None else cv2.flip(image, flip)
+
+
+def _imread(path, flags=cv2.IMREAD_UNCHANGED):
+    image = cv2.imread(path, flags)
+    if image is not None:
+        try:
+            with open(path, "rb") as f:
+                image = apply_orientation(image, exif_orientation(f))
+        except OSError:
+            pass
+    return image
+
+
+def read_image(path, cache=None):
+    # Keep the file's own channel count and bit depth (gray, BGRA, 16-bit).
+    if cache is None:
+        return _imread(path)
+    try:
+        key = cache.key(path)
+    except OSError:
+        return None
+    image = cache.get(key)
+    if image is None:
+        image = _imread(path)
+        if image is not None:
+            image.flags.writeable = False
+            cache.put(key, image)
+    return image
+
+
+def jpeg_size(path):
+    # (width, height) from the JPEG frame header, without decoding.
+    with open(path, "rb") as f:
+        if f.read(2) != b"\xff\xd8":
+            return None
+        while True:
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None
+            kind = marker[1]
+            if kind == 0xFF:
+                f.seek(-1, os.SEEK_CUR)  # fill byte
+                continue
+            if kind == 0x01 or 0xD0 <= kind <= 0xD8:
+                continue  # markers without a length field
+            length = int.from_bytes(f.read(2), "big")
+            if 0xC0 <= kind <= 0xCF and kind not in (0xC4, 0xC8, 0xCC):
+                header = f.read(5)
+                if len(header) < 5:
+                    return None
+                return int.from_bytes(header[3:5], "big"), int.from_bytes(header[1:3], "big")
+            if length < 2:
+                return None
+            f.seek(length - 2, os.SEEK_CUR)
+
+
+def read_preview(path, width, height):
+    # Fast reduced decode that still covers width x height, or None when the
+    # format has no fast path or the image is too small to gain anything.
+    # Always 8-bit BGR; only meant to be shown until the full decode lands.
+    if not path.lower().endswith(REDUCED_EXTENSIONS):
+        return None
+    try:
+        size = jpeg_size(path)
+    except OSError:
+        return None
+    if size is None:
+        return None
+    for factor, flag in REDUCED_FLAGS.items():
+        if size[0] / factor >= width and size[1] / factor >= height:
+            return _imread(path, flag | cv2.IMREAD_IGNORE_ORIENTATION)
+    return None
+
+
+def decode_image(data):
+    # read_image for encoded bytes held in memory.
+    if not data:
+        return None
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_UNCHANGED)
+    return apply_orientation(image, exif_orientation(io.BytesIO(data)))
+
+
+def encodable(path, image):
+    # Convert only as far as the target format requires.
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".tif", ".tiff"):
+        return image
+    if extension == ".png":
+        if image.dtype in (np.uint8, np.uint16):
+            return image
+        return np.clip(image * 65535.0 + 0.5, 0, 65535).astype(np.uint16)
+    return to_uint8(image)
+
+
+def write_image(path, image):
+    return cv2.imwrite(path, encodable(path, image))
+
+
+def encode_image(extension, image):
+    # Encoded bytes in the format of extension (".png", ".jpg", ...), or None.
+    ok, data = cv2.imencode(extension, encodable("image" + extension, image))
+    return data.tobytes() if ok else None
+
+
+def image_metadata(image):
+    height, width = image.shape[:2]
+    return {
+        "dimensions": (width, height),
+        "channels": channel_count(image),
+        "type": str(image.dtype)
+    }
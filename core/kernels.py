@@ -0,0 +1,692 @@
+# core/kernels.py
+#
+# Pure compute kernels shared by the Qt nodes and the headless graph engine.
+# Nothing in here may import PyQt5.
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from core.buffers import empty
+
+
+# Images are plain numpy arrays of shape (h, w) or (h, w, channels) in
+# uint8, uint16 or float32 (nominal range 0..1). Kernels keep the channel
+# count and dtype of their input; conversion to 8-bit BGR only happens at the
+# display and encode boundaries (to_uint8, ui.preview, core.image_io).
+#
+# Kernels that take a pool (core.buffers.BufferPool) write their results and
+# scratch data into recycled arrays; with pool=None they allocate as usual.
+
+CHANNEL_INDEX = {"B": 0, "G": 1, "R": 2, "A": 3}
+
+def value_max(dtype):
+    if np.issubdtype(dtype, np.integer):
+        return float(np.iinfo(dtype).max)
+    return 1.0
+
+
+def channel_count(image):
+    return 1 if image.ndim == 2 else image.shape[2]
+
+
+def to_uint8(image):
+    if image.dtype == np.uint8:
+        return image
+    if image.dtype == np.uint16:
+        return (image >> 8).astype(np.uint8)
+    return np.clip(image * 255.0 + 0.5, 0, 255).astype(np.uint8)
+
+
+def brightness_contrast(image, brightness=0, contrast=1.0, pool=None):
+    # brightness is given on the 8-bit scale and rescaled for deeper images.
+    if image.dtype == np.uint8 and image.size > 256:
+        # The same arithmetic, evaluated once per possible value.
+        table = brightness_contrast(np.arange(256, dtype=np.uint8), brightness, contrast)
+        return keep_alpha(cv2.LUT(image, table, dst=empty(pool, image.shape, np.uint8)), image)
+    peak = value_max(image.dtype)
+    mid = peak / 2.0
+    img = empty(pool, image.shape, np.float32)
+    np.copyto(img, image, casting="unsafe")
+    img -= mid
+    img *= contrast
+    img += mid
+    img += brightness * peak / 255.0
+    if np.issubdtype(image.dtype, np.floating):
+        return keep_alpha(img, image)  # float images may carry values outside 0..1
+    np.clip(img, 0, peak, out=img)
+    out = empty(pool, image.shape, image.dtype)
+    np.copyto(out, img, casting="unsafe")
+    return keep_alpha(out, image)
+
+
+def keep_alpha(out, image):
+    # Colour adjustments pass the alpha channel of a BGRA image through.
+    if image.ndim == 3 and image.shape[2] == 4:
+        out[..., 3] = image[..., 3]
+    return out
+
+
+def grayscale(image, pool=None):
+    channels = channel_count(image)
+    if channels == 1:
+        return image
+    code = cv2.COLOR_BGRA2GRAY if channels == 4 else cv2.COLOR_BGR2GRAY
+    return cv2.cvtColor(image, code, dst=empty(pool, image.shape[:2], image.dtype))
+
+
+def split_channels(image, pool=None):
+    names = ("R", "G", "B", "A") if channel_count(image) == 4 else ("R", "G", "B")
+    return {name: select_channel(image, name, pool) for name in names}
+
+
+def select_channel(image, channel, pool=None):
+    channels = channel_count(image)
+    if channels == 1:
+        return None if channel == "A" else image
+    index = CHANNEL_INDEX[channel]
+    if index >= channels:
+        return None
+    return cv2.extractChannel(image, index, dst=empty(pool, image.shape[:2], image.dtype))
+
+
+def downscale(image, scale):
+    if scale >= 1.0:
+        return image
+    height, width = image.shape[:2]
+    size = (max(int(round(width * scale)), 1), max(int(round(height * scale)), 1))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+# Blur engines. "Gaussian" is cv2.GaussianBlur with a (2r+1) kernel, whose
+# cost grows with the radius. "Box" stacks three box filters (Kovesi's
+# widths for the same sigma) and "Pyramid" blurs a copy downsampled so the
+# remaining sigma is about 4 px and scales it back; both cost O(1) per pixel.
+# Below BOX_MIN_SIGMA the three boxes are too coarse to pass for a Gaussian
+# (1-D L1 difference up to 0.42) and Box runs GaussianBlur instead, as
+# Pyramid does below twice PYRAMID_TARGET_SIGMA.
+#
+# Accuracy against the exact Gaussian: a blur is a normalized non-negative
+# kernel, so the output error is at most half the kernel's L1 difference
+# times the value range. Measured 1-D L1 differences are <= 0.08 for Box
+# and <= 0.10 for Pyramid at any radius, i.e. <= 8% (Box) and <= 10%
+# (Pyramid) of the value range for a separable 2-D blur in the worst case.
+# On natural images the typical error is well under 1 level on 8-bit data.
+BLUR_ENGINES = ("Auto", "Gaussian", "Box", "Pyramid")
+AUTO_BOX_RADIUS = 24  # above this radius Box beats GaussianBlur
+PYRAMID_TARGET_SIGMA = 4.0
+BOX_MIN_SIGMA = 2.0  # radius 5
+
+
+def blur_sigma(radius):
+    # Sigma OpenCV derives for a (2r+1) kernel when sigma is 0.
+    return 0.3 * (radius - 1) + 0.8
+
+
+def blur_plan(radius, engine="Auto", scale=1.0):
+    # On a proxy (scale < 1) the blur keeps its size relative to the image:
+    # the full-resolution sigma and kernel radius shrink with the image.
+    radius = max(int(radius), 1)
+    sigma = blur_sigma(radius) * scale
+    if scale != 1.0:
+        radius = max(int(round(radius * scale)), 1)
+    if engine == "Auto":
+        engine = "Gaussian" if radius <= AUTO_BOX_RADIUS else "Box"
+    return engine, radius, sigma
+
+
+def box_widths(sigma, passes=3):
+    ideal = (12.0 * sigma * sigma / passes + 1.0) ** 0.5
+    lower = int(ideal)
+    if lower % 2 == 0:
+        lower -= 1
+    lower = max(lower, 1)
+    count = (12.0 * sigma * sigma - passes * lower * lower - 4 * passes * lower - 3 * passes) / (-4.0 * lower - 4.0)
+    count = int(round(count))
+    return [lower if i < count else lower + 2 for i in range(passes)]
+
+
+def blur_halo(radius, engine="Auto", scale=1.0):
+    engine, radius, sigma = blur_plan(radius, engine, scale)
+    if engine == "Box":
+        if sigma < BOX_MIN_SIGMA:
+            return int(np.ceil(3 * sigma))
+        return sum(w // 2 for w in box_widths(sigma))
+    if engine == "Pyramid":
+        return int(4 * sigma) + 2 * _pyramid_factor(sigma)
+    return radius
+
+
+def _axis_size(width, direction):
+    if direction == "Horizontal":
+        return (width, 1)
+    if direction == "Vertical":
+        return (1, width)
+    return (width, width)
+
+
+def box_blur(image, sigma, direction="Uniform", pool=None):
+    if sigma < BOX_MIN_SIGMA:
+        ksize = _axis_size(2 * int(np.ceil(3 * sigma)) + 1, direction)
+        return cv2.GaussianBlur(image, ksize, sigma, dst=empty(pool, image.shape, image.dtype))
+    if image.dtype == np.uint8:
+        # 8 fractional bits keep the three rounding steps far below one level.
+        work = empty(pool, image.shape, np.uint16)
+        np.left_shift(image, 8, out=work, dtype=np.uint16)
+    elif image.dtype == np.uint16:
+        work = empty(pool, image.shape, np.float32)
+        np.copyto(work, image)
+    else:
+        work = image
+    # The passes ping-pong between two buffers; the input is never written.
+    buffers = [empty(pool, image.shape, work.dtype)]
+    buffers.append(work if work is not image else empty(pool, image.shape, work.dtype))
+    for index, width in enumerate(box_widths(sigma)):
+        work = cv2.blur(work, _axis_size(width, direction), dst=buffers[index % 2])
+    if image.dtype == np.uint8:
+        work += 128
+        work >>= 8
+    elif image.dtype == np.uint16:
+        work += 0.5
+        np.clip(work, 0, 65535, out=work)
+    else:
+        return work
+    out = empty(pool, image.shape, image.dtype)
+    np.copyto(out, work, casting="unsafe")
+    return out
+
+
+def _pyramid_factor(sigma):
+    return max(int(sigma / PYRAMID_TARGET_SIGMA), 1)
+
+
+def pyramid_blur(image, sigma, direction="Uniform", pool=None):
+    factor = _pyramid_factor(sigma)
+    if factor == 1:
+        ksize = _axis_size(2 * int(np.ceil(3 * sigma)) + 1, direction)
+        return cv2.GaussianBlur(image, ksize, sigma, dst=empty(pool, image.shape, image.dtype))
+    height, width = image.shape[:2]
+    fx = factor if direction != "Vertical" else 1
+    fy = factor if direction != "Horizontal" else 1
+    small = cv2.resize(image, (max(round(width / fx), 1), max(round(height / fy), 1)),
+                       interpolation=cv2.INTER_AREA)
+    # Area downsampling and linear upsampling already blur by about
+    # (f^2 - 1) / 12 + f^2 / 6 in variance; the rest is done at low res.
+    rest = max(sigma * sigma - (factor * factor - 1) / 12.0 - factor * factor / 6.0, 0.25) ** 0.5
+    sx = rest / fx if fx > 1 else 0.01
+    sy = rest / fy if fy > 1 else 0.01
+    small = cv2.GaussianBlur(small, (0, 0), sigmaX=sx, sigmaY=sy)
+    return cv2.resize(small, (width, height), dst=empty(pool, image.shape, image.dtype),
+                      interpolation=cv2.INTER_LINEAR)
+
+
+def gaussian_blur(image, radius=5, direction="Uniform", engine="Auto", scale=1.0, pool=None):
+    engine, radius, sigma = blur_plan(radius, engine, scale)
+    if engine == "Box":
+        return box_blur(image, sigma, direction, pool)
+    if engine == "Pyramid":
+        return pyramid_blur(image, sigma, direction, pool)
+
+    if scale == 1.0:
+        sigma = 0  # let OpenCV derive it from the kernel size
+    ksize = _axis_size(radius * 2 + 1, direction)
+    return cv2.GaussianBlur(image, ksize, sigma, dst=empty(pool, image.shape, image.dtype))
+
+
+def _sobel_gain(ksize):
+    # Response of a ksize Sobel derivative to a unit-slope ramp.
+    return 2.0 if ksize == 1 else 2.0 ** (2 * ksize - 3)
+
+
+def detect_edges(image, method="Sobel", low_threshold=50, high_threshold=150,
+                 kernel_size=3, overlay=False, scale=1.0, pool=None):
+    kernel_size = min(kernel_size, 7)  # largest aperture cv2.Sobel supports
+    if kernel_size % 2 == 0:
+        kernel_size += 1  # ensure it's odd
+
+    gray = grayscale(image, pool)
+    peak = value_max(image.dtype)
+
+    if method == "Canny":
+        # Canny thresholds act on step edges, which survive downscaling, so
+        # they are left as-is on a proxy. OpenCV's Canny is 8-bit only.
+        edges = cv2.Canny(to_uint8(gray), low_threshold, high_threshold,
+                          edges=empty(pool, gray.shape, np.uint8))
+        if image.dtype != np.uint8:
+            edges = (edges.astype(np.float32) * (peak / 255.0)).astype(image.dtype)
+    else:  # Sobel
+        ksize = kernel_size
+        gain = 1.0
+        if scale != 1.0:
+            # Shrink the aperture with the image and rescale the response so
+            # gradients are as strong as they would be at full resolution.
+            ksize = min(max(int(round(kernel_size * scale)) | 1, 1), 7)
+            gain = scale * _sobel_gain(kernel_size) / _sobel_gain(ksize)
+        sobelx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, dst=empty(pool, gray.shape, np.float64),
+                           ksize=ksize, scale=gain)
+        sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, dst=empty(pool, gray.shape, np.float64),
+                           ksize=ksize, scale=gain)
+        magnitude = cv2.magnitude(sobelx, sobely, magnitude=sobelx)
+        np.clip(magnitude, 0, peak, out=magnitude)
+        edges = empty(pool, gray.shape, image.dtype)
+        np.copyto(edges, magnitude, casting="unsafe")
+
+    if overlay:
+        channels = channel_count(image)
+        if channels > 1:
+            edges = cv2.merge([edges] * channels, dst=empty(pool, image.shape, image.dtype))
+        return cv2.addWeighted(image, 0.8, edges, 0.8, 0, dst=empty(pool, image.shape, image.dtype))
+    return edges
+
+
+# Convolution with an arbitrary kernel: a true (flipped) convolution around
+# the kernel centre with reflected borders, computed in float32. Even-sized
+# kernels get a zero row/column appended so every engine shares one centre.
+#
+#   "Direct"     cv2.filter2D
+#   "Separable"  cv2.sepFilter2D with the rank-1 factors of an SVD
+#   "FFT"        overlap-save block FFT; the kernel spectrum is cached per
+#                kernel and block size, so a batch run transforms it once
+#
+# "Auto" crossovers, measured on 1080p 8-bit images with 1 and 3 channels
+# (benchmarks.bench_nodes -k convolution): sepFilter2D beats filter2D from
+# 3x3 and ties the block FFT at 101x101; for full-rank kernels filter2D wins
+# up to 7x7 and the block FFT with a cached spectrum from 9x9 on (filter2D's
+# own DFT path, taken for large kernels, transforms the kernel every call).
+CONVOLUTION_METHODS = ("Auto", "Direct", "Separable", "FFT")
+CONVOLUTION_PRESETS = ("Gaussian", "Box", "Disk", "Motion", "Sharpen", "Emboss", "Identity", "Custom")
+SEPARABLE_MIN_SIZE = 3
+SEPARABLE_MAX_SIZE = 101
+FFT_MIN_SIZE = 9
+FFT_BLOCK = 256
+
+_kernel_cache = OrderedDict()
+_kernel_cache_lock = threading.Lock()
+KERNEL_CACHE_ENTRIES = 32
+
+
+def _cached(kind, kernel, extra, build):
+    key = (kind, kernel.shape, hashlib.sha1(kernel.tobytes()).hexdigest(), extra)
+    with _kernel_cache_lock:
+        if key in _kernel_cache:
+            _kernel_cache.move_to_end(key)
+            return _kernel_cache[key]
+    value = build()
+    with _kernel_cache_lock:
+        _kernel_cache[key] = value
+        while len(_kernel_cache) > KERNEL_CACHE_ENTRIES:
+            _kernel_cache.popitem(last=False)
+    return value
+
+
+def preset_kernel(name, size):
+    size = max(int(size), 1) | 1
+    centre = size // 2
+    if name == "Identity":
+        kernel = np.zeros((size, size))
+        kernel[centre, centre] = 1.0
+    elif name == "Box":
+        kernel = np.full((size, size), 1.0 / (size * size))
+    elif name == "Gaussian":
+        column = cv2.getGaussianKernel(size, 0)
+        kernel = column @ column.T
+    elif name == "Disk":
+        y, x = np.ogrid[-centre:centre + 1, -centre:centre + 1]
+        kernel = (x * x + y * y <= centre * centre + centre).astype(np.float64)
+        kernel /= kernel.sum()
+    elif name == "Motion":
+        kernel = np.zeros((size, size))
+        kernel[centre, :] = 1.0 / size
+    elif name == "Sharpen":
+        # Unsharp mask: the image plus its difference from a Gaussian blur.
+        column = cv2.getGaussianKernel(size, 0)
+        kernel = -(column @ column.T)
+        kernel[centre, centre] += 2.0
+    elif name == "Emboss":
+        ramp = np.arange(size) - centre
+        kernel = (ramp[:, None] + ramp[None, :]) / float(max(centre, 1) * size)
+        kernel[centre, centre] += 1.0
+    else:
+        raise ValueError(f"unknown kernel preset {name!r}")
+    return kernel.astype(np.float32)
+
+
+def odd_kernel(kernel):
+    kernel = np.asarray(kernel, dtype=np.float32)
+    if kernel.ndim == 1:
+        kernel = kernel[None, :]
+    rows, cols = kernel.shape
+    return np.pad(kernel, ((0, 1 - rows % 2), (0, 1 - cols % 2)))
+
+
+def scale_kernel(kernel, scale):
+    # Shrink a kernel for a proxy render; INTER_AREA averages, so the taps
+    # are rescaled to keep the kernel's sum (and its response) unchanged.
+    if scale >= 1.0:
+        return kernel
+    rows, cols = kernel.shape
+    small_rows = max(int(round(rows * scale)) | 1, 1)
+    small_cols = max(int(round(cols * scale)) | 1, 1)
+    if (small_rows, small_cols) == (rows, cols):
+        return kernel
+    small = cv2.resize(kernel, (small_cols, small_rows), interpolation=cv2.INTER_AREA)
+    return small * np.float32(rows * cols / float(small_rows * small_cols))
+
+
+def separable_factors(kernel, tolerance=1e-6):
+    # (column, row) with outer(column, row) == kernel, or None unless rank 1.
+    def build():
+        u, s, vt = np.linalg.svd(kernel.astype(np.float64))
+        if s[0] == 0 or (len(s) > 1 and s[1] > tolerance * s[0]):
+            return None
+        root = np.sqrt(s[0])
+        return (u[:, 0] * root).astype(np.float32), (vt[0] * root).astype(np.float32)
+    return _cached("svd", kernel, tolerance, build)
+
+
+def convolution_method(kernel, method="Auto"):
+    size = max(kernel.shape)
+    factors = separable_factors(kernel) if method in ("Auto", "Separable") else None
+    if method == "Separable" and factors is None:
+        method = "Direct"  # not rank 1
+    if method == "Auto":
+        if factors is not None and SEPARABLE_MIN_SIZE <= size <= SEPARABLE_MAX_SIZE:
+            method = "Separable"
+        elif size >= FFT_MIN_SIZE:
+            method = "FFT"
+        else:
+            method = "Direct"
+    return method, factors
+
+
+def _kernel_spectrum(kernel, block):
+    def build():
+        padded = np.zeros((block, block), np.float32)
+        padded[:kernel.shape[0], :kernel.shape[1]] = kernel
+        return cv2.dft(padded)
+    return _cached("dft", kernel, block, build)
+
+
+def fft_convolve(image, kernel):
+    # Overlap-save: each block x block transform yields (block - k + 1)^2
+    # finished output pixels.
+    rows, cols = kernel.shape
+    block = cv2.getOptimalDFTSize(max(FFT_BLOCK, 2 * max(rows, cols)))
+    spectrum = _kernel_spectrum(kernel, block)
+    step_y, step_x = block - rows + 1, block - cols + 1
+    height, width = image.shape[:2]
+    padded = cv2.copyMakeBorder(image, rows // 2, rows // 2, cols // 2, cols // 2, cv2.BORDER_REFLECT_101)
+    total_y = -(-height // step_y) * step_y + rows - 1
+    total_x = -(-width // step_x) * step_x + cols - 1
+    padded = cv2.copyMakeBorder(padded, 0, total_y - padded.shape[0], 0, total_x - padded.shape[1],
+                                cv2.BORDER_CONSTANT, value=0)
+
+    result = np.empty(image.shape, np.float32)
+    planes = [padded] if image.ndim == 2 else cv2.split(padded)
+    for index, plane in enumerate(planes):
+        target = result if image.ndim == 2 else result[:, :, index]
+        for y in range(0, height, step_y):
+            for x in range(0, width, step_x):
+                tile = cv2.dft(plane[y:y + block, x:x + block])
+                tile = cv2.idft(cv2.mulSpectrums(tile, spectrum, 0), flags=cv2.DFT_SCALE | cv2.DFT_REAL_OUTPUT)
+                h, w = min(step_y, height - y), min(step_x, width - x)
+                target[y:y + h, x:x + w] = tile[rows - 1:rows - 1 + h, cols - 1:cols - 1 + w]
+    return result
+
+
+def convolve(image, kernel, method="Auto", pool=None):
+    kernel = odd_kernel(kernel)
+    method, factors = convolution_method(kernel, method)
+    if method == "Separable":
+        column, row = factors
+        result = cv2.sepFilter2D(image, cv2.CV_32F, row[::-1].copy(), column[::-1].copy(),
+                                 borderType=cv2.BORDER_REFLECT_101)
+    elif method == "FFT":
+        result = fft_convolve(image.astype(np.float32, copy=False), kernel)
+    else:
+        result = cv2.filter2D(image, cv2.CV_32F, cv2.flip(kernel, -1), borderType=cv2.BORDER_REFLECT_101)
+    if np.issubdtype(image.dtype, np.floating):
+        return result
+    np.rint(result, out=result)
+    np.clip(result, 0, value_max(image.dtype), out=result)
+    out = empty(pool, image.shape, image.dtype)
+    np.copyto(out, result, casting="unsafe")
+    return out
+
+
+# Thresholding of the gray plane into a single-channel mask (peak or 0).
+# threshold and c are on the 8-bit scale and rescaled for deeper images.
+#
+#   "Binary"    gray > threshold; a 256-entry LUT for 8-bit images
+#   "Otsu"      threshold picked from the 256-bin histogram (cv2.THRESH_OTSU)
+#   "Adaptive"  gray > mean of its block_size x block_size neighbourhood - c
+#               (cv2.ADAPTIVE_THRESH_MEAN_C)
+#
+# The histogram and the integral image depend only on the input, so callers
+# that keep them (core.operators.Threshold) pay one LUT or one pass per
+# parameter change whatever the block size. 8-bit images go straight to
+# cv2.adaptiveThreshold instead: its running-sum box filter is O(pixels) as
+# well and measured about twice as fast per change on 12MP as reading block
+# sums off a cached integral image. Deeper images, which OpenCV does not
+# take, use the integral image; it is built over the gray plane padded by
+# ADAPTIVE_MAX_BLOCK // 2 replicated pixels so every block size up to
+# ADAPTIVE_MAX_BLOCK reuses it with OpenCV's borders.
+THRESHOLD_METHODS = ("Binary", "Otsu", "Adaptive")
+ADAPTIVE_MAX_BLOCK = 255
+
+
+def threshold_table(threshold, invert=False):
+    mask = np.arange(256) > threshold
+    if invert:
+        mask = ~mask
+    return np.where(mask, 255, 0).astype(np.uint8)
+
+
+def _mask(gray, reference, invert, pool):
+    peak = value_max(gray.dtype)
+    compare = np.less_equal if invert else np.greater
+    mask = compare(gray, reference, out=empty(pool, gray.shape, np.bool_))
+    out = empty(pool, gray.shape, gray.dtype)
+    np.multiply(mask, peak, out=out, casting="unsafe")
+    return out
+
+
+def binary_threshold(gray, threshold, invert=False, pool=None):
+    if gray.dtype == np.uint8:
+        return cv2.LUT(gray, threshold_table(threshold, invert), dst=empty(pool, gray.shape, np.uint8))
+    return _mask(gray, threshold * value_max(gray.dtype) / 255.0, invert, pool)
+
+
+def histogram(gray):
+    return cv2.calcHist([to_uint8(gray)], [0], None, [256], [0, 256]).ravel()
+
+
+def otsu_threshold(hist):
+    # Maximises the between-class variance over all 256 split points, as
+    # cv2.THRESH_OTSU does.
+    p = hist.astype(np.float64) / max(hist.sum(), 1.0)
+    levels = np.arange(256, dtype=np.float64)
+    q1 = np.cumsum(p)
+    q2 = 1.0 - q1
+    m1 = np.cumsum(levels * p)
+    mu = m1[-1]
+    eps = np.finfo(np.float32).eps
+    valid = (np.minimum(q1, q2) >= eps) & (np.maximum(q1, q2) <= 1.0 - eps)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mu1 = m1 / q1
+        mu2 = (mu - m1) / q2
+        sigma = q1 * q2 * (mu1 - mu2) ** 2
+    sigma[~valid] = 0.0
+    return int(np.argmax(sigma)) if sigma.max() > 0 else 0
+
+
+def adaptive_block(block_size, scale=1.0):
+    block = int(round(block_size * scale)) | 1
+    return min(max(block, 3), ADAPTIVE_MAX_BLOCK)
+
+
+def needs_integral(gray):
+    return gray.dtype != np.uint8
+
+
+def adaptive_integral(gray):
+    radius = ADAPTIVE_MAX_BLOCK // 2
+    padded = cv2.copyMakeBorder(gray, radius, radius, radius, radius, cv2.BORDER_REPLICATE)
+    return cv2.integral(padded, sdepth=cv2.CV_64F)
+
+
+def adaptive_threshold(gray, integral=None, block_size=11, c=2, invert=False, pool=None):
+    block = adaptive_block(block_size)
+    if not needs_integral(gray):
+        mode = cv2.THRESH_BINARY_INV if invert else cv2.THRESH_BINARY
+        return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, mode, block, c,
+                                     dst=empty(pool, gray.shape, np.uint8))
+    if integral is None:
+        integral = adaptive_integral(gray)
+    h, w = gray.shape
+    lo = ADAPTIVE_MAX_BLOCK // 2 - block // 2
+    hi = lo + block
+    mean = empty(pool, (h, w), np.float64)
+    np.subtract(integral[hi:hi + h, hi:hi + w], integral[lo:lo + h, hi:hi + w], out=mean)
+    mean -= integral[hi:hi + h, lo:lo + w]
+    mean += integral[lo:lo + h, lo:lo + w]
+    mean *= 1.0 / (block * block)
+    mean -= c * value_max(gray.dtype) / 255.0
+    return _mask(gray, mean, invert, pool)
+
+
+# Compositing of any number of layers over a base image. Each layer has a
+# blend mode and an opacity; with a = composite so far and b = layer, both
+# normalised to 0..1:
+#
+#   "Normal"    b
+#   "Multiply"  a * b
+#   "Screen"    1 - (1 - a)(1 - b)
+#   "Add"       min(a + b, 1)
+#   "Overlay"   2ab where a < 0.5, else 1 - 2(1 - a)(1 - b)
+#
+# and the composite becomes a + opacity * (mode(a, b) - a). All layers are
+# applied one strip at a time, so each input is read once and the output
+# written once while the running composite stays in cache; chained pairwise
+# blends stream a full frame through memory per layer. 8-bit images stay in
+# uint8 throughout (OpenCV's saturating, rounding arithmetic, bit-exact with
+# chaining the same blends one layer at a time); other depths blend in
+# float32.
+BLEND_MODES = ("Normal", "Multiply", "Screen", "Add", "Overlay")
+BLEND_STRIP = 1 << 17  # values per strip; four strip buffers stay in L2
+
+
+def match_layer(layer, base):
+    # Bring a layer to the base image's size, channel count and dtype.
+    if layer.shape[:2] != base.shape[:2]:
+        layer = cv2.resize(layer, (base.shape[1], base.shape[0]), interpolation=cv2.INTER_AREA)
+    channels, base_channels = channel_count(layer), channel_count(base)
+    if channels != base_channels:
+        if base_channels == 1:
+            layer = grayscale(layer)
+        else:
+            code = {1: {3: cv2.COLOR_GRAY2BGR, 4: cv2.COLOR_GRAY2BGRA},
+                    3: {4: cv2.COLOR_BGR2BGRA},
+                    4: {3: cv2.COLOR_BGRA2BGR}}[channels][base_channels]
+            layer = cv2.cvtColor(layer, code)
+    if layer.dtype != base.dtype:
+        peak = value_max(base.dtype)
+        layer = layer.astype(np.float32) * (peak / value_max(layer.dtype))
+        if np.issubdtype(base.dtype, np.integer):
+            np.clip(np.rint(layer, out=layer), 0, peak, out=layer)
+        layer = layer.astype(base.dtype)
+    return np.ascontiguousarray(layer)
+
+
+def _blend_mode_u8(a, b, mode, t, s, m):
+    # mode(a, b) for uint8 strips, in t (or b itself for Normal).
+    if mode == "Normal":
+        return b
+    if mode == "Add":
+        return cv2.add(a, b, dst=t)
+    if mode == "Multiply":
+        return cv2.multiply(a, b, dst=t, scale=1 / 255)
+    cv2.bitwise_not(a, dst=t)
+    cv2.bitwise_not(b, dst=s)
+    if mode == "Screen":
+        cv2.multiply(t, s, dst=t, scale=1 / 255)
+        return cv2.bitwise_not(t, dst=t)
+    # Overlay
+    cv2.multiply(t, s, dst=s, scale=2 / 255)
+    cv2.bitwise_not(s, dst=s)
+    cv2.multiply(a, b, dst=t, scale=2 / 255)
+    np.greater(a, 127, out=m.view(np.bool_))
+    cv2.copyTo(s, m, dst=t)
+    return t
+
+
+def _blend_mode_float(a, b, mode, t, s, m):
+    # mode(a, b) for float32 strips normalised to 0..1.
+    if mode == "Normal":
+        return b
+    if mode == "Add":
+        np.add(a, b, out=t)
+        return np.minimum(t, 1.0, out=t)
+    if mode == "Multiply":
+        return np.multiply(a, b, out=t)
+    np.subtract(1.0, a, out=t)
+    np.subtract(1.0, b, out=s)
+    t *= s
+    if mode == "Screen":
+        return np.subtract(1.0, t, out=t)
+    # Overlay
+    np.multiply(t, -2.0, out=s)
+    s += 1.0
+    np.multiply(a, b, out=t)
+    t *= 2.0
+    np.greater_equal(a, 0.5, out=m.view(np.bool_))
+    cv2.copyTo(s, m, dst=t)
+    return t
+
+
+def blend(base, layers, pool=None):
+    # layers: (image, mode, opacity) tuples from bottom to top; None images
+    # and zero opacities are skipped.
+    for _, mode, _ in layers:
+        if mode not in BLEND_MODES:
+            raise ValueError(f"unknown blend mode {mode!r}")
+    layers = [(match_layer(image, base).reshape(-1), mode, min(float(opacity), 1.0))
+              for image, mode, opacity in layers if image is not None and opacity > 0]
+    out = empty(pool, base.shape, base.dtype)
+    flat_base = np.ascontiguousarray(base).reshape(-1)
+    flat_out = out.reshape(-1)
+    total = flat_base.size
+    size = max(min(BLEND_STRIP, total), 1)
+    integer = np.issubdtype(base.dtype, np.integer)
+    peak = value_max(base.dtype)
+    eight_bit = base.dtype == np.uint8
+    work = np.uint8 if eight_bit else np.float32
+    a, b, t, s = (np.empty(size, work) for _ in range(4))
+    m = np.empty(size, np.uint8)
+    for start in range(0, total, size):
+        stop = min(start + size, total)
+        n = stop - start
+        an, bn, tn, sn, mn = a[:n], b[:n], t[:n], s[:n], m[:n]
+        if eight_bit:
+            np.copyto(an, flat_base[start:stop])
+        else:
+            np.multiply(flat_base[start:stop], 1.0 / peak, out=an, casting="unsafe")
+        for image, mode, opacity in layers:
+            if eight_bit:
+                f = _blend_mode_u8(an, image[start:stop], mode, tn, sn, mn)
+            else:
+                np.multiply(image[start:stop], 1.0 / peak, out=bn, casting="unsafe")
+                f = _blend_mode_float(an, bn, mode, tn, sn, mn)
+            if opacity >= 1.0:
+                np.copyto(an, f)
+            else:
+                cv2.addWeighted(an, 1.0 - opacity, f, opacity, 0, dst=an)
+        if integer and not eight_bit:
+            an *= peak
+            np.rint(an, out=an)
+            np.clip(an, 0, peak, out=an)
+        np.copyto(flat_out[start:stop], an, casting="unsafe")
+    return out
@@ -1,21 +1,82 @@
-from PyQt5.QtWidgets import QGraphicsItem, QGraphicsTextItem
-from PyQt5.QtCore import QRectF
-from PyQt5.QtGui import QPainter
+from PyQt5.QtWidgets import QGraphicsItem, QGraphicsProxyWidget, QGraphicsTextItem
+from PyQt5.QtCore import QRectF, Qt
+from PyQt5.QtGui import QColor, QPainter
 
 class BaseNode(QGraphicsItem):
+    # Headless node type from core.operators that holds this widget's
+    # parameters and does the actual work.
+    op_class = None
+
     def __init__(self, name):
         super().__init__()
         self.name = name
         self.input_connections = []
         self.output_connections = []
+        self.op = self.op_class() if self.op_class else None
+        self.on_output_updated = None
         self.title = QGraphicsTextItem(self.name, self)
         self.title.setPos(10, -20)
+        # Timing badge under the node, filled in while profiling is on.
+        self.badge = QGraphicsTextItem("", self)
+        self.badge.setDefaultTextColor(QColor("#c62828"))
+        self.badge.setPos(10, self.boundingRect().height())
+        # False while ui.canvas shows a placeholder instead of the widgets.
+        self.detailed = True
+        self.setFlag(QGraphicsItem.ItemSendsScenePositionChanges)
 
     def boundingRect(self):
         return QRectF(0, 0, 180, 100)
 
     def paint(self, painter, option, widget):
+        if not self.detailed:
+            painter.setBrush(QColor("#d0d0d0"))
         painter.drawRoundedRect(self.boundingRect(), 10, 10)
+        # Names are unreadable below ~1/5 scale; skip the text layout there.
+        if not self.detailed and option.levelOfDetailFromTransform(painter.worldTransform()) >= 0.2:
+            painter.drawText(self.boundingRect(), Qt.AlignCenter, self.name)
+
+    def itemChange(self, change, value):
+        # A moved node re-routes only its own connections.
+        if change == QGraphicsItem.ItemScenePositionHasChanged:
+            for connection in self.input_connections + self.output_connections:
+                connection.update_path()
+        return super().itemChange(change, value)
+
+    def set_detailed(self, detailed):
+        # Hides the embedded widget panels (the expensive part to lay out and
+        # paint) and the labels, and paints a plain placeholder instead.
+        if detailed == self.detailed:
+            return
+        self.detailed = detailed
+        for child in self.childItems():
+            if isinstance(child, (QGraphicsProxyWidget, QGraphicsTextItem)):
+                child.setVisible(detailed)
+        self.update()
+
+    def set_cached(self, cached):
+        # DeviceCoordinateCache keeps a pixmap of each item, so panning and
+        # moving blit instead of re-running paint() and text layout.
+        mode = QGraphicsItem.DeviceCoordinateCache if cached else QGraphicsItem.NoCache
+        self.setCacheMode(mode)
+        for child in self.childItems():
+            child.setCacheMode(mode)
+
+    def set_param(self, key, value):
+        self.op.set_param(key, value)
+        if self.on_output_updated:
+            self.on_output_updated()
+
+    def set_params(self, params):
+        for key, value in params.items():
+            self.op.set_param(key, value)
+        self.sync_widgets()
+        if self.on_output_updated:
+            self.on_output_updated()
+
+    def set_badge(self, text):
+        self.badge.setPlainText(text)
 
-    def process(self, data):
-        return data
\ No newline at end of file
+    def sync_widgets(self):
+        # Show the op's current parameters in the widgets, e.g. after loading
+        # a saved graph. Nodes with controls override this.
+        pass
@@ -0,0 +1,219 @@
+# core/noise.py
+#
+# Procedural noise for the Noise node, vectorized over whole tiles. Every
+# value is a pure function of (seed, pixel coordinate): lattice corners are
+# hashed from their integer coordinates rather than drawn from a random
+# stream, so any tile can be generated on its own, tiles are generated in
+# parallel, and a region is regenerated on demand instead of stored.
+#
+#   "White"    independent uniform value per pixel
+#   "Value"    smoothly interpolated random values on a lattice of scale px
+#   "Perlin"   gradient noise on the same lattice
+#   "Fractal"  sum of Perlin octaves, each lacunarity times finer and
+#              persistence times weaker than the previous one
+#
+# Coordinates are full-resolution pixels: a proxy render samples the same
+# field at 1 / scale spacing and looks like the downscaled full render, and
+# a tile passes its origin. Results are kept in a small LRU keyed by every
+# parameter, so re-evaluating a graph does not regenerate an 8K mask.
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+NOISE_KINDS = ("White", "Value", "Perlin", "Fractal")
+NOISE_TILE = 512
+NOISE_CACHE_BUDGET = 256 * 2**20
+
+# 16 unit gradients around the circle, picked by the low bits of a hash.
+_angles = np.arange(16) * (2 * np.pi / 16)
+GRADIENTS_X = np.cos(_angles).astype(np.float32)
+GRADIENTS_Y = np.sin(_angles).astype(np.float32)
+# Largest magnitude of 2D Perlin noise with unit gradients.
+PERLIN_RANGE = np.float32(np.sqrt(0.5))
+
+_cache = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _hash(ix, iy, seed):
+    # 32-bit integer mix of a lattice coordinate and the seed (ix, iy
+    # broadcast against each other).
+    with np.errstate(over="ignore"):
+        h = (ix.astype(np.uint32) * np.uint32(0x8DA6B343)) ^ (iy.astype(np.uint32) * np.uint32(0xD8163841))
+        h ^= np.uint32((seed * 0xCB1AB31F) & 0xFFFFFFFF)
+        h ^= h >> np.uint32(16)
+        h *= np.uint32(0x7FEB352D)
+        h ^= h >> np.uint32(15)
+        h *= np.uint32(0x846CA68B)
+        h ^= h >> np.uint32(16)
+    return h
+
+
+def _unit(h):
+    return (h >> np.uint32(8)).astype(np.float32) * np.float32(1.0 / (1 << 24))
+
+
+def _fade(t):
+    return t * t * t * (t * (t * 6 - 15) + 10)
+
+
+def _lattice(coords, cell):
+    scaled = coords / cell
+    index = np.floor(scaled)
+    return index.astype(np.int64), (scaled - index).astype(np.float32)
+
+
+def _lattice_grid(xs, ys, cell, seed):
+    # Hashes of the lattice points covering the tile, plus per-column and
+    # per-row positions within it. Only the lattice points are hashed; the
+    # per-pixel work is interpolation.
+    ix, fx = _lattice(xs, cell)
+    iy, fy = _lattice(ys, cell)
+    cols = np.arange(ix[0], ix[-1] + 2)
+    rows = np.arange(iy[0], iy[-1] + 2)
+    hashes = _hash(cols[None, :], rows[:, None], seed)
+    return hashes, ix - cols[0], fx, iy - rows[0], fy
+
+
+def _lerp_rows(top, bottom, v):
+    # top + v * (bottom - top) with v per row, in place on top.
+    bottom -= top
+    bottom *= v[:, None]
+    top += bottom
+    return top
+
+
+def value_noise(xs, ys, seed, cell):
+    hashes, cx, fx, ry, fy = _lattice_grid(xs, ys, cell, seed)
+    values = _unit(hashes)
+    u = _fade(fx)
+    # Interpolate along x once per lattice row, then between rows per pixel.
+    along = values[:, cx]
+    along += u * (values[:, cx + 1] - along)
+    return _lerp_rows(along[ry], along[ry + 1], _fade(fy))
+
+
+def perlin_noise(xs, ys, seed, cell):
+    # Signed, within +-PERLIN_RANGE. The dot product with a corner gradient
+    # splits into an x part and fy times a y part; both are interpolated
+    # along x once per lattice row.
+    hashes, cx, fx, ry, fy = _lattice_grid(xs, ys, cell, seed)
+    g = hashes & np.uint32(15)
+    gx, gy = GRADIENTS_X[g], GRADIENTS_Y[g]
+    u = _fade(fx)
+    px = gx[:, cx] * fx
+    px += u * (gx[:, cx + 1] * (fx - 1) - px)
+    py = gy[:, cx]
+    py += u * (gy[:, cx + 1] - py)
+    top = py[ry]
+    top *= fy[:, None]
+    top += px[ry]
+    bottom = py[ry + 1]
+    bottom *= (fy - 1)[:, None]
+    bottom += px[ry + 1]
+    return _lerp_rows(top, bottom, _fade(fy))
+
+
+def noise_tile(kind, xs, ys, seed=0, cell=64.0, octaves=4, persistence=0.5, lacunarity=2.0):
+    # Noise in 0..1 at column coordinates xs and row coordinates ys.
+    if kind == "White":
+        return _unit(_hash(np.floor(xs).astype(np.int64)[None, :], np.floor(ys).astype(np.int64)[:, None], seed))
+    if kind == "Value":
+        return value_noise(xs, ys, seed, cell)
+    if kind == "Perlin":
+        octaves = 1
+    total = None
+    amplitude, norm = 1.0, 0.0
+    lacunarity = max(lacunarity, 1.0)
+    for octave in range(max(int(octaves), 1)):
+        layer = perlin_noise(xs, ys, seed + octave * 1013, cell)
+        if total is None:
+            total = layer
+        else:
+            total += np.float32(amplitude) * layer
+        norm += amplitude
+        amplitude *= persistence
+        cell /= lacunarity
+        if cell < 0.5:
+            break  # finer than a pixel
+    total *= np.float32(0.5 / (PERLIN_RANGE * norm))
+    total += np.float32(0.5)
+    return np.clip(total, 0.0, 1.0, out=total)
+
+
+def clear_cache():
+    global _cache_bytes
+    with _cache_lock:
+        _cache.clear()
+        _cache_bytes = 0
+
+
+def _executor_for_tiles():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(os.cpu_count() or 1, thread_name_prefix="noise")
+        return _executor
+
+
+def _store(out, tile, dtype):
+    if np.issubdtype(dtype, np.integer):
+        tile *= np.float32(np.iinfo(dtype).max)
+        np.rint(tile, out=tile)
+    np.copyto(out, tile, casting="unsafe")
+
+
+def generate(kind, shape, seed=0, cell=64.0, octaves=4, persistence=0.5, lacunarity=2.0,
+             scale=1.0, origin=(0, 0), dtype=np.uint8):
+    # shape (h, w) pixels of the output; origin is the full-resolution
+    # position of its top-left pixel, scale the proxy factor.
+    dtype = np.dtype(dtype)
+    key = (kind, tuple(shape), int(seed), float(cell), int(octaves), float(persistence),
+           float(lacunarity), float(scale), tuple(origin), dtype.str)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    height, width = shape
+    step = 1.0 / scale
+    # Sample pixel centres of the proxy grid in full-resolution coordinates.
+    xs = origin[1] + (np.arange(width) + 0.5) * step - 0.5
+    ys = origin[0] + (np.arange(height) + 0.5) * step - 0.5
+    if kind == "White":
+        # One value per proxy pixel; a per-full-pixel field would average out.
+        xs = origin[1] * scale + np.arange(width)
+        ys = origin[0] * scale + np.arange(height)
+    out = np.empty((height, width), dtype)
+
+    def run(tile):
+        y0, x0 = tile
+        y1, x1 = min(y0 + NOISE_TILE, height), min(x0 + NOISE_TILE, width)
+        values = noise_tile(kind, xs[x0:x1], ys[y0:y1], seed, max(float(cell), 1.0),
+                            octaves, persistence, lacunarity)
+        _store(out[y0:y1, x0:x1], values, dtype)
+
+    tiles = [(y, x) for y in range(0, height, NOISE_TILE) for x in range(0, width, NOISE_TILE)]
+    if len(tiles) > 1 and (os.cpu_count() or 1) > 1:
+        # NumPy releases the GIL in the array loops, so tiles run in parallel.
+        list(_executor_for_tiles().map(run, tiles))
+    else:
+        for tile in tiles:
+            run(tile)
+    out.flags.writeable = False
+
+    global _cache_bytes
+    with _cache_lock:
+        if out.nbytes <= NOISE_CACHE_BUDGET and key not in _cache:
+            _cache[key] = out
+            _cache_bytes += out.nbytes
+            while _cache_bytes > NOISE_CACHE_BUDGET:
+                _cache_bytes -= _cache.popitem(last=False)[1].nbytes
+    return out
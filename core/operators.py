@@ -0,0 +1,297 @@
+# core/operators.py
+#
+# Headless node types. Each one wraps a kernel from core.kernels and declares
+# its ports and parameters; the matching Qt widget lives in nodes/.
+
+import os
+
+import numpy as np
+
+from core import disk_cache
+from core.graph import GraphError, LazyOutputs, Node, Port
+from core import kernels
+
+
+class ImageSource(Node):
+    type_name = "ImageInput"
+    outputs = (Port("image"),)
+    defaults = {"path": None}
+
+    def __init__(self, image=None, **params):
+        super().__init__(**params)
+        self.image = image
+        self.content = None  # (revision, key), see content_key
+
+    def set_image(self, image, path=None):
+        self.image = image
+        self.params["path"] = path
+        self.touch()
+
+    def content_key(self):
+        # Identifies the image for core.disk_cache: the file's content hash
+        # plus the decoded shape (a reduced preview decode of the same file
+        # differs), or the pixels themselves for images without a file.
+        if self.image is None:
+            return None
+        if self.content is None or self.content[0] != self.revision:
+            path = self.params["path"]
+            if path and os.path.isfile(path):
+                key = (disk_cache.file_digest(path), self.image.shape, self.image.dtype.str)
+            else:
+                key = disk_cache.array_digest(self.image)
+            self.content = (self.revision, key)
+        return self.content[1]
+
+    def prepare(self, image, context):
+        if image is None:
+            return None
+        return kernels.downscale(image, context.scale)
+
+    def compute(self, inputs, context):
+        return {"image": self.prepare(self.image, context)}
+
+
+class ImageSink(Node):
+    type_name = "Output"
+    inputs = (Port("image"),)
+    outputs = (Port("image"),)
+
+    def compute(self, inputs, context):
+        return {"image": inputs["image"]}
+
+
+class BrightnessContrast(Node):
+    type_name = "BrightnessContrast"
+    inputs = (Port("image"),)
+    outputs = (Port("image"),)
+    defaults = {"brightness": 0, "contrast": 1.0}
+
+    def pointwise_stage(self):
+        return ("lut", kernels.brightness_contrast(np.arange(256, dtype=np.uint8), **self.params))
+
+    def compute(self, inputs, context):
+        return {"image": kernels.brightness_contrast(inputs["image"], pool=context.pool, **self.params)}
+
+
+class Grayscale(Node):
+    type_name = "Grayscale"
+    inputs = (Port("image"),)
+    outputs = (Port("image"),)
+
+    def pointwise_stage(self):
+        return ("reduce", "gray")
+
+    def compute(self, inputs, context):
+        return {"image": kernels.grayscale(inputs["image"], context.pool)}
+
+
+class ChannelSplitter(Node):
+    # One output port per channel, plus "image" for the channel picked by the
+    # parameter. Each plane is extracted only when something reads its port;
+    # A is None for images without alpha.
+    type_name = "ChannelSplitter"
+    inputs = (Port("image"),)
+    outputs = (Port("image"), Port("R"), Port("G"), Port("B"), Port("A"))
+    defaults = {"channel": "R"}
+
+    def pointwise_stage(self):
+        return ("reduce", self.params["channel"])
+
+    def compute(self, inputs, context):
+        image = inputs["image"]
+        channel = self.params["channel"]
+        producers = {
+            name: (lambda name=name: kernels.select_channel(image, name, context.pool))
+            for name in kernels.CHANNEL_INDEX
+        }
+        outputs = LazyOutputs(producers)
+        producers["image"] = lambda: outputs[channel]
+        return outputs
+
+
+class Blur(Node):
+    type_name = "Blur"
+    inputs = (Port("image"),)
+    outputs = (Port("image"),)
+    defaults = {"radius": 5, "direction": "Uniform", "engine": "Auto"}
+
+    def halo(self, context):
+        return kernels.blur_halo(self.params["radius"], self.params["engine"], context.scale)
+
+    def compute(self, inputs, context):
+        return {"image": kernels.gaussian_blur(inputs["image"], scale=context.scale, pool=context.pool, **self.params)}
+
+
+class EdgeDetection(Node):
+    type_name = "EdgeDetection"
+    inputs = (Port("image"),)
+    outputs = (Port("image"),)
+    defaults = {
+        "method": "Sobel",
+        "low_threshold": 50,
+        "high_threshold": 150,
+        "kernel_size": 3,
+        "overlay": False,
+    }
+
+    def halo(self, context):
+        if self.params["method"] == "Canny":
+            # Hysteresis can follow an edge arbitrarily far; this margin keeps
+            # seams rare but tiled Canny is not bit-exact.
+            return 16
+        return min(self.params["kernel_size"], 7) // 2
+
+    def compute(self, inputs, context):
+        return {"image": kernels.detect_edges(inputs["image"], scale=context.scale, pool=context.pool, **self.params)}
+
+
+class Convolution(Node):
+    type_name = "Convolution"
+    inputs = (Port("image"),)
+    outputs = (Port("image"),)
+    # preset "Custom" uses kernel, a list of rows; the other presets are
+    # built at size x size.
+    defaults = {"preset": "Gaussian", "size": 31, "kernel": None, "method": "Auto"}
+
+    def kernel_array(self, context):
+        if self.params["preset"] == "Custom":
+            kernel = kernels.odd_kernel(self.params["kernel"] or [[1.0]])
+        else:
+            kernel = kernels.preset_kernel(self.params["preset"], self.params["size"])
+        return kernels.scale_kernel(kernel, context.scale)
+
+    def halo(self, context):
+        return max(self.kernel_array(context).shape) // 2
+
+    def compute(self, inputs, context):
+        kernel = self.kernel_array(context)
+        return {"image": kernels.convolve(inputs["image"], kernel, self.params["method"], context.pool)}
+
+
+class Threshold(Node):
+    # Single-channel mask of the gray plane; see kernels.THRESHOLD_METHODS.
+    # The gray plane, its histogram and its integral image are kept per lane
+    # for as long as the input's cached version is unchanged, so moving the
+    # threshold, block size or c slider re-runs only the comparison.
+    type_name = "Threshold"
+    inputs = (Port("image"),)
+    outputs = (Port("image"),)
+    defaults = {"method": "Binary", "threshold": 127, "block_size": 11, "c": 2, "invert": False}
+
+    def __init__(self, **params):
+        super().__init__(**params)
+        self.analysis = {}  # lane -> (input fingerprint, {"gray", "hist", "integral"})
+        self.otsu_value = None
+
+    def invalidate(self):
+        super().invalidate()
+        self.analysis = {}
+
+    def pointwise_stage(self):
+        if self.params["method"] != "Binary":
+            return None
+        return [("reduce", "gray"), ("lut", kernels.threshold_table(self.params["threshold"], self.params["invert"]))]
+
+    def halo(self, context):
+        # Otsu looks at the whole image and is picked per tile when tiled.
+        if self.params["method"] == "Adaptive":
+            return kernels.adaptive_block(self.params["block_size"], context.scale) // 2
+        return 0
+
+    def input_analysis(self, image, context):
+        # Without a fingerprint (no graph cache) nothing can be reused.
+        fingerprint = context.input_versions.get(self)
+        entry = self.analysis.get(context.lane)
+        if fingerprint is None or entry is None or entry[0] != fingerprint:
+            entry = (fingerprint, {"gray": kernels.grayscale(image)})
+            if fingerprint is not None:
+                self.analysis[context.lane] = entry
+        return entry[1]
+
+    def compute(self, inputs, context):
+        data = self.input_analysis(inputs["image"], context)
+        gray = data["gray"]
+        method = self.params["method"]
+        invert = self.params["invert"]
+        if method == "Adaptive":
+            if "integral" not in data and kernels.needs_integral(gray):
+                data["integral"] = kernels.adaptive_integral(gray)
+            block = kernels.adaptive_block(self.params["block_size"], context.scale)
+            return {"image": kernels.adaptive_threshold(gray, data.get("integral"), block, self.params["c"],
+                                                        invert, context.pool)}
+        threshold = self.params["threshold"]
+        if method == "Otsu":
+            if "hist" not in data:
+                data["hist"] = kernels.histogram(gray)
+            threshold = self.otsu_value = kernels.otsu_threshold(data["hist"])
+        return {"image": kernels.binary_threshold(gray, threshold, invert, context.pool)}
+
+
+class Blend(Node):
+    # Composites layer1..layerN over image, bottom to top, in one pass (see
+    # kernels.blend). layers holds one {"mode", "opacity"} entry per layer
+    # port; unconnected layers are skipped. Layers are resized and converted
+    # to the base image's size, channels and depth.
+    type_name = "Blend"
+    outputs = (Port("image"),)
+    defaults = {"layers": [{"mode": "Normal", "opacity": 0.5}]}
+
+    def __init__(self, **params):
+        super().__init__(**params)
+        self.update_ports()
+
+    def set_param(self, key, value):
+        if key == "layers":
+            for layer in value:
+                if layer["mode"] not in kernels.BLEND_MODES:
+                    raise GraphError(f"unknown blend mode {layer['mode']!r}, expected one of {', '.join(kernels.BLEND_MODES)}")
+        super().set_param(key, value)
+        if key == "layers":
+            self.update_ports()
+
+    def update_ports(self):
+        self.inputs = (Port("image"),) + tuple(
+            Port(f"layer{index}", optional=True) for index in range(1, len(self.params["layers"]) + 1)
+        )
+
+    def compute(self, inputs, context):
+        layers = [
+            (inputs.get(f"layer{index}"), layer["mode"], layer["opacity"])
+            for index, layer in enumerate(self.params["layers"], 1)
+        ]
+        return {"image": kernels.blend(inputs["image"], layers, context.pool)}
+
+
+class Noise(Node):
+    # Procedural noise (see core.noise) as a single-channel image. With an
+    # image connected, the noise takes its size and depth; otherwise it is
+    # width x height, 8-bit, of which a tiled render (context.region) produces
+    # the tile's part. scale is the feature size in pixels.
+    type_name = "Noise"
+    inputs = (Port("image", optional=True),)
+    outputs = (Port("image"),)
+    defaults = {
+        "kind": "Fractal",
+        "width": 1024,
+        "height": 1024,
+        "scale": 64.0,
+        "octaves": 4,
+        "persistence": 0.5,
+        "lacunarity": 2.0,
+        "seed": 0,
+    }
+
+    def compute(self, inputs, context):
+        from core import noise  # its tables are only built once noise is used
+        reference = inputs.get("image")
+        if reference is not None:
+            shape, dtype = reference.shape[:2], reference.dtype
+        else:
+            height, width = context.region or (self.params["height"], self.params["width"])
+            shape = (max(int(round(height * context.scale)), 1), max(int(round(width * context.scale)), 1))
+            dtype = np.uint8
+        image = noise.generate(
+            self.params["kind"], shape, self.params["seed"], self.params["scale"], self.params["octaves"],
+            self.params["persistence"], self.params["lacunarity"], context.scale, context.origin, dtype,
+        )
+        return {"image": image}
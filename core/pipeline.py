@@ -0,0 +1,187 @@
+# core/pipeline.py
+#
+# A CompiledPipeline is a graph frozen for repeated application: node types
+# are resolved and edges validated once, the execution order (with pointwise
+# runs already fused) is fixed, and a liveness plan says after which step each
+# intermediate result can be dropped. Running it on an image is then just the
+# kernels, with no per-image graph walking, cache keys or edge lookups.
+#
+# Parameters are captured at compile time; compile again after editing.
+# With a disk cache in the context (core.disk_cache) a run is resolved from
+# the sink backwards instead, so steps already on disk are not recomputed.
+
+import time
+
+from core.disk_cache import step_key
+from core.fusion import FusedPointwise, plan_chains, run_chain
+from core.graph import EvalContext, GraphError
+from core.serialization import graph_from_dict, load_graph
+
+
+def endpoints(graph):
+    sources = [n for n in graph.nodes if n.type_name == "ImageInput"]
+    sinks = [n for n in graph.nodes if n.type_name == "Output"]
+    if len(sources) != 1 or len(sinks) != 1:
+        raise GraphError("pipelines need exactly one ImageInput and one Output node")
+    return sources[0], sinks[0]
+
+
+class PipelineStep:
+    def __init__(self, chain, inputs):
+        self.chain = chain
+        self.node = chain[-1]
+        # {input port: (index of producing step, output port)}
+        self.inputs = inputs
+        self.fused = None
+        if len(chain) > 1:
+            self.fused = FusedPointwise([node.pointwise_stage() for node in chain])
+        # Steps whose outputs are no longer needed once this step has run.
+        self.release = []
+
+    def run(self, inputs, context):
+        if len(self.chain) > 1:
+            return run_chain(self.chain, inputs, context, self.fused)
+        return self.node.compute(inputs, context)
+
+
+class CompiledPipeline:
+    def __init__(self, graph):
+        self.graph = graph
+        self.source, self.sink = endpoints(graph)
+        order = graph.topological_order([self.sink])
+        if self.source not in order:
+            raise GraphError(f"{self.sink} is not connected to {self.source}")
+        for node in order:
+            connected = {e.dst_port for e in graph.input_edges(node)}
+            for port in node.inputs:
+                if not port.optional and port.name not in connected:
+                    raise GraphError(f"input {port.name!r} of {node} is not connected")
+
+        chains = plan_chains(graph, order, [self.sink])
+        interior = {node for chain in chains.values() for node in chain[:-1]}
+        self.steps = []
+        index_of = {}
+        for node in order:
+            if node in interior:
+                continue
+            chain = chains.get(node, [node])
+            inputs = {
+                e.dst_port: (index_of[e.src], e.src_port)
+                for e in graph.input_edges(chain[0])
+            }
+            index_of[node] = len(self.steps)
+            self.steps.append(PipelineStep(chain, inputs))
+        self.source_index = index_of[self.source]
+        self.sink_index = index_of[self.sink]
+
+        last_use = {}
+        for index, step in enumerate(self.steps):
+            for producer, _ in step.inputs.values():
+                last_use[producer] = index
+        for producer, index in last_use.items():
+            if producer != self.sink_index:
+                self.steps[index].release.append(producer)
+
+        # Most intermediate results alive at once, the buffer requirement of a run.
+        live, self.peak_buffers = 0, 0
+        for step in self.steps:
+            live += 1
+            self.peak_buffers = max(self.peak_buffers, live)
+            live -= len(step.release)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def run(self, image, context=None, source_key=None):
+        # image may be a callable returning the image, so that with a disk
+        # cache it is only decoded if some step actually misses. source_key
+        # identifies the image content (e.g. disk_cache.file_digest of its
+        # file); without it the disk cache is not used.
+        context = context or EvalContext()
+        if context.disk_cache is not None and source_key is not None:
+            return self.run_cached(image, context, source_key)
+        if callable(image):
+            image = image()
+        profiler = context.profiler
+        pool = context.pool
+        slots = [None] * len(self.steps)
+        for index, step in enumerate(self.steps):
+            if profiler is not None:
+                start = time.perf_counter()
+                pooled = pool.allocated() if pool is not None else 0
+                inputs = None
+            if index == self.source_index:
+                outputs = {"image": self.source.prepare(image, context)}
+            else:
+                inputs = {port: slots[producer][name] for port, (producer, name) in step.inputs.items()}
+                if any(inputs.get(port.name) is None for port in step.chain[0].inputs if not port.optional):
+                    outputs = {port.name: None for port in step.node.outputs}
+                else:
+                    outputs = step.run(inputs, context)
+            slots[index] = outputs
+            if profiler is not None:
+                allocated = pool.allocated() - pooled if pool is not None else None
+                profiler.record_node(step.chain, inputs, outputs, start, "miss", allocated)
+            for producer in step.release:
+                slots[producer] = None
+        return slots[self.sink_index]["image"]
+
+    def step_keys(self, source_key, context):
+        keys = []
+        for index, step in enumerate(self.steps):
+            if index == self.source_index:
+                upstream = {"content": source_key}
+            else:
+                upstream = {port: (keys[producer], name) for port, (producer, name) in step.inputs.items()}
+            keys.append(step_key(step.chain, upstream, context))
+        return keys
+
+    def run_cached(self, image, context, source_key):
+        # Demand-driven from the sink: a step found on disk is served from
+        # there and nothing upstream of it runs, the source decode included.
+        disk = context.disk_cache
+        profiler = context.profiler
+        pool = context.pool
+        keys = self.step_keys(source_key, context)
+        slots = {}
+
+        def resolve(index):
+            if index in slots:
+                return slots[index]
+            step = self.steps[index]
+            start = time.perf_counter()
+            pooled = pool.allocated() if pool is not None else 0
+            inputs = None
+            outputs = disk.get(keys[index], step.node)
+            outcome = "disk"
+            if outputs is None:
+                outcome = "miss"
+                if index == self.source_index:
+                    source = image() if callable(image) else image
+                    outputs = {"image": self.source.prepare(source, context)}
+                else:
+                    inputs = {port: resolve(producer)[name] for port, (producer, name) in step.inputs.items()}
+                    start = time.perf_counter()
+                    pooled = pool.allocated() if pool is not None else 0
+                    if any(inputs.get(port.name) is None for port in step.chain[0].inputs if not port.optional):
+                        outputs = {port.name: None for port in step.node.outputs}
+                        outcome = "skip"
+                    else:
+                        outputs = step.run(inputs, context)
+                if outcome == "miss":
+                    disk.put(keys[index], step.node, outputs, time.perf_counter() - start)
+            if profiler is not None:
+                allocated = pool.allocated() - pooled if pool is not None else None
+                profiler.record_node(step.chain, inputs, outputs, start, outcome, allocated)
+            slots[index] = outputs
+            return outputs
+
+        return resolve(self.sink_index)["image"]
+
+
+def load_pipeline(path):
+    return CompiledPipeline(load_graph(path))
+
+
+def pipeline_from_dict(data, graph=None):
+    return CompiledPipeline(graph_from_dict(data, graph))
@@ -0,0 +1,245 @@
+# core/registry.py
+#
+# Catalogue of node types. A type is declared by metadata alone (name,
+# label, ports, parameter schema), with its headless op and its Qt widget
+# named by "module:Class" strings. Listing the catalogue or building the
+# editor's palette imports no node module. A type's modules are imported
+# the first time one of its nodes is created, so the node library can grow
+# without slowing down GUI or CLI startup.
+#
+# Besides the built-in types below, plugins are discovered from
+#   - entry points in the "node_image_processor.nodes" group, each naming a
+#     list of spec dicts (that module is imported at discovery, so keep it
+#     free of heavy imports);
+#   - *.json manifests in the plugin directories (NODE_PLUGIN_PATH,
+#     os.pathsep separated, then ~/.config/node-image-processor/plugins),
+#     each holding one spec dict or a list of them. Plugin directories go on
+#     sys.path so manifests can name modules next to them.
+#
+# A spec dict:
+#
+#   {"type": "Posterize", "label": "Posterize", "op": "posterize:Posterize",
+#    "widget": "posterize:PosterizeNode", "inputs": ["image"],
+#    "outputs": ["image"], "params": {"levels": {"default": 4, "min": 2, "max": 64}}}
+#
+# "widget" is optional: without one the editor builds controls from the
+# parameter schema (nodes/generic_node.py). A parameter is either its default
+# value or a dict with "default" and optionally "choices", "min" and "max".
+
+import configparser
+import importlib
+import json
+import os
+import sys
+import threading
+
+from core.errors import GraphError
+
+ENTRY_POINT_GROUP = "node_image_processor.nodes"
+
+BUILTIN_SPECS = [
+    {"type": "ImageInput", "label": "Image Input", "category": "Basic", "palette": False,
+     "op": "core.operators:ImageSource", "widget": "nodes.image_input_node:ImageInputNode",
+     "outputs": ["image"], "params": {"path": None}},
+    {"type": "Output", "label": "Output", "category": "Basic", "palette": False,
+     "op": "core.operators:ImageSink", "widget": "nodes.output_node:OutputNode",
+     "inputs": ["image"], "outputs": ["image"]},
+    {"type": "BrightnessContrast", "label": "Brightness/Contrast",
+     "op": "core.operators:BrightnessContrast", "widget": "nodes.brightness_contrast_node:BrightnessContrastNode",
+     "inputs": ["image"], "outputs": ["image"], "params": {"brightness": 0, "contrast": 1.0}},
+    {"type": "Grayscale", "label": "Grayscale",
+     "op": "core.operators:Grayscale", "widget": "nodes.grayscale_node:GrayscaleNode",
+     "inputs": ["image"], "outputs": ["image"]},
+    {"type": "ChannelSplitter", "label": "Channel Splitter",
+     "op": "core.operators:ChannelSplitter", "widget": "nodes.color_channel_splitter_node:ColorChannelSplitterNode",
+     "inputs": ["image"], "outputs": ["image", "R", "G", "B", "A"], "params": {"channel": "R"}},
+    {"type": "Blur", "label": "Blur",
+     "op": "core.operators:Blur", "widget": "nodes.blur_node:BlurNode",
+     "inputs": ["image"], "outputs": ["image"],
+     "params": {"radius": 5, "direction": "Uniform", "engine": "Auto"}},
+    {"type": "EdgeDetection", "label": "Edge Detection",
+     "op": "core.operators:EdgeDetection", "widget": "nodes.edge_detection_node:EdgeDetectionNode",
+     "inputs": ["image"], "outputs": ["image"],
+     "params": {"method": "Sobel", "low_threshold": 50, "high_threshold": 150, "kernel_size": 3, "overlay": False}},
+    {"type": "Convolution", "label": "Convolution",
+     "op": "core.operators:Convolution", "widget": "nodes.convolution_node:ConvolutionNode",
+     "inputs": ["image"], "outputs": ["image"],
+     "params": {"preset": "Gaussian", "size": 31, "kernel": None, "method": "Auto"}},
+    {"type": "Threshold", "label": "Threshold",
+     "op": "core.operators:Threshold", "widget": "nodes.threshold_node:ThresholdNode",
+     "inputs": ["image"], "outputs": ["image"],
+     "params": {"method": "Binary", "threshold": 127, "block_size": 11, "c": 2, "invert": False}},
+    # Layer inputs (layer1..N) are added per node as layers are configured.
+    {"type": "Blend", "label": "Blend",
+     "op": "core.operators:Blend", "widget": "nodes.blend_node:BlendNode",
+     "inputs": ["image"], "outputs": ["image"],
+     "params": {"layers": [{"mode": "Normal", "opacity": 0.5}]}},
+    {"type": "Noise", "label": "Noise",
+     "op": "core.operators:Noise", "widget": "nodes.noise_node:NoiseNode",
+     "inputs": ["image"], "outputs": ["image"],
+     "params": {"kind": "Fractal", "width": 1024, "height": 1024, "scale": 64.0, "octaves": 4,
+                "persistence": 0.5, "lacunarity": 2.0, "seed": 0}},
+]
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def load_object(path):
+    # "package.module:Attribute" -> the attribute, importing the module.
+    module_name, _, attribute = path.partition(":")
+    try:
+        return getattr(importlib.import_module(module_name), attribute)
+    except Exception as exc:  # whatever a plugin module raises on import
+        raise GraphError(f"cannot load {path!r}: {exc}") from None
+
+
+class NodeSpec:
+    def __init__(self, data, origin="built-in"):
+        try:
+            self.type = data["type"]
+            self.op = data["op"]
+        except (KeyError, TypeError):
+            raise GraphError(f"node spec from {origin} needs 'type' and 'op'") from None
+        self.label = data.get("label", self.type)
+        self.category = data.get("category", "Processing")
+        self.widget = data.get("widget")
+        self.palette = data.get("palette", True)
+        self.inputs = tuple(data.get("inputs", ()))
+        self.outputs = tuple(data.get("outputs", ("image",)))
+        self.params = {
+            name: dict(value) if isinstance(value, dict) and "default" in value else {"default": value}
+            for name, value in data.get("params", {}).items()
+        }
+        self.origin = origin
+        self._op_class = None
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return f"NodeSpec({self.type!r}, {self.origin})"
+
+    @property
+    def op_class(self):
+        with self.lock:
+            if self._op_class is None:
+                op_class = load_object(self.op)
+                # The metadata must describe the class it stands for.
+                if getattr(op_class, "type_name", None) != self.type:
+                    raise GraphError(f"{self.op} has type_name {getattr(op_class, 'type_name', None)!r}, spec says {self.type!r}")
+                if set(op_class.defaults) != set(self.params):
+                    raise GraphError(f"{self.op} parameters {sorted(op_class.defaults)} do not match its spec {sorted(self.params)}")
+                self._op_class = op_class
+            return self._op_class
+
+    def create_widget(self):
+        if self.widget:
+            return load_object(self.widget)()
+        from nodes.generic_node import GenericNode
+        return GenericNode(self)
+
+
+class NodeRegistry:
+    def __init__(self, specs=()):
+        self.specs = {}  # in registration order, the palette order
+        self.errors = []  # plugins that could not be registered
+        for data in specs:
+            self.register(data)
+
+    def register(self, data, origin="built-in"):
+        spec = data if isinstance(data, NodeSpec) else NodeSpec(data, origin)
+        if spec.type in self.specs:
+            raise GraphError(f"node type {spec.type!r} from {origin} is already registered by {self.specs[spec.type].origin}")
+        self.specs[spec.type] = spec
+        return spec
+
+    def get(self, type_name):
+        spec = self.specs.get(type_name)
+        if spec is None:
+            raise GraphError(f"unknown node type {type_name!r}")
+        return spec
+
+    def __contains__(self, type_name):
+        return type_name in self.specs
+
+    def op_class(self, type_name):
+        return self.get(type_name).op_class
+
+    def palette(self):
+        return [spec for spec in self.specs.values() if spec.palette]
+
+    def register_plugin(self, entries, origin):
+        if isinstance(entries, dict):
+            entries = [entries]
+        for data in entries:
+            try:
+                self.register(data, origin)
+            except GraphError as exc:
+                self.errors.append(str(exc))
+
+    def discover(self, directories=None):
+        for name, target in _entry_points():
+            try:
+                entries = load_object(target.split("[")[0].strip())
+            except Exception as exc:  # a broken plugin must not stop startup
+                self.errors.append(f"entry point {name}: {exc}")
+                continue
+            self.register_plugin(entries, f"entry point {name}")
+        for directory in plugin_directories() if directories is None else directories:
+            if not os.path.isdir(directory):
+                continue
+            if directory not in sys.path:
+                sys.path.append(directory)
+            for name in sorted(os.listdir(directory)):
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    with open(path) as f:
+                        entries = json.load(f)
+                except (OSError, ValueError) as exc:
+                    self.errors.append(f"{path}: {exc}")
+                    continue
+                self.register_plugin(entries, path)
+        for error in self.errors:
+            print(f"warning: node plugin skipped: {error}", file=sys.stderr)
+        return self
+
+
+def _entry_points():
+    # (name, "module:attr") of every installed entry point in the group.
+    # entry_points.txt is read directly: importing importlib.metadata alone
+    # costs more startup time than everything else the registry does.
+    found = []
+    for base in sys.path:
+        try:
+            names = sorted(os.listdir(base or "."))
+        except OSError:
+            continue
+        for name in names:
+            if not name.endswith((".dist-info", ".egg-info")):
+                continue
+            parser = configparser.ConfigParser(delimiters=("=",), interpolation=None)
+            parser.optionxform = str
+            try:
+                parser.read(os.path.join(base, name, "entry_points.txt"))
+            except configparser.Error:
+                continue
+            if parser.has_section(ENTRY_POINT_GROUP):
+                found.extend(parser.items(ENTRY_POINT_GROUP))
+    return found
+
+
+def plugin_directories():
+    directories = [d for d in os.environ.get("NODE_PLUGIN_PATH", "").split(os.pathsep) if d]
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    directories.append(os.path.join(base, "node-image-processor", "plugins"))
+    return directories
+
+
+def default_registry():
+    # Built-in types plus discovered plugins, built on first use.
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = NodeRegistry(BUILTIN_SPECS).discover()
+        return _default
@@ -0,0 +1,78 @@
+# core/serialization.py
+#
+# Versioned JSON (de)serialization of headless graphs:
+#
+#   {"format": "node-graph", "version": 1,
+#    "nodes": [{"id": 0, "type": "Blur", "params": {...}}, ...],
+#    "edges": [{"src": 0, "src_port": "image", "dst": 1, "dst_port": "image"}, ...]}
+#
+# Files without a version are the unversioned layout written before the
+# format was versioned; it has the same fields and loads as version 0.
+
+import json
+
+from core.graph import Graph, GraphError
+from core.registry import default_registry
+
+FORMAT_NAME = "node-graph"
+FORMAT_VERSION = 1
+
+
+def graph_to_dict(graph):
+    return {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "nodes": [
+            {"id": node.id, "type": node.type_name, "params": dict(node.params)}
+            for node in graph.nodes
+        ],
+        "edges": [
+            {"src": e.src.id, "src_port": e.src_port, "dst": e.dst.id, "dst_port": e.dst_port}
+            for e in graph.edges
+        ],
+    }
+
+
+def upgrade(data):
+    version = data.get("version", 0)
+    if data.get("format", FORMAT_NAME) != FORMAT_NAME:
+        raise GraphError(f"not a node graph file (format {data.get('format')!r})")
+    if not isinstance(version, int) or version > FORMAT_VERSION:
+        raise GraphError(f"unsupported graph format version {version!r}")
+    if version == 0:
+        data = dict(data, format=FORMAT_NAME, version=1)
+    return data
+
+
+def graph_from_dict(data, graph=None):
+    data = upgrade(data)
+    graph = graph or Graph()
+    registry = default_registry()
+    by_id = {}
+    for entry in data["nodes"]:
+        # Imports the node's module on first use (core.registry).
+        node_class = registry.op_class(entry["type"])
+        if entry["id"] in by_id:
+            raise GraphError(f"duplicate node id {entry['id']!r}")
+        try:
+            node = node_class(**entry.get("params", {}))
+        except TypeError as exc:
+            raise GraphError(f"invalid parameters for {entry['type']}: {exc}") from None
+        by_id[entry["id"]] = graph.add_node(node)
+    for entry in data["edges"]:
+        try:
+            src, dst = by_id[entry["src"]], by_id[entry["dst"]]
+        except KeyError as exc:
+            raise GraphError(f"edge refers to unknown node {exc.args[0]!r}") from None
+        graph.connect(src, dst, entry.get("src_port"), entry.get("dst_port"))
+    return graph
+
+
+def save_graph(graph, path):
+    with open(path, "w") as f:
+        json.dump(graph_to_dict(graph), f, indent=2)
+
+
+def load_graph(path, graph=None):
+    with open(path) as f:
+        return graph_from_dict(json.load(f), graph)
@@ -0,0 +1,494 @@
+# core/server.py
+#
+# Local HTTP render service, so other tools can run saved graphs without
+# PyQt5. It binds to localhost only.
+#
+#   python -m core.server --port 8765 --workers 4
+#
+#   POST /render   {"graph": <saved graph JSON>, "images": [base64, ...],
+#                   "format": ".png"}  ->  {"images": [base64, ...]}
+#   GET  /metrics  queue depth, latency percentiles, batching, per-node time
+#   GET  /health
+#
+# Requests wait in a bounded queue. When it is full the server answers 503
+# with Retry-After rather than buffering without limit. A dispatcher hands
+# work to `workers` threads; the kernels release the GIL, so those threads
+# run in parallel. Whenever a worker frees up, the dispatcher takes the
+# oldest request together with up to max_batch - 1 queued requests for the
+# same graph as one micro-batch. When idle it waits up to batch_window for
+# more to arrive. Compiled pipelines stay warm per graph in an LRU. One
+# pipeline instance serves one batch at a time, so concurrent batches of the
+# same graph each check out their own.
+#
+# render() is a small blocking client; RenderServer.start_thread() runs a
+# server on a background event loop, e.g. inside another tool's process.
+
+import argparse
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.client import HTTPConnection
+
+import cv2
+
+from core.buffers import BufferPool
+from core.graph import EvalContext, GraphError
+from core.image_io import decode_image, encode_image
+from core.pipeline import CompiledPipeline
+from core.profiling import Profiler
+from core.serialization import graph_from_dict
+
+HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY = 512 * 2**20
+LATENCY_WINDOW = 1000  # most recent requests the percentiles cover
+EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def graph_key(data):
+    return hashlib.sha1(json.dumps(data, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def percentile(ordered, fraction):
+    # Nearest rank on an ascending list.
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class PipelineCache:
+    # Idle compiled pipelines per graph key, least recently used graph first.
+    def __init__(self, capacity=32):
+        self.capacity = capacity
+        self.idle = OrderedDict()  # {key: [CompiledPipeline, ...]}
+        self.size = 0
+        self.hits = 0
+        self.compiles = 0
+        self.lock = threading.Lock()
+
+    def acquire(self, key, data):
+        with self.lock:
+            pipelines = self.idle.get(key)
+            if pipelines:
+                pipeline = pipelines.pop()
+                if not pipelines:
+                    del self.idle[key]
+                self.size -= 1
+                self.hits += 1
+                return pipeline
+            self.compiles += 1
+        return CompiledPipeline(graph_from_dict(data))
+
+    def release(self, key, pipeline):
+        with self.lock:
+            self.idle.setdefault(key, []).append(pipeline)
+            self.idle.move_to_end(key)
+            self.size += 1
+            while self.size > self.capacity:
+                oldest = next(iter(self.idle))
+                self.idle[oldest].pop(0)
+                if not self.idle[oldest]:
+                    del self.idle[oldest]
+                self.size -= 1
+
+
+class RenderJob:
+    def __init__(self, key, graph_data, images, extension, future):
+        self.key = key
+        self.graph_data = graph_data
+        self.images = images  # encoded bytes
+        self.extension = extension
+        self.future = future
+        self.received = time.perf_counter()
+
+
+class RenderServer:
+    def __init__(self, port=DEFAULT_PORT, workers=None, queue_limit=64, max_batch=8,
+                 batch_window=0.002, pipeline_cache=32):
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_limit = queue_limit
+        self.max_batch = max(max_batch, 1)
+        self.batch_window = batch_window
+        self.pipelines = PipelineCache(pipeline_cache)
+        self.buffer_pool = BufferPool()
+        self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix="render")
+        self.queue = deque()
+        self.busy = 0
+        self.server = None
+        self.loop = None
+        self.thread = None
+        self.dispatcher = None
+        self.connections = set()  # handler tasks of open connections
+        self.arrived = None  # asyncio.Events, created on the server's loop
+        self.idle = None
+
+        self.metrics_lock = threading.Lock()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.batches = 0
+        self.batched_jobs = 0
+        self.largest_batch = 0
+        self.stage_times = {}  # {node type or "decode"/"encode": [calls, seconds]}
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.arrived = asyncio.Event()
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.server = await asyncio.start_server(self.handle, HOST, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.dispatcher = asyncio.create_task(self.dispatch())
+
+    async def close(self):
+        self.server.close()
+        for task in list(self.connections):
+            task.cancel()
+        self.dispatcher.cancel()
+        await asyncio.gather(self.dispatcher, *self.connections, return_exceptions=True)
+        await self.server.wait_closed()
+        self.executor.shutdown(wait=True)
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"render server on http://{HOST}:{self.port} ({self.workers} workers)", flush=True)
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.close()
+
+    def start_thread(self):
+        # Serve from a daemon thread's event loop; returns once bound.
+        started = threading.Event()
+
+        def main():
+            loop = asyncio.new_event_loop()
+            loop.run_until_complete(self.start())
+            started.set()
+            loop.run_forever()
+            loop.run_until_complete(self.close())
+            loop.close()
+
+        self.thread = threading.Thread(target=main, name="render-server", daemon=True)
+        self.thread.start()
+        started.wait()
+        return self
+
+    def stop_thread(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+    # Queue and dispatch, on the event loop.
+
+    def submit(self, key, graph_data, images, extension):
+        if len(self.queue) >= self.queue_limit:
+            self.rejected += 1
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "render queue is full", {"Retry-After": "1"})
+        job = RenderJob(key, graph_data, images, extension, self.loop.create_future())
+        self.queue.append(job)
+        self.arrived.set()
+        return job.future
+
+    def queued(self, key):
+        return sum(1 for job in self.queue if job.key == key)
+
+    async def wait_for_batch(self, key):
+        while self.queued(key) < self.max_batch:
+            self.arrived.clear()
+            await self.arrived.wait()
+
+    def take_batch(self, key):
+        batch, rest = [], deque()
+        for job in self.queue:
+            if job.key == key and len(batch) < self.max_batch:
+                batch.append(job)
+            else:
+                rest.append(job)
+        self.queue = rest
+        return batch
+
+    async def dispatch(self):
+        while True:
+            # Wait for a free worker first: while all are busy, requests pile
+            # up and the next batch forms on its own.
+            while self.busy >= self.workers:
+                self.idle.clear()
+                await self.idle.wait()
+            while not self.queue:
+                self.arrived.clear()
+                await self.arrived.wait()
+            key = self.queue[0].key
+            if self.batch_window > 0 and self.busy == 0 and self.queued(key) < self.max_batch:
+                try:
+                    await asyncio.wait_for(self.wait_for_batch(key), self.batch_window)
+                except asyncio.TimeoutError:
+                    pass
+            batch = self.take_batch(key)
+            self.busy += 1
+            done = self.loop.run_in_executor(self.executor, self.run_batch, batch)
+            done.add_done_callback(lambda future, batch=batch: self.finish_batch(batch, future))
+
+    def finish_batch(self, batch, future):
+        self.busy -= 1
+        self.idle.set()
+        try:
+            results = future.result()
+        except Exception as exc:  # a bug, not a bad request
+            results = [HTTPError(HTTPStatus.INTERNAL_SERVER_ERROR, f"render failed: {exc}")] * len(batch)
+        now = time.perf_counter()
+        with self.metrics_lock:
+            self.batches += 1
+            self.batched_jobs += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            for job, result in zip(batch, results):
+                if isinstance(result, HTTPError):
+                    self.failed += 1
+                else:
+                    self.completed += 1
+                    self.latencies.append(now - job.received)
+        for job, result in zip(batch, results):
+            if job.future.done():
+                continue  # client went away
+            if isinstance(result, HTTPError):
+                job.future.set_exception(result)
+            else:
+                job.future.set_result(result)
+
+    # Rendering, on a worker thread.
+
+    def run_batch(self, batch):
+        key = batch[0].key
+        try:
+            pipeline = self.pipelines.acquire(key, batch[0].graph_data)
+        except (GraphError, KeyError, TypeError, ValueError) as exc:
+            error = HTTPError(HTTPStatus.BAD_REQUEST, f"invalid graph: {exc}")
+            return [error] * len(batch)
+        profiler = Profiler(max_events=None)
+        context = EvalContext(profiler=profiler, pool=self.buffer_pool)
+        results = []
+        for job in batch:
+            try:
+                results.append(self.render_job(pipeline, job, context, profiler))
+            except Exception as exc:  # e.g. cv2.error on an unsupported image layout
+                results.append(HTTPError(HTTPStatus.INTERNAL_SERVER_ERROR, f"render failed: {exc}"))
+        self.pipelines.release(key, pipeline)
+        self.record_times(profiler)
+        return results
+
+    def render_job(self, pipeline, job, context, profiler):
+        outputs = []
+        for index, data in enumerate(job.images):
+            start = time.perf_counter()
+            image = decode_image(data)
+            profiler.record("decode", start, category="io")
+            if image is None:
+                return HTTPError(HTTPStatus.BAD_REQUEST, f"could not decode image {index}")
+            result = pipeline.run(image, context)
+            if result is None:
+                return HTTPError(HTTPStatus.UNPROCESSABLE_ENTITY, "graph produced no output")
+            start = time.perf_counter()
+            encoded = encode_image(job.extension, result)
+            profiler.record("encode", start, category="io")
+            if encoded is None:
+                return HTTPError(HTTPStatus.UNPROCESSABLE_ENTITY, f"could not encode image {index} as {job.extension}")
+            outputs.append(encoded)
+        return outputs
+
+    def record_times(self, profiler):
+        with self.metrics_lock:
+            for event in profiler.events:
+                args = event["args"]
+                names = args.get("fused") or [event["name"]]
+                name = "+".join(n.split("#")[0] for n in names)
+                entry = self.stage_times.setdefault(name, [0, 0.0])
+                entry[0] += 1
+                entry[1] += event["dur"] / 1e6
+
+    def metrics(self):
+        with self.metrics_lock:
+            ordered = sorted(self.latencies)
+            latency = {
+                name: None if value is None else round(value * 1000, 2)
+                for name, value in (("p50", percentile(ordered, 0.5)), ("p90", percentile(ordered, 0.9)),
+                                    ("p99", percentile(ordered, 0.99)), ("max", ordered[-1] if ordered else None))
+            }
+            nodes = {
+                name: {"calls": calls, "total_ms": round(seconds * 1000, 2),
+                       "mean_ms": round(seconds * 1000 / calls, 3)}
+                for name, (calls, seconds) in sorted(self.stage_times.items())
+            }
+            return {
+                "queue_depth": len(self.queue),
+                "queue_limit": self.queue_limit,
+                "workers": self.workers,
+                "busy_workers": self.busy,
+                "requests": {"completed": self.completed, "failed": self.failed, "rejected": self.rejected},
+                "latency_ms": latency,
+                "batches": {"count": self.batches, "largest": self.largest_batch,
+                            "mean_size": round(self.batched_jobs / self.batches, 2) if self.batches else None},
+                "pipelines": {"cached": self.pipelines.size, "hits": self.pipelines.hits,
+                              "compiles": self.pipelines.compiles},
+                "nodes": nodes,
+            }
+
+    # HTTP.
+
+    async def handle(self, reader, writer):
+        task = asyncio.current_task()
+        self.connections.add(task)
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except HTTPError as exc:
+                    await write_response(writer, exc.status, {"error": str(exc)}, exc.headers, False)
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    payload = await self.route(method, path, body)
+                    status, extra = HTTPStatus.OK, {}
+                except HTTPError as exc:
+                    payload, status, extra = {"error": str(exc)}, exc.status, exc.headers
+                await write_response(writer, status, payload, extra, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # close() cancels open keep-alive connections. Ending normally
+            # keeps asyncio's stream callback from logging the cancellation.
+            pass
+        finally:
+            self.connections.discard(task)
+            writer.close()
+
+    async def route(self, method, path, body):
+        path = path.split("?", 1)[0]
+        if path in ("/health", "/metrics"):
+            if method != "GET":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{path} takes GET")
+            return {"status": "ok"} if path == "/health" else self.metrics()
+        if path != "/render":
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"no such endpoint {path}")
+        if method != "POST":
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "/render takes POST")
+
+        try:
+            request = json.loads(body)
+            graph_data = request["graph"]
+            images = [base64.b64decode(image, validate=True) for image in request["images"]]
+        except (ValueError, KeyError, TypeError, binascii.Error) as exc:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"malformed render request: {exc}") from None
+        extension = str(request.get("format", ".png")).lower()
+        if extension not in EXTENSIONS:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"unsupported format {extension!r}")
+        if not isinstance(graph_data, dict) or not images:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "a render request needs a graph and at least one image")
+        outputs = await self.submit(graph_key(graph_data), graph_data, images, extension)
+        return {"images": [base64.b64encode(data).decode("ascii") for data in outputs]}
+
+
+async def read_request(reader):
+    # (method, path, lowercased headers, body), or None at end of stream.
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, path, _ = line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "malformed request line") from None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "bad Content-Length") from None
+    if length > MAX_BODY:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"request body over {MAX_BODY} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+
+async def write_response(writer, status, payload, headers, keep_alive):
+    body = json.dumps(payload).encode()
+    status = HTTPStatus(status)
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}", "Content-Type: application/json",
+             f"Content-Length: {len(body)}", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+
+
+def render(graph_data, images, port=DEFAULT_PORT, extension=".png", connection=None):
+    # Blocking client: encoded images in, encoded images out. Raises
+    # HTTPError with the server's message on failure.
+    body = json.dumps({
+        "graph": graph_data,
+        "images": [base64.b64encode(data).decode("ascii") for data in images],
+        "format": extension,
+    })
+    conn = connection or HTTPConnection(HOST, port)
+    try:
+        conn.request("POST", "/render", body, {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        payload = json.loads(response.read())
+    finally:
+        if connection is None:
+            conn.close()
+    if response.status != HTTPStatus.OK:
+        raise HTTPError(response.status, payload.get("error", response.reason))
+    return [base64.b64decode(data) for data in payload["images"]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.server", description="Serve graph renders over local HTTP.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("-w", "--workers", type=int, default=None, help="render threads (default: CPU count)")
+    parser.add_argument("--queue-limit", type=int, default=64, help="queued requests before answering 503")
+    parser.add_argument("--max-batch", type=int, default=8, help="requests for one graph rendered as a batch")
+    parser.add_argument("--batch-window", type=float, default=2.0, help="ms an idle server waits to fill a batch")
+    parser.add_argument("--pipeline-cache", type=int, default=32, help="compiled pipelines kept warm")
+    args = parser.parse_args(argv)
+
+    server = RenderServer(args.port, args.workers, args.queue_limit, args.max_batch,
+                          args.batch_window / 1000, args.pipeline_cache)
+    # Split the cores between render threads and OpenCV's own threads.
+    cv2.setNumThreads(max(1, (os.cpu_count() or 1) // server.workers))
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    except OSError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
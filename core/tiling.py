@@ -0,0 +1,108 @@
+# core/tiling.py
+#
+# Out-of-core rendering: the graph is evaluated one tile at a time, each tile
+# read with enough surrounding context (halo) for every spatial node on the
+# way to the sink, and the cropped results are written into a memory-mapped
+# .npy file. Peak memory is bounded by tile size x graph depth.
+#
+#   python -m core.tiling graph.json scan.npy out.npy --tile-size 2048
+
+import argparse
+import sys
+
+import numpy as np
+
+from core.buffers import BufferPool
+from core.graph import EvalContext, GraphError
+from core.image_io import read_image
+from core.pipeline import endpoints
+from core.serialization import load_graph
+
+
+def halo_requirements(graph, sink, context):
+    # Halo each node's output must carry so the sink's tile is exact: a node
+    # needs its consumers' halo plus the consumer's own kernel reach.
+    order = graph.topological_order([sink])
+    needed = {node: 0 for node in order}
+    for node in reversed(order):
+        for edge in graph.input_edges(node):
+            if edge.src in needed:
+                needed[edge.src] = max(needed[edge.src], needed[node] + node.halo(context))
+    return needed
+
+
+def open_source(path):
+    # .npy inputs are memory-mapped so only the rows of each tile are paged
+    # in. Other formats have no partial decoder in OpenCV and are decoded whole.
+    if path.lower().endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+    image = read_image(path)
+    if image is None:
+        raise OSError(f"could not decode {path}")
+    return image
+
+
+def iter_tiles(height, width, tile_size):
+    for y0 in range(0, height, tile_size):
+        for x0 in range(0, width, tile_size):
+            yield y0, min(y0 + tile_size, height), x0, min(x0 + tile_size, width)
+
+
+def render_tiled(graph, source, sink, image, output_path, tile_size=1024):
+    margin = halo_requirements(graph, sink, EvalContext())[source]
+    height, width = image.shape[:2]
+    for node in graph.topological_order([sink]):
+        # A consumer resizes a generated frame of another size to its input,
+        # which no tile can reproduce.
+        if node.type_name == "Noise" and not graph.input_edges(node):
+            if (node.params["height"], node.params["width"]) != (height, width):
+                raise GraphError(f"{node} without an image input must be {width}x{height}, the image size, to render tiled")
+    pool = BufferPool()  # interior tiles all have the same shape
+    output = None
+    previous, previous_path = source.image, source.params["path"]
+    use_cache, graph.use_cache = graph.use_cache, False
+    try:
+        for y0, y1, x0, x1 in iter_tiles(height, width, tile_size):
+            ry0, ry1 = max(y0 - margin, 0), min(y1 + margin, height)
+            rx0, rx1 = max(x0 - margin, 0), min(x1 + margin, width)
+            source.set_image(np.ascontiguousarray(image[ry0:ry1, rx0:rx1]))
+            context = EvalContext(pool=pool, origin=(ry0, rx0), region=(ry1 - ry0, rx1 - rx0))
+            tile = graph.evaluate([sink], context)[sink]["image"]
+            if tile is None:
+                raise GraphError("graph produced no output for tile")
+            tile = tile[y0 - ry0:y1 - ry0, x0 - rx0:x1 - rx0]
+
+            if output is None:
+                output = np.lib.format.open_memmap(
+                    output_path, mode="w+", dtype=tile.dtype,
+                    shape=(height, width) + tile.shape[2:],
+                )
+            output[y0:y1, x0:x1] = tile
+    finally:
+        graph.use_cache = use_cache
+        source.set_image(previous, previous_path)
+    if output is not None:
+        output.flush()
+    return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.tiling", description="Render a graph tile by tile into a memory-mapped .npy file.")
+    parser.add_argument("graph", help="graph JSON file")
+    parser.add_argument("input", help="input image or .npy array")
+    parser.add_argument("output", help="output .npy file")
+    parser.add_argument("--tile-size", type=int, default=1024)
+    args = parser.parse_args(argv)
+
+    try:
+        graph = load_graph(args.graph)
+        source, sink = endpoints(graph)
+        render_tiled(graph, source, sink, open_source(args.input), args.output, args.tile_size)
+    except (GraphError, OSError, ValueError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
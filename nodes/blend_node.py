@@ -0,0 +1,109 @@
+# nodes/blend_node.py
+
+from PyQt5.QtWidgets import QGraphicsProxyWidget, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QComboBox, QSlider, QSpinBox
+from PyQt5.QtCore import Qt
+from core.node import BaseNode
+from core.operators import Blend
+from core.kernels import BLEND_MODES
+
+MAX_LAYERS = 10
+
+class BlendNode(BaseNode):
+    # The chain feeds the base image; each layer row picks its source among
+    # the input image and the nodes before this one (layer_sources holds
+    # indices into that list, 0 being the input image).
+    op_class = Blend
+
+    def __init__(self):
+        super().__init__("Blend")
+        self.source_names = ["Input Image"]
+        self.layer_sources = [0]
+        self.on_sources_changed = None
+        self.rows = []
+
+        self.widget = QWidget()
+        layout = QVBoxLayout()
+
+        title = QLabel("Blend")
+        title.setStyleSheet("font-weight: bold;")
+        layout.addWidget(title)
+
+        self.count_spin = QSpinBox()
+        self.count_spin.setRange(1, MAX_LAYERS)
+        self.count_spin.setValue(1)
+        self.count_spin.valueChanged.connect(self.update_layer_count)
+        layout.addWidget(QLabel("Layers"))
+        layout.addWidget(self.count_spin)
+
+        self.rows_layout = QVBoxLayout()
+        layout.addLayout(self.rows_layout)
+
+        self.widget.setLayout(layout)
+        self.proxy = QGraphicsProxyWidget(self)
+        self.proxy.setWidget(self.widget)
+        self.build_rows()
+
+    def build_rows(self):
+        for row in self.rows:
+            row[0].setParent(None)
+        self.rows = []
+        for index, layer in enumerate(self.op.params["layers"]):
+            row_widget = QWidget()
+            row_layout = QHBoxLayout()
+            row_layout.setContentsMargins(0, 0, 0, 0)
+            source = QComboBox()
+            source.addItems(self.source_names)
+            source.setCurrentIndex(min(self.layer_sources[index], len(self.source_names) - 1))
+            source.currentIndexChanged.connect(self.update_sources)
+            mode = QComboBox()
+            mode.addItems(BLEND_MODES)
+            mode.setCurrentText(layer["mode"])
+            mode.currentIndexChanged.connect(self.update_params)
+            opacity = QSlider(Qt.Horizontal)
+            opacity.setRange(0, 100)
+            opacity.setValue(int(round(layer["opacity"] * 100)))
+            opacity.valueChanged.connect(self.update_params)
+            for widget in (source, mode, opacity):
+                row_layout.addWidget(widget)
+            row_widget.setLayout(row_layout)
+            self.rows_layout.addWidget(row_widget)
+            self.rows.append((row_widget, source, mode, opacity))
+
+    def set_source_names(self, names):
+        # Called by the editor whenever the chain changes.
+        self.source_names = names
+        self.layer_sources = [min(choice, len(names) - 1) for choice in self.layer_sources]
+        for (_, source, _, _), choice in zip(self.rows, self.layer_sources):
+            source.blockSignals(True)
+            source.clear()
+            source.addItems(names)
+            source.setCurrentIndex(choice)
+            source.blockSignals(False)
+
+    def layers(self):
+        return [{"mode": mode.currentText(), "opacity": opacity.value() / 100.0}
+                for _, _, mode, opacity in self.rows]
+
+    def update_layer_count(self, count):
+        layers = self.layers()[:count]
+        layers += [{"mode": "Normal", "opacity": 0.5}] * (count - len(layers))
+        self.layer_sources = (self.layer_sources + [0] * count)[:count]
+        self.op.set_param("layers", layers)
+        self.build_rows()
+        self.update_sources()
+
+    def update_sources(self):
+        self.layer_sources = [source.currentIndex() for _, source, _, _ in self.rows]
+        if self.on_sources_changed:
+            self.on_sources_changed()
+
+    def update_params(self):
+        self.set_param("layers", self.layers())
+
+    def sync_widgets(self):
+        count = len(self.op.params["layers"])
+        self.layer_sources = (self.layer_sources + [0] * count)[:count]
+        self.count_spin.blockSignals(True)
+        self.count_spin.setValue(count)
+        self.count_spin.blockSignals(False)
+        self.build_rows()
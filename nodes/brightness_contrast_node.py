@@ -1,9 +1,11 @@
 from PyQt5.QtWidgets import QGraphicsProxyWidget, QVBoxLayout, QLabel, QSlider, QWidget
 from PyQt5.QtCore import Qt
-import numpy as np
 from core.node import BaseNode
+from core.operators import BrightnessContrast
 
 class BrightnessContrastNode(BaseNode):
+    op_class = BrightnessContrast
+
     def __init__(self):
         super().__init__("Brightness/Contrast")
 
@@ -21,14 +23,14 @@ class BrightnessContrastNode(BaseNode):
         self.brightness_slider.setMinimum(-100)
         self.brightness_slider.setMaximum(100)
         self.brightness_slider.setValue(0)
-        self.brightness_slider.valueChanged.connect(self.process)
+        self.brightness_slider.valueChanged.connect(self.on_brightness_change)
         layout.addWidget(self.brightness_slider)
 
         self.contrast_slider = QSlider(Qt.Horizontal)
         self.contrast_slider.setMinimum(0)
         self.contrast_slider.setMaximum(300)
         self.contrast_slider.setValue(100)
-        self.contrast_slider.valueChanged.connect(self.process)
+        self.contrast_slider.valueChanged.connect(self.on_contrast_change)
         layout.addWidget(self.contrast_slider)
 
         self.widget.setLayout(layout)
@@ -37,22 +39,16 @@ class BrightnessContrastNode(BaseNode):
         proxy = QGraphicsProxyWidget(self)
         proxy.setWidget(self.widget)
 
-        self.original_image = None
-        self.processed_image = None
-
-    def set_input_image(self, image):
-        self.original_image = image.copy()
-        self.process()
-
-    def process(self, _=None):
-        if self.original_image is None:
-            return
-        brightness = self.brightness_slider.value()
-        contrast = self.contrast_slider.value() / 100.0
-        img = self.original_image.astype(np.float32)
-        img = (img - 127.5) * contrast + 127.5 + brightness
-        img = np.clip(img, 0, 255).astype(np.uint8)
-        self.processed_image = img
-
-    def get_output(self):
-        return self.processed_image
+    def on_brightness_change(self, value):
+        self.set_param("brightness", value)
+
+    def on_contrast_change(self, value):
+        self.set_param("contrast", value / 100.0)
+
+    def sync_widgets(self):
+        for slider in (self.brightness_slider, self.contrast_slider):
+            slider.blockSignals(True)
+        self.brightness_slider.setValue(int(self.op.params["brightness"]))
+        self.contrast_slider.setValue(int(round(self.op.params["contrast"] * 100)))
+        for slider in (self.brightness_slider, self.contrast_slider):
+            slider.blockSignals(False)
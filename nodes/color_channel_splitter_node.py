@@ -1,15 +1,15 @@
 from core.node import BaseNode
+from core.operators import ChannelSplitter
+from core import kernels
 from PyQt5.QtWidgets import QComboBox, QVBoxLayout, QLabel, QWidget, QGraphicsProxyWidget
 from PyQt5.QtGui import QColor, QBrush, QPen
 from PyQt5.QtCore import Qt
-import cv2
-import numpy as np
 
 class ColorChannelSplitterNode(BaseNode):
+    op_class = ChannelSplitter
+
     def __init__(self):
         super().__init__("Channel Splitter")
-        self.image = None
-        self.channels = {}
         self.selected_channel = "R"
 
         self.build_ui()
@@ -36,44 +36,20 @@ class ColorChannelSplitterNode(BaseNode):
         proxy = QGraphicsProxyWidget(self)
         proxy.setWidget(widget)
 
-    def set_input_image(self, image):
-        self.image = image
-        self.split_channels()
-
-    def split_channels(self):
-        if self.image is None:
-            return
-
-        if self.image.shape[2] == 4:
-            b, g, r, a = cv2.split(self.image)
-            self.channels = {
-                "R": r,
-                "G": g,
-                "B": b,
-                "A": a
-            }
-            if "A" not in [self.dropdown.itemText(i) for i in range(self.dropdown.count())]:
-                self.dropdown.addItem("A")
-        else:
-            b, g, r = cv2.split(self.image)
-            self.channels = {
-                "R": r,
-                "G": g,
-                "B": b
-            }
+    def set_source_image(self, image):
+        # Called by the editor with the loaded image, to offer its alpha
+        # channel. The split itself happens in the graph.
+        if image is not None and kernels.channel_count(image) == 4 and self.dropdown.findText("A") < 0:
+            self.dropdown.addItem("A")
 
     def on_channel_change(self, channel):
         self.selected_channel = channel
-        self.process()
-        if hasattr(self, "on_output_updated"):
-            self.on_output_updated()
-
-    def process(self):
-        if self.image is not None:
-            self.split_channels()
-
-    def get_output(self):
-        channel_data = self.channels.get(self.selected_channel)
-        if channel_data is not None:
-            return cv2.cvtColor(channel_data, cv2.COLOR_GRAY2BGR)
-        return None
+        self.set_param("channel", channel)
+
+    def sync_widgets(self):
+        self.selected_channel = self.op.params["channel"]
+        if self.dropdown.findText(self.selected_channel) < 0:
+            self.dropdown.addItem(self.selected_channel)
+        self.dropdown.blockSignals(True)
+        self.dropdown.setCurrentText(self.selected_channel)
+        self.dropdown.blockSignals(False)
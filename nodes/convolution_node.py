@@ -0,0 +1,86 @@
+# nodes/convolution_node.py
+
+from PyQt5.QtWidgets import QGraphicsProxyWidget, QVBoxLayout, QWidget, QLabel, QComboBox, QSpinBox, QLineEdit
+from core.node import BaseNode
+from core.operators import Convolution
+from core.kernels import CONVOLUTION_METHODS, CONVOLUTION_PRESETS
+
+def parse_kernel(text):
+    # "1 2 1; 2 4 2; 1 2 1" -> [[1, 2, 1], [2, 4, 2], [1, 2, 1]]
+    rows = [row.replace(",", " ").split() for row in text.split(";") if row.strip()]
+    if not rows or any(len(row) != len(rows[0]) for row in rows):
+        return None
+    try:
+        return [[float(value) for value in row] for row in rows]
+    except ValueError:
+        return None
+
+class ConvolutionNode(BaseNode):
+    op_class = Convolution
+
+    def __init__(self):
+        super().__init__("Convolution")
+        self.widget = QWidget()
+        layout = QVBoxLayout()
+
+        title = QLabel("Convolution Filter")
+        title.setStyleSheet("font-weight: bold;")
+        layout.addWidget(title)
+
+        self.preset_selector = QComboBox()
+        self.preset_selector.addItems(CONVOLUTION_PRESETS)
+        self.preset_selector.currentIndexChanged.connect(self.update_params)
+        layout.addWidget(QLabel("Kernel"))
+        layout.addWidget(self.preset_selector)
+
+        self.size_spin = QSpinBox()
+        self.size_spin.setRange(1, 101)
+        self.size_spin.setSingleStep(2)
+        self.size_spin.setValue(31)
+        self.size_spin.valueChanged.connect(self.update_params)
+        layout.addWidget(QLabel("Size"))
+        layout.addWidget(self.size_spin)
+
+        # Custom kernel rows separated by ';', e.g. "0 -1 0; -1 5 -1; 0 -1 0"
+        self.kernel_edit = QLineEdit()
+        self.kernel_edit.setPlaceholderText("0 -1 0; -1 5 -1; 0 -1 0")
+        self.kernel_edit.editingFinished.connect(self.update_params)
+        layout.addWidget(self.kernel_edit)
+
+        self.method_selector = QComboBox()
+        self.method_selector.addItems(CONVOLUTION_METHODS)
+        self.method_selector.currentIndexChanged.connect(self.update_params)
+        layout.addWidget(QLabel("Method"))
+        layout.addWidget(self.method_selector)
+
+        self.widget.setLayout(layout)
+        self.proxy = QGraphicsProxyWidget(self)
+        self.proxy.setWidget(self.widget)
+        self.update_enabled()
+
+    def update_enabled(self):
+        custom = self.preset_selector.currentText() == "Custom"
+        self.kernel_edit.setEnabled(custom)
+        self.size_spin.setEnabled(not custom)
+
+    def update_params(self):
+        self.update_enabled()
+        kernel = parse_kernel(self.kernel_edit.text())
+        if kernel is not None:
+            self.op.set_param("kernel", kernel)
+        self.op.set_param("preset", self.preset_selector.currentText())
+        self.op.set_param("size", self.size_spin.value())
+        self.set_param("method", self.method_selector.currentText())
+
+    def sync_widgets(self):
+        widgets = (self.preset_selector, self.size_spin, self.kernel_edit, self.method_selector)
+        for widget in widgets:
+            widget.blockSignals(True)
+        self.preset_selector.setCurrentText(self.op.params["preset"])
+        self.size_spin.setValue(int(self.op.params["size"]))
+        kernel = self.op.params["kernel"]
+        self.kernel_edit.setText("; ".join(" ".join(f"{v:g}" for v in row) for row in kernel) if kernel else "")
+        self.method_selector.setCurrentText(self.op.params["method"])
+        for widget in widgets:
+            widget.blockSignals(False)
+        self.update_enabled()
@@ -1,15 +1,14 @@
-import cv2
-import numpy as np
 from PyQt5.QtWidgets import QGraphicsItem, QGraphicsTextItem, QGraphicsProxyWidget, QComboBox, QCheckBox, QSlider, QLabel, QVBoxLayout, QWidget, QSpinBox
 from PyQt5.QtCore import Qt
 from core.node import BaseNode
+from core.operators import EdgeDetection
 
 class EdgeDetectionNode(BaseNode):
+    op_class = EdgeDetection
+
     def __init__(self):
         super().__init__("Edge Detection")
         self.title = "Edge Detection"
-        self.input_image = None
-        self.output_image = None
 
         self.method = 'Sobel'
         self.low_threshold = 50
@@ -78,35 +77,20 @@ class EdgeDetectionNode(BaseNode):
         if self.kernel_size % 2 == 0:
             self.kernel_size += 1  # ensure it's odd
         self.overlay = self.overlay_checkbox.isChecked()
-        self.update_output()
-
-    def set_input_image(self, image):
-        self.input_image = image
-        self.update_output()
-
-    def update_output(self):
-        if self.input_image is None:
-            return
-
-        gray = cv2.cvtColor(self.input_image, cv2.COLOR_BGR2GRAY)
-        edges = None
-
-        if self.method == 'Sobel':
-            sobelx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=self.kernel_size)
-            sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=self.kernel_size)
-            edges = cv2.magnitude(sobelx, sobely)
-            edges = np.uint8(np.clip(edges, 0, 255))
-        elif self.method == 'Canny':
-            edges = cv2.Canny(gray, self.low_threshold, self.high_threshold)
-
-        if self.overlay:
-            edges_colored = cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR)
-            self.output_image = cv2.addWeighted(self.input_image, 0.8, edges_colored, 0.8, 0)
-        else:
-            self.output_image = cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR)
-
-        if hasattr(self, 'on_output_updated'):
-            self.on_output_updated()
-
-    def get_output(self):
-        return self.output_image
+        for key in ("method", "low_threshold", "high_threshold", "kernel_size"):
+            self.op.set_param(key, getattr(self, key))
+        self.set_param("overlay", self.overlay)
+
+    def sync_widgets(self):
+        for key in ("method", "low_threshold", "high_threshold", "kernel_size", "overlay"):
+            setattr(self, key, self.op.params[key])
+        widgets = (self.method_combo, self.low_slider, self.high_slider, self.kernel_spin, self.overlay_checkbox)
+        for widget in widgets:
+            widget.blockSignals(True)
+        self.method_combo.setCurrentText(self.method)
+        self.low_slider.setValue(self.low_threshold)
+        self.high_slider.setValue(self.high_threshold)
+        self.kernel_spin.setValue(self.kernel_size)
+        self.overlay_checkbox.setChecked(self.overlay)
+        for widget in widgets:
+            widget.blockSignals(False)
@@ -0,0 +1,80 @@
+# nodes/generic_node.py
+#
+# Widget for plugin node types that ship none of their own: one control per
+# parameter of the type's schema (see core.registry). Parameters without a
+# fitting control (lists, None) keep their defaults.
+
+from PyQt5.QtWidgets import QGraphicsProxyWidget, QVBoxLayout, QWidget, QLabel, QComboBox, QSpinBox, QDoubleSpinBox, QCheckBox, QLineEdit
+from core.node import BaseNode
+
+SPIN_LIMIT = 1000000
+
+class GenericNode(BaseNode):
+    def __init__(self, spec):
+        self.op_class = spec.op_class
+        super().__init__(spec.label)
+        self.spec = spec
+
+        self.widget = QWidget()
+        layout = QVBoxLayout()
+
+        title = QLabel(spec.label)
+        title.setStyleSheet("font-weight: bold;")
+        layout.addWidget(title)
+
+        # {parameter: (widget, read value, show value)}
+        self.controls = {}
+        for name, schema in spec.params.items():
+            control = self.make_control(schema)
+            if control is None:
+                continue
+            self.controls[name] = control
+            layout.addWidget(QLabel(name.replace("_", " ").capitalize()))
+            layout.addWidget(control[0])
+
+        self.widget.setLayout(layout)
+        self.proxy = QGraphicsProxyWidget(self)
+        self.proxy.setWidget(self.widget)
+        self.sync_widgets()
+
+    def make_control(self, schema):
+        default = schema["default"]
+        if "choices" in schema:
+            choices = list(schema["choices"])
+            widget = QComboBox()
+            widget.addItems([str(choice) for choice in choices])
+            widget.currentIndexChanged.connect(self.update_params)
+            return widget, lambda: choices[widget.currentIndex()], lambda value: widget.setCurrentIndex(choices.index(value))
+        if isinstance(default, bool):
+            widget = QCheckBox()
+            widget.stateChanged.connect(self.update_params)
+            return widget, widget.isChecked, widget.setChecked
+        if isinstance(default, int):
+            widget = QSpinBox()
+            widget.setRange(int(schema.get("min", -SPIN_LIMIT)), int(schema.get("max", SPIN_LIMIT)))
+            widget.valueChanged.connect(self.update_params)
+            return widget, widget.value, lambda value: widget.setValue(int(value))
+        if isinstance(default, float):
+            widget = QDoubleSpinBox()
+            widget.setDecimals(3)
+            widget.setSingleStep(0.1)
+            widget.setRange(float(schema.get("min", -SPIN_LIMIT)), float(schema.get("max", SPIN_LIMIT)))
+            widget.valueChanged.connect(self.update_params)
+            return widget, widget.value, lambda value: widget.setValue(float(value))
+        if isinstance(default, str):
+            widget = QLineEdit()
+            widget.editingFinished.connect(self.update_params)
+            return widget, widget.text, lambda value: widget.setText(str(value))
+        return None
+
+    def update_params(self):
+        for name, (_, read, _) in self.controls.items():
+            self.op.set_param(name, read())
+        if self.on_output_updated:
+            self.on_output_updated()
+
+    def sync_widgets(self):
+        for name, (widget, _, show) in self.controls.items():
+            widget.blockSignals(True)
+            show(self.op.params[name])
+            widget.blockSignals(False)
@@ -1,8 +1,11 @@
 from core.node import BaseNode
-import cv2
-from PyQt5.QtGui import QImage, QPixmap
+from core.operators import ImageSource
+from core.image_io import read_image, image_metadata
+from ui.preview import preview_pixmap
 
 class ImageInputNode(BaseNode):
+    op_class = ImageSource
+
     def __init__(self, path=None):
         super().__init__("Image Input")
         self.image = None
@@ -11,27 +14,17 @@ class ImageInputNode(BaseNode):
             self.load_image(path)
 
     def load_image(self, path):
-        self.image = cv2.imread(path)
-        if self.image is not None:
-            height, width, channels = self.image.shape
-            self.metadata = {
-                "dimensions": (width, height),
-                "channels": channels,
-                "type": str(self.image.dtype)
-            }
+        self.set_image(read_image(path), path)
+
+    def set_image(self, image, path=None):
+        self.image = image
+        self.op.set_image(image, path)
+        self.metadata = image_metadata(image) if image is not None else None
 
-    def process(self, data=None):
-        return self.image
-    
     def get_output(self):
         return self.image
 
-    def get_qpixmap(self):
+    def get_qpixmap(self, size=None):
         if self.image is None:
             return None
-        rgb_image = cv2.cvtColor(self.image, cv2.COLOR_BGR2RGB)
-        height, width, channel = rgb_image.shape
-        bytes_per_line = 3 * width
-        qimage = QImage(rgb_image.data, width, height, bytes_per_line, QImage.Format_RGB888)
-        return QPixmap.fromImage(qimage)
-
+        return preview_pixmap(self.image, size)
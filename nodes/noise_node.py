@@ -0,0 +1,99 @@
+# nodes/noise_node.py
+
+from PyQt5.QtWidgets import QGraphicsProxyWidget, QVBoxLayout, QWidget, QLabel, QComboBox, QSpinBox, QDoubleSpinBox
+from core.node import BaseNode
+from core.operators import Noise
+from core.noise import NOISE_KINDS
+
+class NoiseNode(BaseNode):
+    # In the editor's chain the noise takes the size and depth of the image
+    # before it, so it lines up as a mask for a Blend layer.
+    op_class = Noise
+
+    def __init__(self):
+        super().__init__("Noise")
+
+        self.widget = QWidget()
+        layout = QVBoxLayout()
+
+        title = QLabel("Noise Generation")
+        title.setStyleSheet("font-weight: bold;")
+        layout.addWidget(title)
+
+        self.kind_selector = QComboBox()
+        self.kind_selector.addItems(NOISE_KINDS)
+        self.kind_selector.setCurrentText("Fractal")
+        self.kind_selector.currentIndexChanged.connect(self.update_params)
+        layout.addWidget(QLabel("Type"))
+        layout.addWidget(self.kind_selector)
+
+        self.scale_spin = QDoubleSpinBox()
+        self.scale_spin.setRange(1.0, 4096.0)
+        self.scale_spin.setValue(64.0)
+        self.scale_spin.valueChanged.connect(self.update_params)
+        layout.addWidget(QLabel("Scale (px)"))
+        layout.addWidget(self.scale_spin)
+
+        self.octaves_spin = QSpinBox()
+        self.octaves_spin.setRange(1, 12)
+        self.octaves_spin.setValue(4)
+        self.octaves_spin.valueChanged.connect(self.update_params)
+        layout.addWidget(QLabel("Octaves"))
+        layout.addWidget(self.octaves_spin)
+
+        self.persistence_spin = QDoubleSpinBox()
+        self.persistence_spin.setRange(0.0, 1.0)
+        self.persistence_spin.setSingleStep(0.05)
+        self.persistence_spin.setValue(0.5)
+        self.persistence_spin.valueChanged.connect(self.update_params)
+        layout.addWidget(QLabel("Persistence"))
+        layout.addWidget(self.persistence_spin)
+
+        self.lacunarity_spin = QDoubleSpinBox()
+        self.lacunarity_spin.setRange(1.0, 4.0)
+        self.lacunarity_spin.setSingleStep(0.1)
+        self.lacunarity_spin.setValue(2.0)
+        self.lacunarity_spin.valueChanged.connect(self.update_params)
+        layout.addWidget(QLabel("Lacunarity"))
+        layout.addWidget(self.lacunarity_spin)
+
+        self.seed_spin = QSpinBox()
+        self.seed_spin.setRange(0, 2**31 - 1)
+        self.seed_spin.valueChanged.connect(self.update_params)
+        layout.addWidget(QLabel("Seed"))
+        layout.addWidget(self.seed_spin)
+
+        self.widget.setLayout(layout)
+        self.proxy = QGraphicsProxyWidget(self)
+        self.proxy.setWidget(self.widget)
+        self.update_enabled()
+
+    def update_enabled(self):
+        fractal = self.kind_selector.currentText() == "Fractal"
+        for widget in (self.octaves_spin, self.persistence_spin, self.lacunarity_spin):
+            widget.setEnabled(fractal)
+        self.scale_spin.setEnabled(self.kind_selector.currentText() != "White")
+
+    def update_params(self):
+        self.update_enabled()
+        self.op.set_param("kind", self.kind_selector.currentText())
+        self.op.set_param("scale", self.scale_spin.value())
+        self.op.set_param("octaves", self.octaves_spin.value())
+        self.op.set_param("persistence", self.persistence_spin.value())
+        self.op.set_param("lacunarity", self.lacunarity_spin.value())
+        self.set_param("seed", self.seed_spin.value())
+
+    def sync_widgets(self):
+        widgets = (self.kind_selector, self.scale_spin, self.octaves_spin,
+                   self.persistence_spin, self.lacunarity_spin, self.seed_spin)
+        for widget in widgets:
+            widget.blockSignals(True)
+        self.kind_selector.setCurrentText(self.op.params["kind"])
+        self.scale_spin.setValue(float(self.op.params["scale"]))
+        self.octaves_spin.setValue(int(self.op.params["octaves"]))
+        self.persistence_spin.setValue(float(self.op.params["persistence"]))
+        self.lacunarity_spin.setValue(float(self.op.params["lacunarity"]))
+        self.seed_spin.setValue(int(self.op.params["seed"]))
+        for widget in widgets:
+            widget.blockSignals(False)
+        self.update_enabled()
@@ -1,7 +1,10 @@
 from core.node import BaseNode
-import cv2
+from core.operators import ImageSink
+from core.image_io import write_image
 
 class OutputNode(BaseNode):
+    op_class = ImageSink
+
     def __init__(self):
         super().__init__("Output")
         self.image = None
@@ -14,4 +17,4 @@ class OutputNode(BaseNode):
 
     def save_image(self, filename, format="PNG"):
         if self.image is not None:
-            cv2.imwrite(filename, self.image)
+            write_image(filename, self.image)
@@ -0,0 +1,86 @@
+# nodes/threshold_node.py
+
+from PyQt5.QtWidgets import QGraphicsProxyWidget, QVBoxLayout, QWidget, QLabel, QComboBox, QSlider, QSpinBox, QCheckBox
+from PyQt5.QtCore import Qt
+from core.node import BaseNode
+from core.operators import Threshold
+from core.kernels import ADAPTIVE_MAX_BLOCK, THRESHOLD_METHODS
+
+class ThresholdNode(BaseNode):
+    op_class = Threshold
+
+    def __init__(self):
+        super().__init__("Threshold")
+        self.widget = QWidget()
+        layout = QVBoxLayout()
+
+        title = QLabel("Threshold")
+        title.setStyleSheet("font-weight: bold;")
+        layout.addWidget(title)
+
+        self.method_selector = QComboBox()
+        self.method_selector.addItems(THRESHOLD_METHODS)
+        self.method_selector.currentIndexChanged.connect(self.update_params)
+        layout.addWidget(QLabel("Method"))
+        layout.addWidget(self.method_selector)
+
+        self.threshold_slider = QSlider(Qt.Horizontal)
+        self.threshold_slider.setRange(0, 255)
+        self.threshold_slider.setValue(127)
+        self.threshold_slider.valueChanged.connect(self.update_params)
+        self.threshold_label = QLabel("Threshold: 127")
+        layout.addWidget(self.threshold_label)
+        layout.addWidget(self.threshold_slider)
+
+        self.block_spin = QSpinBox()
+        self.block_spin.setRange(3, ADAPTIVE_MAX_BLOCK)
+        self.block_spin.setSingleStep(2)
+        self.block_spin.setValue(11)
+        self.block_spin.valueChanged.connect(self.update_params)
+        layout.addWidget(QLabel("Block Size"))
+        layout.addWidget(self.block_spin)
+
+        self.c_spin = QSpinBox()
+        self.c_spin.setRange(-50, 50)
+        self.c_spin.setValue(2)
+        self.c_spin.valueChanged.connect(self.update_params)
+        layout.addWidget(QLabel("C"))
+        layout.addWidget(self.c_spin)
+
+        self.invert_checkbox = QCheckBox("Invert")
+        self.invert_checkbox.stateChanged.connect(self.update_params)
+        layout.addWidget(self.invert_checkbox)
+
+        self.widget.setLayout(layout)
+        self.proxy = QGraphicsProxyWidget(self)
+        self.proxy.setWidget(self.widget)
+        self.update_enabled()
+
+    def update_enabled(self):
+        method = self.method_selector.currentText()
+        self.threshold_slider.setEnabled(method == "Binary")
+        self.block_spin.setEnabled(method == "Adaptive")
+        self.c_spin.setEnabled(method == "Adaptive")
+
+    def update_params(self):
+        self.update_enabled()
+        self.threshold_label.setText(f"Threshold: {self.threshold_slider.value()}")
+        self.op.set_param("method", self.method_selector.currentText())
+        self.op.set_param("threshold", self.threshold_slider.value())
+        self.op.set_param("block_size", self.block_spin.value() | 1)
+        self.op.set_param("c", self.c_spin.value())
+        self.set_param("invert", self.invert_checkbox.isChecked())
+
+    def sync_widgets(self):
+        widgets = (self.method_selector, self.threshold_slider, self.block_spin, self.c_spin, self.invert_checkbox)
+        for widget in widgets:
+            widget.blockSignals(True)
+        self.method_selector.setCurrentText(self.op.params["method"])
+        self.threshold_slider.setValue(int(self.op.params["threshold"]))
+        self.threshold_label.setText(f"Threshold: {self.threshold_slider.value()}")
+        self.block_spin.setValue(int(self.op.params["block_size"]))
+        self.c_spin.setValue(int(self.op.params["c"]))
+        self.invert_checkbox.setChecked(bool(self.op.params["invert"]))
+        for widget in widgets:
+            widget.blockSignals(False)
+        self.update_enabled()
@@ -0,0 +1,24 @@
+# tests/conftest.py
+
+import pytest
+
+from core.graph import Graph
+from core.operators import ImageSink, ImageSource
+
+
+def build_chain(image, nodes, path=None, **options):
+    # ImageInput -> nodes -> Output; options go to Graph. A chain has no
+    # independent branches, so it is evaluated on one thread.
+    options.setdefault("workers", 1)
+    graph = Graph(**options)
+    source = graph.add_node(ImageSource(image, path=path))
+    chain = [source] + [graph.add_node(node) for node in nodes]
+    sink = graph.add_node(ImageSink())
+    for src, dst in zip(chain, chain[1:] + [sink]):
+        graph.connect(src, dst)
+    return graph, source, sink
+
+
+@pytest.fixture
+def build():
+    return build_chain
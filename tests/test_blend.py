@@ -0,0 +1,81 @@
+# tests/test_blend.py
+
+import numpy as np
+import pytest
+
+from core import kernels
+from core.graph import Graph, GraphError
+from core.operators import Blend, ImageSink, ImageSource
+
+OPACITIES = (1.0, 0.4, 0.75)
+
+
+def images(shape, count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, shape, dtype=np.uint8) for _ in range(count)]
+
+
+@pytest.mark.parametrize("mode", kernels.BLEND_MODES)
+@pytest.mark.parametrize("shape", [(37, 53), (37, 53, 3), (64, 64, 4)])
+def test_fused_uint8_blend_matches_pairwise_chain(monkeypatch, mode, shape):
+    # A small strip makes the pass cross several strip boundaries.
+    monkeypatch.setattr(kernels, "BLEND_STRIP", 1000)
+    base, *layers = images(shape, 4)
+    layers = [(layer, mode, opacity) for layer, opacity in zip(layers, OPACITIES)]
+    chained = base
+    for layer in layers:
+        chained = kernels.blend(chained, [layer])
+    fused = kernels.blend(base, layers)
+    assert fused.dtype == np.uint8 and np.array_equal(fused, chained)
+
+
+def test_mixed_modes_match_pairwise_chain():
+    base, *layers = images((50, 70, 3), 6, seed=1)
+    layers = [(layer, mode, 0.6) for layer, mode in zip(layers, kernels.BLEND_MODES)]
+    chained = base
+    for layer in layers:
+        chained = kernels.blend(chained, [layer])
+    assert np.array_equal(kernels.blend(base, layers), chained)
+
+
+def test_blend_node_matches_chain_of_nodes():
+    base, *layers = images((40, 60, 3), 3, seed=2)
+    params = [{"mode": "Screen", "opacity": 0.3}, {"mode": "Overlay", "opacity": 1.0}]
+    graph = Graph(workers=1)
+    sources = [graph.add_node(ImageSource(image)) for image in (base, *layers)]
+    single = graph.add_node(Blend(layers=params))
+    first, second = graph.add_node(Blend(layers=params[:1])), graph.add_node(Blend(layers=params[1:]))
+    sinks = [graph.add_node(ImageSink()) for _ in range(2)]
+    graph.connect(sources[0], single)
+    graph.connect(sources[1], single, dst_port="layer1")
+    graph.connect(sources[2], single, dst_port="layer2")
+    graph.connect(sources[0], first)
+    graph.connect(sources[1], first, dst_port="layer1")
+    graph.connect(first, second)
+    graph.connect(sources[2], second, dst_port="layer1")
+    graph.connect(single, sinks[0])
+    graph.connect(second, sinks[1])
+    results = graph.evaluate(sinks)
+    assert np.array_equal(results[sinks[0]]["image"], results[sinks[1]]["image"])
+
+
+def test_set_param_rejects_unknown_mode():
+    blend = Blend()
+    with pytest.raises(GraphError, match="Darken"):
+        blend.set_param("layers", [{"mode": "Normal", "opacity": 1.0}, {"mode": "Darken", "opacity": 0.5}])
+    assert blend.params["layers"] == Blend.defaults["layers"]
+    assert [port.name for port in blend.inputs] == ["image", "layer1"]
+    with pytest.raises(GraphError):
+        Blend(layers=[{"mode": "multiply", "opacity": 1.0}])
+
+
+def test_set_param_updates_layer_ports():
+    blend = Blend()
+    blend.set_param("layers", [{"mode": mode, "opacity": 0.5} for mode in kernels.BLEND_MODES])
+    assert [port.name for port in blend.inputs] == ["image"] + [f"layer{i}" for i in range(1, 6)]
+
+
+def test_kernel_rejects_unknown_mode():
+    base, layer = images((8, 8), 2)
+    with pytest.raises(ValueError):
+        kernels.blend(base, [(layer, "Darken", 1.0)])
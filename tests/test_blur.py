@@ -0,0 +1,55 @@
+# tests/test_blur.py
+#
+# Checks the accuracy bound documented with the blur engines in core.kernels.
+
+import cv2
+import numpy as np
+import pytest
+
+from core import kernels
+
+L1_BOUND = {"Box": 0.08, "Pyramid": 0.10}  # per axis
+DIRECTIONS = ("Uniform", "Horizontal", "Vertical")
+
+
+def exact_gaussian(image, sigma, direction):
+    taps = cv2.getGaussianKernel(2 * int(np.ceil(5 * sigma)) + 1, sigma)
+    identity = np.ones((1, 1))
+    kx = identity if direction == "Vertical" else taps
+    ky = identity if direction == "Horizontal" else taps
+    return cv2.sepFilter2D(image.astype(np.float64), cv2.CV_64F, kx, ky, borderType=cv2.BORDER_REFLECT_101)
+
+
+def bound(engine, direction):
+    # The L1 difference of two separable kernels is at most the sum of the
+    # per-axis differences.
+    return L1_BOUND[engine] * (2 if direction == "Uniform" else 1)
+
+
+@pytest.mark.parametrize("engine", L1_BOUND)
+@pytest.mark.parametrize("radius", [1, 3, 5, 14, 40, 120])
+@pytest.mark.parametrize("direction", DIRECTIONS)
+def test_kernel_within_documented_l1_bound(engine, radius, direction):
+    _, _, sigma = kernels.blur_plan(radius, engine)
+    size = 2 * int(np.ceil(6 * sigma)) + 41
+    blur = kernels.box_blur if engine == "Box" else kernels.pyramid_blur
+    # The pyramid's response depends on the impulse's place on the coarse grid.
+    for offset in range(0, 2 * max(int(sigma / kernels.PYRAMID_TARGET_SIGMA), 1), 3):
+        impulse = np.zeros((size, size), np.float32)
+        impulse[size // 2 + offset, size // 2 + offset // 2] = 1.0
+        response = blur(impulse, sigma, direction)
+        assert np.abs(response - exact_gaussian(impulse, sigma, direction)).sum() <= bound(engine, direction)
+
+
+@pytest.mark.parametrize("engine", L1_BOUND)
+@pytest.mark.parametrize("radius", [3, 14, 40, 120])
+@pytest.mark.parametrize("direction", DIRECTIONS)
+def test_output_error_within_documented_bound(engine, radius, direction):
+    # Noise is the worst case for a blur; the error may not exceed half the
+    # kernel's L1 difference times the value range, plus rounding.
+    image = np.random.default_rng(radius).integers(0, 256, (240, 320), dtype=np.uint8)
+    _, _, sigma = kernels.blur_plan(radius, engine)
+    result = kernels.gaussian_blur(image, radius, direction, engine)
+    assert result.dtype == np.uint8
+    error = np.abs(result - exact_gaussian(image, sigma, direction)).max()
+    assert error <= 0.5 * bound(engine, direction) * 255 + 1
@@ -0,0 +1,80 @@
+# tests/test_buffers.py
+
+import numpy as np
+
+from core.buffers import BufferPool
+from core.graph import EvalContext, Graph
+from core.operators import Blur, ImageSink, ImageSource
+from core.profiling import Profiler
+
+
+def test_released_buffer_is_reused():
+    pool = BufferPool()
+    first = pool.take((8, 8), np.uint8)
+    first_id = id(first)
+    del first
+    assert id(pool.take((8, 8), np.uint8)) == first_id
+    assert pool.hits == 1
+
+
+def test_referenced_buffers_are_not_reused():
+    pool = BufferPool()
+    held = pool.take((8, 8), np.uint8)
+    view = pool.take((4, 4), np.float32)[1:3]
+    assert pool.take((8, 8), np.uint8) is not held
+    assert pool.take((4, 4), np.float32).base is not view.base
+    assert pool.hits == 0
+
+
+def test_shape_and_dtype_must_match():
+    pool = BufferPool()
+    pool.take((8, 8), np.uint8)
+    pool.take((8, 8), np.uint16)
+    pool.take((8, 9), np.uint8)
+    assert pool.hits == 0 and pool.misses == 3
+
+
+def test_only_misses_count_as_allocated():
+    pool = BufferPool()
+    pool.take((8, 8), np.uint8)
+    assert pool.allocated() == 64
+    pool.take((8, 8), np.uint8)
+    assert pool.allocated() == 64 and pool.hits == 1
+    pool.take((4,), np.float64)
+    assert pool.allocated() == 96
+
+
+def test_budget_drops_oldest_buffers():
+    pool = BufferPool(budget=1000)
+    held = [pool.take((400,), np.uint8) for _ in range(3)]
+    assert pool.nbytes == 800
+    assert all(buffer is not held[0] for buffer in pool.buffers)
+
+
+def test_cached_results_survive_pooled_renders():
+    image = np.random.default_rng(0).integers(0, 256, (50, 70, 3), dtype=np.uint8)
+    graph = Graph(workers=1)
+    source = graph.add_node(ImageSource(image))
+    blur = graph.add_node(Blur(radius=3))
+    sink = graph.add_node(ImageSink())
+    graph.connect(source, blur)
+    graph.connect(blur, sink)
+    pool = BufferPool()
+    first = graph.evaluate([sink], EvalContext(pool=pool))[sink]["image"]
+    kept = first.copy()
+    blur.set_param("radius", 7)
+    second = graph.evaluate([sink], EvalContext(pool=pool))[sink]["image"]
+    assert np.array_equal(first, kept)
+    assert second is not first
+
+
+def test_profiler_counts_pool_misses_only(build):
+    image = np.random.default_rng(1).integers(0, 256, (50, 70, 3), dtype=np.uint8)
+    blur = Blur(radius=3)
+    graph, _, sink = build(image, [blur], use_cache=False)
+    pool, profiler = BufferPool(), Profiler()
+    allocated = []
+    for _ in range(2):
+        graph.evaluate([sink], EvalContext(pool=pool, profiler=profiler))
+        allocated.append(profiler.last[blur]["args"]["bytes_allocated"])
+    assert allocated == [image.nbytes, 0]
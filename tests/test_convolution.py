@@ -0,0 +1,74 @@
+# tests/test_convolution.py
+
+import numpy as np
+import pytest
+
+from core import kernels
+from core.operators import Convolution
+
+rng = np.random.default_rng(0)
+
+KERNELS = {
+    "gaussian": kernels.preset_kernel("Gaussian", 9),
+    "disk": kernels.preset_kernel("Disk", 11),
+    "rank1-asymmetric": np.outer([1.0, 2.0, 4.0, 1.0, 0.5], [0.2, -1.0, 0.7, 0.1, 0.3]).astype(np.float32),
+    "full-asymmetric": rng.normal(size=(9, 9)).astype(np.float32) / 9,
+    "even-rank1": np.outer([1.0, 3.0], [0.25, 0.5, 0.125, 0.125]).astype(np.float32),
+    "even-full": rng.normal(size=(4, 6)).astype(np.float32) / 6,
+}
+
+
+def reference(image, kernel):
+    # Flipped convolution around the odd-padded kernel's centre, reflected borders.
+    kernel = kernels.odd_kernel(kernel).astype(np.float64)
+    rows, cols = kernel.shape
+    padded = np.pad(image.astype(np.float64), ((rows // 2,) * 2, (cols // 2,) * 2), mode="reflect")
+    height, width = image.shape
+    result = np.zeros((height, width))
+    for dy in range(rows):
+        for dx in range(cols):
+            result += kernel[rows - 1 - dy, cols - 1 - dx] * padded[dy:dy + height, dx:dx + width]
+    return np.clip(np.rint(result), 0, 255)
+
+
+@pytest.mark.parametrize("name", KERNELS)
+@pytest.mark.parametrize("channels", [1, 3])
+def test_methods_agree(name, channels):
+    shape = (70, 90) if channels == 1 else (70, 90, channels)
+    image = np.random.default_rng(1).integers(0, 256, shape, dtype=np.uint8)
+    results = {method: kernels.convolve(image, KERNELS[name], method).astype(np.int16)
+               for method in ("Direct", "Separable", "FFT")}
+    for method in ("Separable", "FFT"):
+        assert np.abs(results[method] - results["Direct"]).max() <= 1, method
+    plane = image if channels == 1 else image[:, :, 1]
+    direct = results["Direct"] if channels == 1 else results["Direct"][:, :, 1]
+    assert np.abs(direct - reference(plane, KERNELS[name])).max() <= 1
+
+
+def test_auto_picks_separable_for_rank_one():
+    assert kernels.convolution_method(KERNELS["gaussian"])[0] == "Separable"
+    assert kernels.convolution_method(kernels.odd_kernel(KERNELS["rank1-asymmetric"]))[0] == "Separable"
+
+
+def test_auto_picks_fft_for_large_full_rank():
+    kernel = np.random.default_rng(2).normal(size=(15, 15)).astype(np.float32)
+    assert kernels.convolution_method(kernel)[0] == "FFT"
+    assert kernels.convolution_method(kernel[:3, :3])[0] == "Direct"
+
+
+def test_repeated_evaluation_reuses_spectrum(build):
+    kernel = np.random.default_rng(3).normal(size=(15, 15)).tolist()
+    image = np.random.default_rng(4).integers(0, 256, (80, 100), dtype=np.uint8)
+    convolution = Convolution(preset="Custom", kernel=kernel, method="FFT")
+    graph, source, sink = build(image, [convolution])
+
+    def spectra():
+        return [value for key, value in kernels._kernel_cache.items() if key[0] == "dft"]
+
+    kernels._kernel_cache.clear()
+    graph.evaluate([sink])
+    first = spectra()
+    source.set_image(255 - image)
+    graph.evaluate([sink])
+    assert convolution in graph.last_computed
+    assert len(first) == 1 and len(spectra()) == 1 and spectra()[0] is first[0]
@@ -0,0 +1,74 @@
+# tests/test_disk_cache.py
+
+import numpy as np
+import pytest
+
+from core.disk_cache import DiskCache
+from core.graph import EvalContext
+from core.operators import Blur, EdgeDetection
+
+
+@pytest.fixture
+def blur_edges(build):
+    # image -> Blur -> EdgeDetection -> Output; returns graph, blur, edges, sink.
+    def make(image, path=None):
+        blur, edges = Blur(radius=6), EdgeDetection()
+        graph, _, sink = build(image, [blur, edges], path=path)
+        return graph, blur, edges, sink
+    return make
+
+
+def evaluate(graph, sink, cache):
+    return graph.evaluate([sink], EvalContext(disk_cache=cache))[sink]["image"]
+
+
+def test_new_session_is_served_from_disk(tmp_path, blur_edges):
+    image = np.random.default_rng(0).integers(0, 256, (60, 80, 3), dtype=np.uint8)
+    cache = DiskCache(str(tmp_path), min_seconds=0)
+    graph, _, _, sink = blur_edges(image)
+    expected = evaluate(graph, sink, cache)
+
+    graph, blur, edges, sink = blur_edges(image.copy())
+    reopened = DiskCache(str(tmp_path), min_seconds=0)
+    assert np.array_equal(evaluate(graph, sink, reopened), expected)
+    assert blur not in graph.last_computed and edges not in graph.last_computed
+    assert reopened.hits > 0
+
+
+def test_parameter_change_recomputes_from_that_node(tmp_path, blur_edges):
+    image = np.random.default_rng(1).integers(0, 256, (60, 80), dtype=np.uint8)
+    cache = DiskCache(str(tmp_path), min_seconds=0)
+    graph, _, _, sink = blur_edges(image)
+    evaluate(graph, sink, cache)
+
+    graph, blur, edges, sink = blur_edges(image)
+    edges.set_param("method", "Canny")
+    result = evaluate(graph, sink, cache)
+    assert blur not in graph.last_computed and edges in graph.last_computed
+    fresh, _, fresh_edges, fresh_sink = blur_edges(image)
+    fresh_edges.set_param("method", "Canny")
+    assert np.array_equal(result, fresh.evaluate([fresh_sink])[fresh_sink]["image"])
+
+
+def test_source_file_content_is_part_of_the_key(tmp_path, blur_edges):
+    path = tmp_path / "scan.raw"
+    path.write_bytes(b"first")
+    image = np.zeros((30, 40), np.uint8)
+    cache = DiskCache(str(tmp_path / "cache"), min_seconds=0)
+    graph, _, _, sink = blur_edges(image, str(path))
+    evaluate(graph, sink, cache)
+
+    path.write_bytes(b"second")
+    graph, blur, _, sink = blur_edges(image, str(path))
+    evaluate(graph, sink, cache)
+    assert blur in graph.last_computed
+
+
+def test_budget_evicts_least_recently_used(tmp_path, blur_edges):
+    image = np.random.default_rng(2).integers(0, 256, (100, 100), dtype=np.uint8)
+    cache = DiskCache(str(tmp_path), budget=25000, min_seconds=0)
+    for seed in range(5):
+        graph, _, _, sink = blur_edges(np.roll(image, seed))
+        evaluate(graph, sink, cache)
+    on_disk = sum(entry.stat().st_size for entry in tmp_path.iterdir() if entry.name.endswith(".npy"))
+    assert on_disk == cache.nbytes <= 25000
@@ -0,0 +1,31 @@
+# tests/test_editor_startup.py
+#
+# Runs in a fresh interpreter, since the test process has OpenCV loaded.
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("PyQt5.QtWidgets")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = """
+import sys
+from PyQt5.QtWidgets import QApplication
+app = QApplication([])
+import ui.node_editor
+loaded = ["cv2" in sys.modules]
+editor = ui.node_editor.NodeEditor()
+loaded.append("cv2" in sys.modules)
+print(loaded)
+"""
+
+
+def test_editor_starts_without_opencv():
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, "-c", SCRIPT], cwd=ROOT, env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[False, False]"
@@ -0,0 +1,47 @@
+# tests/test_image_io.py
+
+import io
+
+import cv2
+import numpy as np
+import pytest
+
+from core.image_io import DecodeCache, decode_image, exif_orientation, read_image
+
+
+def exif_segment(orientation, order):
+    # APP1 segment holding a one-entry IFD with the orientation tag.
+    endian = "little" if order == b"II" else "big"
+    tiff = order + (42).to_bytes(2, endian) + (8).to_bytes(4, endian) + (1).to_bytes(2, endian)
+    tiff += (0x0112).to_bytes(2, endian) + (3).to_bytes(2, endian) + (1).to_bytes(4, endian)
+    tiff += orientation.to_bytes(2, endian) + b"\0\0" + (0).to_bytes(4, endian)
+    payload = b"Exif\0\0" + tiff
+    return b"\xff\xe1" + (len(payload) + 2).to_bytes(2, "big") + payload
+
+
+@pytest.fixture(scope="module")
+def jpeg():
+    image = np.random.default_rng(0).integers(0, 256, (60, 90, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", cv2.GaussianBlur(image, (0, 0), 3))[1].tobytes()
+
+
+@pytest.mark.parametrize("order", [b"II", b"MM"])
+@pytest.mark.parametrize("orientation", range(1, 9))
+def test_exif_orientation_matches_opencv(tmp_path, jpeg, order, orientation):
+    data = jpeg[:2] + exif_segment(orientation, order) + jpeg[2:]
+    path = str(tmp_path / "photo.jpg")
+    with open(path, "wb") as f:
+        f.write(data)
+    upright = cv2.imread(path)  # IMREAD_COLOR applies the orientation itself
+    assert exif_orientation(io.BytesIO(data)) == orientation
+    assert np.array_equal(read_image(path), upright)
+    assert np.array_equal(read_image(path, DecodeCache()), upright)
+    assert np.array_equal(decode_image(data), upright)
+
+
+def test_unchanged_formats_keep_alpha_and_depth(tmp_path):
+    image = np.random.default_rng(1).integers(0, 65536, (20, 30, 4), dtype=np.uint16)
+    for name in ("image.png", "image.tif"):
+        path = str(tmp_path / name)
+        cv2.imwrite(path, image)
+        assert np.array_equal(read_image(path), image)
@@ -0,0 +1,63 @@
+# tests/test_parallel.py
+
+import threading
+
+import cv2
+import numpy as np
+
+from core import graph as graph_module
+from core.graph import Graph
+from core.operators import Blend, Blur, ImageSink, ImageSource
+
+
+def test_overlapping_evaluations_share_and_restore_opencv_threads():
+    original = cv2.getNumThreads()
+    graph_module._share_cv_threads(4)
+    graph_module._share_cv_threads(2)
+    graph_module._share_cv_threads(3)
+    assert cv2.getNumThreads() == 2
+    graph_module._release_cv_threads()
+    graph_module._release_cv_threads()
+    assert cv2.getNumThreads() == 2
+    graph_module._release_cv_threads()
+    assert cv2.getNumThreads() == original
+
+
+def branching_graph(image, width):
+    # width independent blurs blended together, so evaluate_parallel runs
+    # with width threads.
+    graph = Graph(workers=width)
+    source = graph.add_node(ImageSource(image))
+    blurs = [graph.add_node(Blur(radius=3 + 2 * index)) for index in range(width)]
+    blend = graph.add_node(Blend(layers=[{"mode": "Screen", "opacity": 0.5}] * (width - 1)))
+    sink = graph.add_node(ImageSink())
+    for index, blur in enumerate(blurs):
+        graph.connect(source, blur)
+        graph.connect(blur, blend, dst_port=f"layer{index}" if index else "image")
+    graph.connect(blend, sink)
+    return graph, sink
+
+
+def test_concurrent_parallel_evaluations_restore_opencv_threads(monkeypatch):
+    # Each width gets a different share of 16 cores.
+    monkeypatch.setattr(graph_module.os, "cpu_count", lambda: 16)
+    original = cv2.getNumThreads()
+    image = np.random.default_rng(0).integers(0, 256, (200, 300, 3), dtype=np.uint8)
+    errors = []
+
+    def render(width):
+        # Different widths ask OpenCV for different thread counts.
+        try:
+            for _ in range(20):
+                graph, sink = branching_graph(image, width)
+                graph.evaluate([sink])
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=render, args=(width,)) for width in (2, 3, 4, 5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert cv2.getNumThreads() == original
@@ -0,0 +1,111 @@
+# tests/test_server.py
+#
+# Drives a RenderServer on a background loop through the blocking client.
+
+import json
+import logging
+from http import HTTPStatus
+from http.client import HTTPConnection
+
+import numpy as np
+import pytest
+
+from core.graph import Graph
+from core.image_io import decode_image, encode_image
+from core.operators import BrightnessContrast, Grayscale, ImageSink, ImageSource
+from core.pipeline import CompiledPipeline
+from core.serialization import graph_from_dict, graph_to_dict
+from core.server import HOST, HTTPError, RenderServer, render
+
+
+def make_graph():
+    graph = Graph()
+    source = graph.add_node(ImageSource())
+    adjust = graph.add_node(BrightnessContrast(brightness=20, contrast=1.5))
+    gray = graph.add_node(Grayscale())
+    sink = graph.add_node(ImageSink())
+    for src, dst in ((source, adjust), (adjust, gray), (gray, sink)):
+        graph.connect(src, dst)
+    return graph_to_dict(graph)
+
+
+def make_image(seed):
+    return np.random.default_rng(seed).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+
+
+@pytest.fixture
+def server():
+    server = RenderServer(port=0, workers=2).start_thread()
+    yield server
+    server.stop_thread()
+
+
+def get_json(server, path):
+    conn = HTTPConnection(HOST, server.port)
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def test_render_matches_local_pipeline(server):
+    graph_data = make_graph()
+    images = [make_image(seed) for seed in range(3)]
+    outputs = render(graph_data, [encode_image(".png", image) for image in images], port=server.port)
+
+    pipeline = CompiledPipeline(graph_from_dict(graph_data))
+    assert len(outputs) == len(images)
+    for image, data in zip(images, outputs):
+        assert np.array_equal(decode_image(data), pipeline.run(image))
+
+
+def test_keep_alive_connection_serves_several_requests(server):
+    graph_data = make_graph()
+    conn = HTTPConnection(HOST, server.port)
+    try:
+        for seed in range(3):
+            [data] = render(graph_data, [encode_image(".png", make_image(seed))], connection=conn)
+            assert decode_image(data).shape == (48, 64)
+    finally:
+        conn.close()
+    status, metrics = get_json(server, "/metrics")
+    assert status == HTTPStatus.OK
+    assert metrics["requests"]["completed"] == 3
+    assert metrics["pipelines"]["compiles"] + metrics["pipelines"]["hits"] >= 1
+
+
+def test_bad_requests_get_client_errors(server):
+    image = encode_image(".png", make_image(0))
+    with pytest.raises(HTTPError) as exc:
+        render({"format": "node-graph", "version": 1, "nodes": [{"id": 0, "type": "Nope"}], "edges": []},
+               [image], port=server.port)
+    assert exc.value.status == HTTPStatus.BAD_REQUEST
+    with pytest.raises(HTTPError) as exc:
+        render(make_graph(), [image], port=server.port, extension=".xyz")
+    assert exc.value.status == HTTPStatus.BAD_REQUEST
+    assert get_json(server, "/nowhere")[0] == HTTPStatus.NOT_FOUND
+    assert get_json(server, "/health") == (HTTPStatus.OK, {"status": "ok"})
+
+
+def test_full_queue_answers_503():
+    server = RenderServer(port=0, workers=1, queue_limit=0).start_thread()
+    try:
+        with pytest.raises(HTTPError) as exc:
+            render(make_graph(), [encode_image(".png", make_image(0))], port=server.port)
+        assert exc.value.status == HTTPStatus.SERVICE_UNAVAILABLE
+        assert get_json(server, "/metrics")[1]["requests"]["rejected"] == 1
+    finally:
+        server.stop_thread()
+
+
+def test_stop_with_open_connection_logs_nothing(caplog):
+    server = RenderServer(port=0, workers=1).start_thread()
+    conn = HTTPConnection(HOST, server.port)
+    conn.request("GET", "/health")
+    conn.getresponse().read()
+    with caplog.at_level(logging.ERROR, logger="asyncio"):
+        server.stop_thread()
+    conn.close()
+    assert not [record for record in caplog.records if record.name == "asyncio"]
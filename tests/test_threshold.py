@@ -0,0 +1,68 @@
+# tests/test_threshold.py
+
+import cv2
+import numpy as np
+import pytest
+
+from core import kernels
+from core.operators import Threshold
+
+
+def smooth_gray(seed, shape=(120, 160)):
+    noise = np.random.default_rng(seed).integers(0, 256, shape, dtype=np.uint8)
+    return cv2.normalize(cv2.GaussianBlur(noise, (0, 0), 3), None, 0, 255, cv2.NORM_MINMAX)
+
+
+def bimodal_gray(seed, shape=(120, 160)):
+    rng = np.random.default_rng(seed)
+    values = np.where(rng.random(shape) < 0.3, rng.normal(60, 20, shape), rng.normal(170, 30, shape))
+    return np.clip(values, 0, 255).astype(np.uint8)
+
+
+@pytest.mark.parametrize("gray", [smooth_gray(0), bimodal_gray(1), bimodal_gray(2)[:7, :5], np.full((8, 8), 77, np.uint8)])
+def test_otsu_matches_opencv(build, gray):
+    expected, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    assert kernels.otsu_threshold(kernels.histogram(gray)) == int(expected)
+    threshold = Threshold(method="Otsu")
+    graph, _, sink = build(gray, [threshold])
+    assert np.array_equal(graph.evaluate([sink])[sink]["image"], mask)
+    assert threshold.otsu_value == int(expected)
+
+
+@pytest.mark.parametrize("block_size, c", [(3, 0), (11, 2), (25, -3), (51, 5)])
+@pytest.mark.parametrize("invert", [False, True])
+def test_adaptive_deep_input_matches_opencv_on_uint8(block_size, c, invert):
+    gray = smooth_gray(3)
+    mode = cv2.THRESH_BINARY_INV if invert else cv2.THRESH_BINARY
+    expected = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, mode, block_size, c) > 0
+    # OpenCV rounds the block mean to 8 bits first, which can only decide
+    # pixels within half a level of the cut.
+    mean = cv2.blur(gray.astype(np.float64), (block_size, block_size), borderType=cv2.BORDER_REPLICATE)
+    tie = np.abs(gray.astype(np.float64) + c - mean) <= 0.5
+    for image in (gray.astype(np.uint16) * 257, gray.astype(np.float32) / 255):
+        mask = kernels.adaptive_threshold(image, None, block_size, c, invert)
+        assert mask.dtype == image.dtype and mask.max() == kernels.value_max(image.dtype)
+        differs = (mask > 0) != expected
+        assert not np.any(differs & ~tie)
+
+
+@pytest.mark.parametrize("method, param, value", [("Adaptive", "c", 6), ("Adaptive", "block_size", 31),
+                                                  ("Binary", "threshold", 40), ("Otsu", "invert", True)])
+def test_parameter_change_reuses_analysis(monkeypatch, build, method, param, value):
+    image = smooth_gray(4).astype(np.uint16) * 257
+    threshold = Threshold(method=method)
+    graph, _, sink = build(image, [threshold])
+    first = graph.evaluate([sink])[sink]["image"]
+    (data,) = [entry[1] for entry in threshold.analysis.values()]
+    cached = dict(data)
+
+    def recomputed(*args):
+        raise AssertionError("input analysis was recomputed")
+
+    for name in ("grayscale", "histogram", "adaptive_integral"):
+        monkeypatch.setattr(kernels, name, recomputed)
+    threshold.set_param(param, value)
+    second = graph.evaluate([sink])[sink]["image"]
+    assert threshold in graph.last_computed and not np.array_equal(first, second)
+    (after,) = [entry[1] for entry in threshold.analysis.values()]
+    assert all(after[key] is cached[key] for key in cached)
@@ -0,0 +1,56 @@
+# tests/test_tiling.py
+
+import numpy as np
+import pytest
+
+from core.graph import GraphError
+from core.operators import Blend, Blur, BrightnessContrast, Convolution, EdgeDetection, Noise
+from core.tiling import render_tiled
+
+CHAINS = {
+    "blur": lambda: [Blur(radius=9)],
+    "bc-blur-sobel": lambda: [BrightnessContrast(brightness=20), Blur(radius=4), EdgeDetection(kernel_size=5)],
+    "convolution": lambda: [Convolution(preset="Gaussian", size=15)],
+    "noise": lambda: [Noise(kind="Fractal", scale=16.0, seed=3)],
+}
+
+
+@pytest.mark.parametrize("name", CHAINS)
+def test_tiled_render_matches_full_render(tmp_path, build, name):
+    image = np.random.default_rng(0).integers(0, 256, (301, 457, 3), dtype=np.uint8)
+    graph, source, sink = build(image, CHAINS[name](), path="/data/scan.png")
+    full = graph.evaluate([sink])[sink]["image"]
+    tiled = render_tiled(graph, source, sink, image, str(tmp_path / "out.npy"), tile_size=128)
+    assert tiled.dtype == full.dtype and np.array_equal(np.asarray(tiled), full)
+
+
+def test_tiled_render_restores_the_source(tmp_path, build):
+    image = np.zeros((64, 64), np.uint8)
+    graph, source, sink = build(image, [Blur()], path="/data/scan.png")
+    render_tiled(graph, source, sink, np.ones((200, 200), np.uint8), str(tmp_path / "out.npy"), tile_size=64)
+    assert source.image is image
+    assert source.params["path"] == "/data/scan.png"
+
+
+def standalone_noise_graph(build, image, width, height):
+    # A source node: Noise without an image input, blended over the image.
+    blend = Blend(layers=[{"mode": "Overlay", "opacity": 0.7}])
+    graph, source, sink = build(image, [blend])
+    noise = graph.add_node(Noise(kind="Perlin", width=width, height=height, scale=24.0, seed=5))
+    graph.connect(noise, blend, dst_port="layer1")
+    return graph, source, sink
+
+
+def test_standalone_noise_renders_the_tile_region(tmp_path, build):
+    image = np.random.default_rng(4).integers(0, 256, (300, 410, 3), dtype=np.uint8)
+    graph, source, sink = standalone_noise_graph(build, image, 410, 300)
+    full = graph.evaluate([sink])[sink]["image"]
+    tiled = render_tiled(graph, source, sink, image, str(tmp_path / "out.npy"), tile_size=128)
+    assert np.array_equal(np.asarray(tiled), full)
+
+
+def test_standalone_noise_of_another_size_is_rejected(tmp_path, build):
+    image = np.zeros((300, 410, 3), np.uint8)
+    graph, source, sink = standalone_noise_graph(build, image, 1024, 1024)
+    with pytest.raises(GraphError):
+        render_tiled(graph, source, sink, image, str(tmp_path / "out.npy"), tile_size=128)
@@ -0,0 +1,94 @@
+# ui/canvas.py
+#
+# Graph view that stays responsive with hundreds of nodes. Every node panel
+# is a QGraphicsProxyWidget, which is far more expensive to lay out and
+# paint than plain items. So in scalable mode:
+#
+# - only nodes in or near the viewport keep their panels (viewport culling);
+#   the scene's BSP index finds them without visiting every node;
+# - below LOD_ZOOM every node is a painted placeholder (level of detail);
+# - nodes and their labels are cached as device pixmaps
+#   (DeviceCoordinateCache), so panning and dragging blit instead of paint.
+#
+# A moved node re-routes only its own connections (BaseNode.itemChange).
+# The wheel zooms around the cursor; dragging the background pans.
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import QGraphicsProxyWidget, QGraphicsView
+
+LOD_ZOOM = 0.5
+# Scene px around the viewport whose nodes keep their panels, so panels that
+# extend past a node's frame and nodes just scrolled into view are ready.
+CULL_MARGIN = 400
+ZOOM_STEP = 1.15
+MIN_ZOOM = 0.05
+MAX_ZOOM = 2.0
+
+class NodeCanvas(QGraphicsView):
+    def __init__(self, scene, parent=None):
+        super().__init__(scene, parent)
+        self.nodes = []
+        self.scalable = False
+        self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+        self.setDragMode(QGraphicsView.ScrollHandDrag)
+        # Culling runs once per event loop pass, however many scroll steps.
+        self.cull_timer = QTimer(self)
+        self.cull_timer.setSingleShot(True)
+        self.cull_timer.setInterval(0)
+        self.cull_timer.timeout.connect(self.update_detail)
+
+    def add_node(self, node):
+        self.scene().addItem(node)
+        self.nodes.append(node)
+        node.set_cached(self.scalable)
+        self.cull_timer.start()
+
+    def remove_node(self, node):
+        self.scene().removeItem(node)
+        self.nodes.remove(node)
+
+    def set_scalable(self, scalable):
+        self.scalable = scalable
+        self.setOptimizationFlag(QGraphicsView.DontSavePainterState, scalable)
+        self.setOptimizationFlag(QGraphicsView.DontAdjustForAntialiasing, scalable)
+        for node in self.nodes:
+            node.set_cached(scalable)
+        self.update_detail()
+
+    def zoom(self):
+        return self.transform().m11()
+
+    def update_detail(self):
+        if not self.scalable:
+            wanted = set(self.nodes)
+        elif self.zoom() < LOD_ZOOM:
+            wanted = set()
+        else:
+            rect = self.mapToScene(self.viewport().rect()).boundingRect()
+            rect.adjust(-CULL_MARGIN, -CULL_MARGIN, CULL_MARGIN, CULL_MARGIN)
+            wanted = {item.topLevelItem() for item in self.scene().items(rect)}
+        for node in self.nodes:
+            node.set_detailed(node in wanted)
+
+    def wheelEvent(self, event):
+        if isinstance(self.itemAt(event.pos()), QGraphicsProxyWidget):
+            super().wheelEvent(event)  # spin boxes and combo boxes in a panel
+            return
+        factor = ZOOM_STEP if event.angleDelta().y() > 0 else 1 / ZOOM_STEP
+        factor = min(max(self.zoom() * factor, MIN_ZOOM), MAX_ZOOM) / self.zoom()
+        self.scale(factor, factor)
+        self.cull_timer.start()
+
+    def scrollContentsBy(self, dx, dy):
+        super().scrollContentsBy(dx, dy)
+        self.cull_timer.start()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.cull_timer.start()
+
+    def fit_all(self):
+        rect = self.scene().itemsBoundingRect()
+        if not rect.isEmpty():
+            self.fitInView(rect, Qt.KeepAspectRatio)
+            self.cull_timer.start()
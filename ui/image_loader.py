@@ -0,0 +1,67 @@
+# ui/image_loader.py
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+class LoadSignals(QObject):
+    preview = pyqtSignal(int, str, object)
+    done = pyqtSignal(int, str, object)
+
+class LoadJob(QRunnable):
+    def __init__(self, path, cache, preview_size, generation):
+        super().__init__()
+        self.path = path
+        self.cache = cache
+        self.preview_size = preview_size
+        self.generation = generation
+        self.signals = LoadSignals()
+
+    def run(self):
+        from core.image_io import read_image, read_preview
+        if not self.cache.contains(self.path):
+            preview = read_preview(self.path, *self.preview_size)
+            if preview is not None:
+                self.signals.preview.emit(self.generation, self.path, preview)
+        image = read_image(self.path, self.cache)
+        self.signals.done.emit(self.generation, self.path, image)
+
+class ImageLoader(QObject):
+    # Decodes source images off the GUI thread. A reduced JPEG decode is
+    # reported first (preview_ready) so something shows at once, then the
+    # full decode (image_ready, None if the file could not be read). Decoded
+    # images go through an LRU DecodeCache, so reopening a file is instant.
+    # Only the newest request reports back; superseded loads still fill the
+    # cache. Without a cache one is made on the first load, keeping OpenCV
+    # out of the editor's startup.
+    preview_ready = pyqtSignal(str, object)
+    image_ready = pyqtSignal(str, object)
+
+    def __init__(self, cache=None, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(2)
+        self.generation = 0
+        self.jobs = {}
+
+    def load(self, path, preview_size):
+        if self.cache is None:
+            from core.image_io import DecodeCache
+            self.cache = DecodeCache()
+        self.generation += 1
+        job = LoadJob(path, self.cache, (preview_size.width(), preview_size.height()), self.generation)
+        job.signals.preview.connect(self.on_preview)
+        job.signals.done.connect(self.on_done)
+        self.jobs[self.generation] = job
+        self.pool.start(job)
+
+    def on_preview(self, generation, path, image):
+        if generation == self.generation:
+            self.preview_ready.emit(path, image)
+
+    def on_done(self, generation, path, image):
+        self.jobs.pop(generation, None)
+        if generation == self.generation:
+            self.image_ready.emit(path, image)
+
+    def wait(self):
+        self.pool.waitForDone()
@@ -0,0 +1,28 @@
+# ui/preview.py
+
+from PyQt5.QtGui import QImage, QPixmap
+import numpy as np
+from core.kernels import channel_count, downscale, to_uint8
+
+QIMAGE_FORMATS = {
+    1: QImage.Format_Grayscale8,
+    3: QImage.Format_BGR888,
+    4: QImage.Format_ARGB32,  # BGRA byte order on little-endian machines
+}
+
+def preview_qimage(image, width=None, height=None):
+    # Shrink first (INTER_AREA) so every later step touches preview-sized
+    # data only, then wrap the array in a QImage without copying it.
+    if width and height:
+        rows, cols = image.shape[:2]
+        image = downscale(image, min(width / cols, height / rows))
+    image = np.ascontiguousarray(to_uint8(image))
+    rows, cols = image.shape[:2]
+    qimage = QImage(image.data, cols, rows, image.strides[0], QIMAGE_FORMATS[channel_count(image)])
+    qimage.ndarray = image  # QImage does not own the buffer
+    return qimage
+
+def preview_pixmap(image, size=None):
+    if size is None:
+        return QPixmap.fromImage(preview_qimage(image))
+    return QPixmap.fromImage(preview_qimage(image, size.width(), size.height()))
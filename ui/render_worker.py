@@ -0,0 +1,78 @@
+# ui/render_worker.py
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from core.graph import EvaluationCancelled
+
+class RenderSignals(QObject):
+    # generation, output image (None is a valid result), cancelled, error
+    done = pyqtSignal(int, object, bool, str)
+
+class RenderJob(QRunnable):
+    def __init__(self, graph, target, context, generation):
+        super().__init__()
+        self.graph = graph
+        self.target = target
+        self.context = context
+        self.generation = generation
+        self.signals = RenderSignals()
+
+    def run(self):
+        # Whatever happens, done is emitted so the worker can start the next
+        # render. That includes a graph edited on the GUI thread mid-render;
+        # the edit has queued a newer request anyway.
+        image, cancelled, error = None, False, ""
+        try:
+            results = self.graph.evaluate([self.target], self.context)
+            image = results[self.target]["image"]
+        except EvaluationCancelled:
+            cancelled = True
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+        self.signals.done.emit(self.generation, image, cancelled, error)
+
+class RenderWorker(QObject):
+    # Evaluates the graph off the GUI thread. Only one render is in flight at
+    # a time and only the newest request is kept pending; an in-flight render
+    # that has been superseded stops at the next node boundary and its result
+    # is dropped. The heavy kernels are OpenCV calls that release the GIL and
+    # use OpenCV's own worker threads, so the GUI thread stays free.
+    result_ready = pyqtSignal(object)
+    render_failed = pyqtSignal(str)
+
+    def __init__(self, graph, target, parent=None):
+        super().__init__(parent)
+        self.graph = graph
+        self.target = target
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.generation = 0
+        self.pending = None
+        self.active = None
+
+    def request(self, context):
+        self.generation += 1
+        generation = self.generation
+        context.cancelled = lambda: generation != self.generation
+        self.pending = (generation, context)
+        if self.active is None:
+            self.start_pending()
+
+    def start_pending(self):
+        generation, context = self.pending
+        self.pending = None
+        self.active = RenderJob(self.graph, self.target, context, generation)
+        self.active.signals.done.connect(self.on_job_done)
+        self.pool.start(self.active)
+
+    def on_job_done(self, generation, image, cancelled, error):
+        self.active = None
+        if generation == self.generation and not cancelled:
+            if error:
+                self.render_failed.emit(error)
+            else:
+                self.result_ready.emit(image)
+        if self.pending is not None:
+            self.start_pending()
+
+    def wait(self):
+        self.pool.waitForDone()